@@ -2,8 +2,8 @@
 
 # This file implements an ELF parsing tool similar to readelf,
 # but information is emitted in XML format for further processing
-# by other programs. It relies on the bintools elf library, which
-# unfortunately seems to be no longer developed.
+# by other programs. ELF files are decoded directly from a memory map
+# of the file, so only the parts of the file that are looked at are read.
 
 # Copyright (c) 2014-2016, Jonas Zaddach <jonas.zaddach@gmail.com> 
 # All rights reserved.
@@ -33,8 +33,47 @@
 
 import os
 import sys
-import bintools.elf
+import bisect
+import heapq
+import mmap
+import struct
+import multiprocessing
+import hashlib
+import sqlite3
+import cPickle
+import zlib
+import time
+import stat
+import fnmatch
+import threading
+import Queue
+import collections
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+    
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+    
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+    
+try:
+    from os import scandir as scandir_function
+except ImportError:
+    try:
+        from scandir import scandir as scandir_function
+    except ImportError:
+        scandir_function = None
 import xml.dom.minidom
+import xml.sax.saxutils
 import argparse
 
 #include/elf/common.h
@@ -386,6 +425,7 @@ SHF_LINK_ORDER =    (1 << 7)    # Preserve section ordering when linking
 SHF_OS_NONCONFORMING = (1 << 8)    # OS specific processing required 
 SHF_GROUP =    (1 << 9)    # Member of a section group 
 SHF_TLS =        (1 << 10)    # Thread local storage section 
+SHF_COMPRESSED =    (1 << 11)    # Section with compressed data 
 SHF_MASKOS =    0x0FF00000    # New value, Oct 4, 1999 Draft 
 SHF_MASKPROC =    0xF0000000    # Processor-specific semantics 
 SHF_EXCLUDE =    0x80000000    # Link editor is to exclude
@@ -394,6 +434,7 @@ NT_FPREGSET =    2        # Contains copy of fpregset struct
 NT_PRPSINFO =    3        # Contains copy of prpsinfo struct 
 NT_TASKSTRUCT =    4        # Contains copy of task struct 
 NT_AUXV =        6        # Contains copy of Elfxx_auxv_t 
+NT_FILE =        0x46494c45    # Contains information about mapped files 
 NT_PRXFPREG =    0x46e62b7f    # Contains a user_xfpregs_struct; 
 NT_PPC_VMX =    0x100        # PowerPC Altivec/VMX registers 
 NT_PPC_VSX =    0x102        # PowerPC VSX registers 
@@ -2650,13 +2691,13 @@ def get_osabi_name(osabi, elf_header):
             ELFOSABI_FENIXOS: "FenixOS"}[osabi]
     except KeyError, err:
         if osabi >= 64:
-            if elf_header.e_machine == EM_ARM and osabi == ELFOSABI_ARM:
+            if elf_header.machine == EM_ARM and osabi == ELFOSABI_ARM:
                 return "ARM"
-            elif elf_header.e_machine in [EM_MSP430, EM_MSP430_OLD] and osabi == ELFOSABI_STANDALONE:
+            elif elf_header.machine in [EM_MSP430, EM_MSP430_OLD] and osabi == ELFOSABI_STANDALONE:
                 return  "Standalone App"
-            elif elf_header.e_machine == EM_TI_C6000 and osabi == ELFOSABI_C6000_ELFABI:
+            elif elf_header.machine == EM_TI_C6000 and osabi == ELFOSABI_C6000_ELFABI:
                 return "Bare-metal C6000"
-            elif elf_header.e_machine == EM_TI_C6000 and osabi == ELFOSABI_C6000_LINUX:
+            elif elf_header.machine == EM_TI_C6000 and osabi == ELFOSABI_C6000_LINUX:
                 return "Linux C6000"
         
         return "<unknown: %x>" % osabi
@@ -2665,7 +2706,7 @@ def get_osabi_name(osabi, elf_header):
 def process_program_headers(elf):
     program_headers = []
     
-    if elf.header.e_phnum == 0 and elf.header.e_phoff != 0:
+    if elf.ph_count == 0 and elf.header.ph_offset != 0:
         raise Exception("possibly corrupt ELF header - it has a non-zero program header offset, but no program headers")
     
     for segment in elf.prog_headers:
@@ -2683,10 +2724,9 @@ def process_program_headers(elf):
                 "decoded_values" : reduce(lambda r, x: (segment.flags & x[0]) and  (r + [x[1]]) or (r), [(PF_R, 'R'), (PF_W, 'W'), (PF_X, 'E')], [])},
             "align": segment.align}
         
-        if segment.p_type == PT_DYNAMIC:
-            dynamic_size = segment.p_filesz
-            dynamic_address = segment.p_offset
-        elif segment.p_type == PT_INTERP:
+        if segment.type == PT_DYNAMIC:
+            program_header["comments"] = {"dynamic_entries": len(elf.dynamic)}
+        elif segment.type == PT_INTERP:
             program_header["comments"] = {"interpreter_name": segment.data}
             
         program_headers.append(program_header)
@@ -2697,16 +2737,184 @@ def process_program_headers(elf):
         
     
     
+# Processor specific sections holding build attributes, in addition to SHT_GNU_ATTRIBUTES
+ATTRIBUTES_SECTION_TYPES = {
+    EM_ARM: SHT_ARM_ATTRIBUTES,
+    EM_TI_C6000: SHT_C6000_ATTRIBUTES}
+    
+ATTRIBUTE_SCOPES = {
+    1: "File",
+    2: "Section",
+    3: "Symbol"}
+    
+Tag_compatibility = 32
+
+ARM_ATTRIBUTE_TAGS = {
+    4: "CPU_raw_name",
+    5: "CPU_name",
+    6: "CPU_arch",
+    7: "CPU_arch_profile",
+    8: "ARM_ISA_use",
+    9: "THUMB_ISA_use",
+    10: "FP_arch",
+    11: "WMMX_arch",
+    12: "Advanced_SIMD_arch",
+    13: "PCS_config",
+    14: "ABI_PCS_R9_use",
+    15: "ABI_PCS_RW_data",
+    16: "ABI_PCS_RO_data",
+    17: "ABI_PCS_GOT_use",
+    18: "ABI_PCS_wchar_t",
+    19: "ABI_FP_rounding",
+    20: "ABI_FP_denormal",
+    21: "ABI_FP_exceptions",
+    22: "ABI_FP_user_exceptions",
+    23: "ABI_FP_number_model",
+    24: "ABI_align_needed",
+    25: "ABI_align_preserved",
+    26: "ABI_enum_size",
+    27: "ABI_HardFP_use",
+    28: "ABI_VFP_args",
+    29: "ABI_WMMX_args",
+    30: "ABI_optimization_goals",
+    31: "ABI_FP_optimization_goals",
+    32: "compatibility",
+    34: "CPU_unaligned_access",
+    36: "FP_HP_extension",
+    38: "ABI_FP_16bit_format",
+    42: "MPextension_use",
+    44: "DIV_use",
+    46: "DSP_extension",
+    64: "nodefaults",
+    65: "also_compatible_with",
+    66: "T2EE_use",
+    67: "conformance",
+    68: "Virtualization_use"}
+    
+ARM_ATTRIBUTE_VALUES = {
+    6: dict(enumerate(("Pre-v4", "v4", "v4T", "v5T", "v5TE", "v5TEJ", "v6", "v6KZ", "v6T2", "v6K", "v7", "v6-M", 
+        "v6S-M", "v7E-M", "v8", "v8-R", "v8-M.baseline", "v8-M.mainline", "v8.1-A", "v8.2-A", "v8.3-A", 
+        "v8.1-M.mainline", "v9"))),
+    7: {0: "None", ord("A"): "Application", ord("R"): "Realtime", ord("M"): "Microcontroller", ord("S"): "Application or Realtime"},
+    8: dict(enumerate(("No", "Yes"))),
+    9: dict(enumerate(("No", "Thumb-1", "Thumb-2", "Yes"))),
+    10: dict(enumerate(("No", "VFPv1", "VFPv2", "VFPv3", "VFPv3-D16", "VFPv4", "VFPv4-D16", "FP for ARMv8", 
+        "FPv5/FP-D16 for ARMv8"))),
+    27: dict(enumerate(("As Tag_FP_arch", "SP only", "Reserved", "Deprecated"))),
+    28: dict(enumerate(("AAPCS", "VFP registers", "custom", "compatible")))}
+    
+def read_uleb128(view, offset):
+    """Decode the unsigned LEB128 number at offset of view, return (value, offset after it)"""
+    value = 0
+    shift = 0
+    while True:
+        byte = ord(view[offset])
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return (value, offset)
+            
+def read_ntbs(view, offset, end):
+    """Read the NUL-terminated string at offset of view, return (string, offset after the NUL)"""
+    start = offset
+    while offset < end and view[offset] != "\0":
+        offset += 1
+    return (view[start:offset], offset + 1)
+    
+def attribute_is_string(vendor, tag):
+    if vendor == "aeabi" and tag in (4, 5):
+        return True
+    return tag >= 32 and tag & 1
+    
+def iter_attributes(view, word):
+    """Walk the build attributes of an attributes section, one attribute at a time.
+    
+    The vendor subsections, their file, section and symbol sub-subsections and 
+    the tags in them are decoded in place from view, so only the string values 
+    are copied. Yields (vendor, scope, indices, tag, value), where indices are
+    the section or symbol numbers a Section or Symbol scope applies to.
+    view -- buffer over the section contents.
+    word -- struct.Struct for a 32 bit word in the byte order of the file.
+    """
+    if len(view) == 0:
+        return
+    if view[0] != "A":
+        raise Exception("unknown build attributes format version %#x" % ord(view[0]))
+    offset = 1
+    while offset < len(view):
+        (length, ) = word.unpack_from(view, offset)
+        end = offset + length
+        if length < 4 or end > len(view):
+            raise Exception("possibly corrupt ELF file - build attributes subsection of %d bytes does not fit the section" % length)
+        (vendor, position) = read_ntbs(view, offset + 4, end)
+        while position < end:
+            start = position
+            (scope, position) = read_uleb128(view, position)
+            (size, ) = word.unpack_from(view, position)
+            position += 4
+            if size < position - start or start + size > end:
+                raise Exception("possibly corrupt ELF file - build attributes of vendor %s do not fit their subsection" % vendor)
+            indices = []
+            if scope in (2, 3):
+                while True:
+                    (index, position) = read_uleb128(view, position)
+                    if index == 0:
+                        break
+                    indices.append(index)
+            while position < start + size:
+                (tag, position) = read_uleb128(view, position)
+                if tag == Tag_compatibility:
+                    (flag, position) = read_uleb128(view, position)
+                    (name, position) = read_ntbs(view, position, end)
+                    value = {"flag": flag, "vendor": name}
+                elif attribute_is_string(vendor, tag):
+                    (value, position) = read_ntbs(view, position, end)
+                else:
+                    (value, position) = read_uleb128(view, position)
+                yield (vendor, scope, indices, tag, value)
+            position = start + size
+        offset = end
+        
 def process_attributes(elf):
+    """Decode the build attributes of the .gnu.attributes and processor specific attributes sections (.ARM.attributes, ...)"""
+    proc_type = ATTRIBUTES_SECTION_TYPES.get(elf.header.machine)
+    attributes = []
     for sect_header in elf.sect_headers:
-        if sect_header.sh_type != SHT_GNU_ATTRIBUTES and sect_header.sh_type != proc_type:
+        if sect_header.type != SHT_GNU_ATTRIBUTES and sect_header.type != proc_type:
             continue
+        if sect_header.offset + sect_header.size > elf.size:
+            raise Exception("possibly corrupt ELF file - section %s extends past end of file" % sect_header.name)
+        view = buffer(elf.map, sect_header.offset, sect_header.size)
+        try:
+            for (vendor, scope, indices, tag, value) in iter_attributes(view, elf.layout.word):
+                description = "Tag_unknown_%d" % tag
+                if vendor == "aeabi" and tag in ARM_ATTRIBUTE_TAGS:
+                    description = "Tag_" + ARM_ATTRIBUTE_TAGS[tag]
+                    if tag in ARM_ATTRIBUTE_VALUES and value in ARM_ATTRIBUTE_VALUES[tag]:
+                        value = {"value": value, "description": ARM_ATTRIBUTE_VALUES[tag][value]}
+                elif tag == Tag_compatibility:
+                    description = "Tag_compatibility"
+                attribute = {
+                    "section": sect_header.name,
+                    "vendor": vendor,
+                    "scope": ATTRIBUTE_SCOPES.get(scope, scope),
+                    "tag": {
+                        "value": tag,
+                        "description": description},
+                    "value": value}
+                if indices:
+                    attribute["applies_to"] = " ".join(str(x) for x in indices)
+                attributes.append(attribute)
+        except (IndexError, struct.error):
+            raise Exception("possibly corrupt ELF file - build attributes in section %s are truncated" % sect_header.name)
+    return attributes
     
 
 ELF_CLASS = {
-    'ELFCLASSNONE': "NONE",
-    'ELFCLASS32': "ELF32",
-    'ELFCLASS64': "ELF64"}
+    ELFCLASSNONE: "NONE",
+    ELFCLASS32: "ELF32",
+    ELFCLASS64: "ELF64"}
 
 # e_ident[EI_DATA] 
 ELFDATANONE  =   0               
@@ -3102,49 +3310,1488 @@ def phdr_type(ptype):
         else:
             return "<unknown: %#x>" % ptype
 
+# Dynamic tags whose value is an offset into the dynamic string table
+DYNAMIC_STRING_TAGS = frozenset((DT_NEEDED, DT_SONAME, DT_RPATH, DT_RUNPATH, DT_CONFIG, DT_DEPAUDIT, 
+    DT_AUDIT, DT_AUXILIARY, DT_FILTER))
+            
+def dynamic_tag(tag):
+    try:
+        return {
+            DT_NULL: "NULL",
+            DT_NEEDED: "NEEDED",
+            DT_PLTRELSZ: "PLTRELSZ",
+            DT_PLTGOT: "PLTGOT",
+            DT_HASH: "HASH",
+            DT_STRTAB: "STRTAB",
+            DT_SYMTAB: "SYMTAB",
+            DT_RELA: "RELA",
+            DT_RELASZ: "RELASZ",
+            DT_RELAENT: "RELAENT",
+            DT_STRSZ: "STRSZ",
+            DT_SYMENT: "SYMENT",
+            DT_INIT: "INIT",
+            DT_FINI: "FINI",
+            DT_SONAME: "SONAME",
+            DT_RPATH: "RPATH",
+            DT_SYMBOLIC: "SYMBOLIC",
+            DT_REL: "REL",
+            DT_RELSZ: "RELSZ",
+            DT_RELENT: "RELENT",
+            DT_PLTREL: "PLTREL",
+            DT_DEBUG: "DEBUG",
+            DT_TEXTREL: "TEXTREL",
+            DT_JMPREL: "JMPREL",
+            DT_BIND_NOW: "BIND_NOW",
+            DT_INIT_ARRAY: "INIT_ARRAY",
+            DT_FINI_ARRAY: "FINI_ARRAY",
+            DT_INIT_ARRAYSZ: "INIT_ARRAYSZ",
+            DT_FINI_ARRAYSZ: "FINI_ARRAYSZ",
+            DT_RUNPATH: "RUNPATH",
+            DT_FLAGS: "FLAGS",
+            DT_PREINIT_ARRAY: "PREINIT_ARRAY",
+            DT_PREINIT_ARRAYSZ: "PREINIT_ARRAYSZ",
+            DT_GNU_PRELINKED: "GNU_PRELINKED",
+            DT_GNU_CONFLICTSZ: "GNU_CONFLICTSZ",
+            DT_GNU_LIBLISTSZ: "GNU_LIBLISTSZ",
+            DT_CHECKSUM: "CHECKSUM",
+            DT_PLTPADSZ: "PLTPADSZ",
+            DT_MOVEENT: "MOVEENT",
+            DT_MOVESZ: "MOVESZ",
+            DT_FEATURE: "FEATURE",
+            DT_POSFLAG_1: "POSFLAG_1",
+            DT_SYMINSZ: "SYMINSZ",
+            DT_SYMINENT: "SYMINENT",
+            DT_GNU_HASH: "GNU_HASH",
+            DT_TLSDESC_PLT: "TLSDESC_PLT",
+            DT_TLSDESC_GOT: "TLSDESC_GOT",
+            DT_GNU_CONFLICT: "GNU_CONFLICT",
+            DT_GNU_LIBLIST: "GNU_LIBLIST",
+            DT_CONFIG: "CONFIG",
+            DT_DEPAUDIT: "DEPAUDIT",
+            DT_AUDIT: "AUDIT",
+            DT_PLTPAD: "PLTPAD",
+            DT_MOVETAB: "MOVETAB",
+            DT_SYMINFO: "SYMINFO",
+            DT_VERSYM: "VERSYM",
+            DT_RELACOUNT: "RELACOUNT",
+            DT_RELCOUNT: "RELCOUNT",
+            DT_FLAGS_1: "FLAGS_1",
+            DT_VERDEF: "VERDEF",
+            DT_VERDEFNUM: "VERDEFNUM",
+            DT_VERNEED: "VERNEED",
+            DT_VERNEEDNUM: "VERNEEDNUM",
+            DT_AUXILIARY: "AUXILIARY",
+            DT_USED: "USED",
+            DT_FILTER: "FILTER"}[tag]
+    except KeyError, err:
+        if tag >= DT_LOPROC and tag <= DT_HIPROC:
+            return "LOPROC+%#x" % (tag - DT_LOPROC)
+        elif tag >= OLD_DT_LOOS and tag <= OLD_DT_HIOS:
+            return "LOOS+%#x" % (tag - OLD_DT_LOOS)
+        else:
+            return "<unknown: %#x>" % tag
+
+ELFMAG = chr(ELFMAG0) + ELFMAG1 + ELFMAG2 + ELFMAG3
+
+# On-disk values of the reserved section indices (the SHN_* constants
+# from internal.h above are the negative values used inside bfd)
+ESHN_UNDEF = 0
+ESHN_LORESERVE = 0xff00
+ESHN_ABS = 0xfff1
+ESHN_COMMON = 0xfff2
+ESHN_XINDEX = 0xffff
+
+ELFCOMPRESS_ZLIB = 1    # ch_type of zlib compressed sections
+ELFCOMPRESS_ZSTD = 2    # ch_type of zstd compressed sections
+ZDEBUG_MAGIC = "ZLIB"   # Start of the legacy .zdebug_* sections
+
+class ElfLayout(object):
+    """Precompiled structures for one combination of ELF class and data encoding.
+    
+    All fields are decoded with struct.Struct.unpack_from directly from the
+    memory map, so nothing is copied except the decoded values.
+    """
+    
+    def __init__(self, elfclass, endianness):
+        byte_order = {ELFDATA2LSB: "<", ELFDATA2MSB: ">"}[endianness]
+        self.elfclass = elfclass
+        self.endianness = endianness
+        self.byte_order = byte_order
+        self.word = struct.Struct(byte_order + "I")
+        if elfclass == ELFCLASS32:
+            self.addr = struct.Struct(byte_order + "I")
+            self.dyn = struct.Struct(byte_order + "II")
+            self.ehdr = struct.Struct(byte_order + "HHIIIIIHHHHHH")
+            self.phdr = struct.Struct(byte_order + "IIIIIIII")
+            self.shdr = struct.Struct(byte_order + "IIIIIIIIII")
+            self.sym = struct.Struct(byte_order + "IIIBBH")
+            self.chdr = struct.Struct(byte_order + "III")
+        elif elfclass == ELFCLASS64:
+            self.addr = struct.Struct(byte_order + "Q")
+            self.dyn = struct.Struct(byte_order + "QQ")
+            self.ehdr = struct.Struct(byte_order + "HHIQQQIHHHHHH")
+            self.phdr = struct.Struct(byte_order + "IIQQQQQQ")
+            self.shdr = struct.Struct(byte_order + "IIQQQQIIQQ")
+            self.sym = struct.Struct(byte_order + "IBBHQQ")
+            self.chdr = struct.Struct(byte_order + "IIQQ")
+        else:
+            raise KeyError(elfclass)
+        
+    def unpack_phdr(self, buf, offset):
+        """Return (type, offset, vaddr, paddr, filesz, memsz, flags, align)"""
+        fields = self.phdr.unpack_from(buf, offset)
+        if self.elfclass == ELFCLASS64:
+            (p_type, p_flags, p_offset, p_vaddr, p_paddr, p_filesz, p_memsz, p_align) = fields
+            return (p_type, p_offset, p_vaddr, p_paddr, p_filesz, p_memsz, p_flags, p_align)
+        return fields
+        
+    def unpack_sym(self, buf, offset):
+        """Return (name, value, size, info, other, shndx)"""
+        fields = self.sym.unpack_from(buf, offset)
+        if self.elfclass == ELFCLASS64:
+            (st_name, st_info, st_other, st_shndx, st_value, st_size) = fields
+            return (st_name, st_value, st_size, st_info, st_other, st_shndx)
+        return fields
+        
+    def unpack_dynamic(self, buf, offset, count):
+        """Return the (tag, value) pairs of count dynamic entries as one flat tuple, decoded with a single unpack"""
+        return struct.unpack_from("%s%d%s" % (self.byte_order, count * 2, self.dyn.format[-1]), buf, offset)
+        
+    def unpack_chdr(self, buf, offset):
+        """Return (type, size, addralign) of a compression header"""
+        fields = self.chdr.unpack_from(buf, offset)
+        if self.elfclass == ELFCLASS64:
+            (ch_type, ch_reserved, ch_size, ch_addralign) = fields
+            return (ch_type, ch_size, ch_addralign)
+        return fields
+
+ELF_LAYOUTS = dict(((elfclass, endianness), ElfLayout(elfclass, endianness))
+    for elfclass in (ELFCLASS32, ELFCLASS64)
+    for endianness in (ELFDATA2LSB, ELFDATA2MSB))
+    
+def elf_layout(ident):
+    """Check the e_ident bytes of a file and return the matching ElfLayout"""
+    if len(ident) < EI_NIDENT or ident[:len(ELFMAG)] != ELFMAG:
+        raise Exception("not an ELF file - it has the wrong magic bytes at the start")
+    try:
+        return ELF_LAYOUTS[(ord(ident[EI_CLASS]), ord(ident[EI_DATA]))]
+    except KeyError:
+        raise Exception("unsupported ELF class %d or data encoding %d" % (ord(ident[EI_CLASS]), ord(ident[EI_DATA])))
+    
+class ElfHeader(object):
+    def __init__(self, ident, fields):
+        self.elfclass = ord(ident[EI_CLASS])
+        self.data = ord(ident[EI_DATA])
+        self.osabi = ord(ident[EI_OSABI])
+        self.abiversion = ord(ident[EI_ABIVERSION])
+        (self.type, self.machine, self.version, self.entry, self.ph_offset, 
+         self.sh_offset, self.flags, self.header_size, self.ph_entry_size, 
+         self.ph_count, self.sh_entry_size, self.sh_count, self.shstrndx) = fields
+         
+class ElfProgramHeader(object):
+    def __init__(self, elf, index, fields):
+        self.elf = elf
+        self.index = index
+        (self.type, self.offset, self.vaddr, self.paddr, self.filesz, 
+         self.memsz, self.flags, self.align) = fields
+    
+    @property
+    def data(self):
+        """Contents of the segment in the file"""
+        return self.elf.read(self.offset, self.filesz)
+        
+class ElfSectionHeader(object):
+    def __init__(self, elf, index, fields):
+        self.elf = elf
+        self.index = index
+        self.name = ""
+        (self.name_offset, self.type, self.flags, self.addr, self.offset, 
+         self.size, self.link, self.info, self.addralign, self.entsize) = fields
+        self._symbols = None
+         
+    @property
+    def data(self):
+        """Contents of the section in the file"""
+        if self.type == SHT_NOBITS:
+            return ""
+        return self.elf.read(self.offset, self.size)
+        
+    @property
+    def compression(self):
+        """(compression, uncompressed size, offset of the compressed data) if the section is compressed, else None.
+        
+        compression is ELFCOMPRESS_ZLIB or ELFCOMPRESS_ZSTD for SHF_COMPRESSED 
+        sections and ZDEBUG_MAGIC for legacy .zdebug_* sections.
+        """
+        if self.type == SHT_NOBITS:
+            return None
+        layout = self.elf.layout
+        if self.flags & SHF_COMPRESSED:
+            if self.size < layout.chdr.size or self.offset + self.size > self.elf.size:
+                raise Exception("possibly corrupt ELF file - compressed section %s is too small or extends past end of file" % self.name)
+            (ch_type, ch_size, ch_addralign) = layout.unpack_chdr(self.elf.map, self.offset)
+            return (ch_type, ch_size, self.offset + layout.chdr.size)
+        if self.name.startswith(".zdebug") and self.size >= 12 and self.elf.read(self.offset, 4) == ZDEBUG_MAGIC:
+            (size, ) = struct.unpack_from(">Q", self.elf.map, self.offset + 4)
+            return (ZDEBUG_MAGIC, size, self.offset + 12)
+        return None
+        
+    def iter_contents(self, chunk_size = 1024 * 1024):
+        """Yield the uncompressed contents of the section in chunks of about chunk_size bytes.
+        
+        Compressed sections are inflated while the chunks are consumed, with at 
+        most chunk_size bytes of compressed input fed at once, so the whole
+        section never has to be in memory.
+        """
+        compression = self.compression
+        if compression is None:
+            if self.type == SHT_NOBITS:
+                return
+            if self.offset + self.size > self.elf.size:
+                raise Exception("possibly corrupt ELF file - section %s extends past end of file" % self.name)
+            for offset in xrange(self.offset, self.offset + self.size, chunk_size):
+                yield self.elf.map[offset:min(offset + chunk_size, self.offset + self.size)]
+            return
+            
+        (ctype, size, start) = compression
+        end = self.offset + self.size
+        if ctype == ELFCOMPRESS_ZLIB or ctype == ZDEBUG_MAGIC:
+            decompressor = zlib.decompressobj()
+            def decompress(data):
+                while data:
+                    chunk = decompressor.decompress(data, chunk_size)
+                    if chunk:
+                        yield chunk
+                    data = decompressor.unconsumed_tail
+            flush = decompressor.flush
+        elif ctype == ELFCOMPRESS_ZSTD:
+            if zstandard is None:
+                raise Exception("section %s is compressed with zstd, which needs the zstandard module" % self.name)
+            decompressor = zstandard.ZstdDecompressor().decompressobj()
+            def decompress(data):
+                chunk = decompressor.decompress(str(data))
+                if chunk:
+                    yield chunk
+            flush = lambda: ""
+        else:
+            raise Exception("section %s has unknown compression type %d" % (self.name, ctype))
+            
+        total = 0
+        try:
+            for offset in xrange(start, end, chunk_size):
+                for chunk in decompress(buffer(self.elf.map, offset, min(chunk_size, end - offset))):
+                    total += len(chunk)
+                    yield chunk
+            chunk = flush()
+        except zlib.error, ex:
+            raise Exception("possibly corrupt ELF file - section %s cannot be decompressed: %s" % (self.name, ex))
+        if chunk:
+            total += len(chunk)
+            yield chunk
+        if total != size:
+            raise Exception("possibly corrupt ELF file - section %s decompressed to %d bytes instead of %d" % (self.name, total, size))
+            
+    @property
+    def contents(self):
+        """Uncompressed contents of the section.
+        
+        Decompressed contents are kept in the decompressed_sections cache, keyed
+        by the identity of the file and the section index, so a section is only
+        inflated again after it was evicted.
+        """
+        if self.compression is None:
+            return self.data
+        key = (self.elf.identity, self.index)
+        contents = decompressed_sections.get(key)
+        if contents is None:
+            contents = "".join(self.iter_contents())
+            decompressed_sections.put(key, contents)
+        return contents
+        
+    @property
+    def symbols(self):
+        """Symbols of a SHT_SYMTAB or SHT_DYNSYM section, decoded on first access"""
+        if self._symbols is None:
+            if self.type in (SHT_SYMTAB, SHT_DYNSYM):
+                self._symbols = self.elf.read_symbols(self)
+            else:
+                self._symbols = []
+        return self._symbols
+        
+class SectionCache(object):
+    """Least recently used cache of decompressed section contents, bounded by their total size in bytes.
+    
+    Keys are (file identity, section index), see ElfFile.identity. Contents 
+    bigger than max_size are not cached. Safe to use from several threads.
+    """
+    
+    def __init__(self, max_size = 64 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        
+    def get(self, key):
+        with self.lock:
+            contents = self.entries.pop(key, None)
+            if not contents is None:
+                self.entries[key] = contents
+            return contents
+            
+    def put(self, key, contents):
+        if len(contents) > self.max_size:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if not previous is None:
+                self.size -= len(previous)
+            self.entries[key] = contents
+            self.size += len(contents)
+            while self.size > self.max_size:
+                (_, evicted) = self.entries.popitem(last = False)
+                self.size -= len(evicted)
+                
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+            
+# Decompressed section contents shared by all ElfFiles
+decompressed_sections = SectionCache()
+
+class AddressTranslator(object):
+    """Sorted interval index translating between virtual addresses and file offsets.
+    
+    Built once from the program headers, the loadable segments are kept sorted 
+    by address and by file offset, so each translation is a binary search 
+    instead of a scan over the segments. The bulk translations take a list, or 
+    a NumPy array which is translated in one vectorized pass.
+    segments -- ElfProgramHeader objects; the PT_LOAD segments among them are used.
+    """
+    
+    def __init__(self, segments):
+        loads = [x for x in segments if x.type == PT_LOAD and x.memsz > 0]
+        self.segments = sorted(loads, key = lambda x: x.vaddr)
+        self.starts = [x.vaddr for x in self.segments]
+        self.by_offset = sorted((x for x in loads if x.filesz > 0), key = lambda x: x.offset)
+        self.address_table = (self.starts, [x.filesz for x in self.segments], [x.offset for x in self.segments])
+        self.offset_table = ([x.offset for x in self.by_offset], [x.filesz for x in self.by_offset], [x.vaddr for x in self.by_offset])
+        
+    def segment_at(self, vaddr):
+        """PT_LOAD segment whose memory holds vaddr, or None"""
+        i = bisect.bisect_right(self.starts, vaddr) - 1
+        if i >= 0 and vaddr < self.segments[i].vaddr + self.segments[i].memsz:
+            return self.segments[i]
+        return None
+        
+    def to_offset(self, vaddr):
+        """File offset of virtual address vaddr, or None if no segment maps it from the file"""
+        return self.translate_many([vaddr], *self.address_table)[0]
+        
+    def to_vaddr(self, offset):
+        """Virtual address file offset offset is loaded at, or None"""
+        return self.translate_many([offset], *self.offset_table)[0]
+        
+    def to_offsets(self, vaddrs):
+        """File offsets of many virtual addresses, see translate_many"""
+        return self.translate_many(vaddrs, *self.address_table)
+        
+    def to_vaddrs(self, offsets):
+        """Virtual addresses of many file offsets, see translate_many"""
+        return self.translate_many(offsets, *self.offset_table)
+        
+    def translate_many(self, values, starts, sizes, targets):
+        """Translate values in the sorted ranges [starts[i], starts[i] + sizes[i]) to targets[i] + (value - starts[i]).
+        
+        Returns a list with None for values outside all ranges, or for a NumPy 
+        array an int64 array with -1 for them.
+        """
+        if not numpy is None and isinstance(values, numpy.ndarray):
+            values = values.astype(numpy.uint64)
+            if not starts:
+                return numpy.full(values.shape, -1, numpy.int64)
+            starts = numpy.array(starts, numpy.uint64)
+            index = numpy.searchsorted(starts, values, side = "right").astype(numpy.int64) - 1
+            valid = index >= 0
+            index[~valid] = 0
+            delta = values - starts[index]
+            valid &= delta < numpy.array(sizes, numpy.uint64)[index]
+            return numpy.where(valid, (numpy.array(targets, numpy.uint64)[index] + delta).astype(numpy.int64), -1)
+            
+        result = []
+        for value in values:
+            i = bisect.bisect_right(starts, value) - 1
+            if i >= 0 and value - starts[i] < sizes[i]:
+                result.append(targets[i] + value - starts[i])
+            else:
+                result.append(None)
+        return result
+        
+class ElfSymbol(object):
+    __slots__ = ("index", "name", "value", "size", "info", "other", "section")
+    
+    def __init__(self, index, name, fields):
+        self.index = index
+        self.name = name
+        (_, self.value, self.size, self.info, self.other, self.section) = fields
+        
+    @property
+    def bind(self):
+        return self.info >> 4
+        
+    @property
+    def type(self):
+        return self.info & 0xf
+        
+class ElfDynamicEntry(object):
+    __slots__ = ("elf", "tag", "value")
+    
+    def __init__(self, elf, tag, value):
+        self.elf = elf
+        self.tag = tag
+        self.value = value
+        
+    @property
+    def string(self):
+        """Value of a DT_NEEDED, DT_SONAME, DT_RPATH, DT_RUNPATH, ... entry, read from the dynamic string table; None for other tags"""
+        if not self.tag in DYNAMIC_STRING_TAGS:
+            return None
+        return self.elf.dynamic_string(self.value)
+        
+class ElfFile(object):
+    """An ELF file decoded from a read-only memory map.
+    
+    The ELF header, the program header table and the section header table are
+    decoded when the object is created; everything else (section contents, 
+    symbols) is only read from the map when it is accessed. Parse time and
+    memory use therefore depend on the size of the header tables, not on the
+    size of the file.
+    
+    An ELF file embedded in a bigger file, like an archive member, is read in 
+    place by passing the memory map of the bigger file with the offset and size 
+    of the ELF file; map is then a buffer over that range and offsets are 
+    relative to its start.
+    mapping -- Memory map holding the ELF file, which is not closed by close (default: map filename).
+    offset -- Start of the ELF file in mapping.
+    size -- Size of the ELF file in mapping.
+    identity -- Tuple identifying the contents of the ELF file in mapping, see below.
+    
+    identity is (device, inode, size, mtime, offset) of the file holding the 
+    ELF file, so that data derived from the contents can be cached across 
+    ElfFile objects.
+    """
+    
+    def __init__(self, filename, mapping = None, offset = 0, size = None, identity = None):
+        self.filename = filename
+        self.file = None
+        self.map = None
+        self.mapping = None
+        self.base = offset
+        if not mapping is None:
+            self.identity = identity or (filename, offset, size)
+            if size < EI_NIDENT:
+                raise Exception("not an ELF file - file too short")
+            self.map = buffer(mapping, offset, size)
+            self.mapping = mapping
+            self.size = size
+            self.parse()
+            return
+            
+        self.file = open(filename, 'rb')
+        try:
+            st = os.fstat(self.file.fileno())
+            size = st.st_size
+            if size < EI_NIDENT:
+                raise Exception("not an ELF file - file too short")
+            self.identity = (st.st_dev, st.st_ino, st.st_size, st.st_mtime, 0)
+            self.map = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+            self.mapping = self.map
+            self.size = size
+            self.parse()
+        except:
+            self.close()
+            raise
+            
+    def close(self):
+        if not self.file is None:
+            if not self.map is None:
+                self.map.close()
+            self.file.close()
+            self.file = None
+        self.map = None
+        self.mapping = None
+            
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+            
+    def read(self, offset, size):
+        """Read size bytes at file offset offset"""
+        if offset + size > self.size:
+            raise Exception("possibly corrupt ELF file - read of %d bytes at offset %#x extends past end of file" % (size, offset))
+        return self.map[offset:offset + size]
+        
+    def read_string(self, offset):
+        """Read a NUL-terminated string at file offset offset"""
+        end = self.mapping.find("\0", self.base + offset, self.base + self.size)
+        if end == -1:
+            end = self.base + self.size
+        return self.mapping[self.base + offset:end]
+        
+    def parse(self):
+        ident = self.map[0:EI_NIDENT]
+        self.layout = elf_layout(ident)
+        self.endianness = self.layout.endianness
+        self.header = ElfHeader(ident, self.layout.ehdr.unpack_from(self.map, EI_NIDENT))
+        
+        # Section header 0 holds the real counts if they do not fit the ELF header
+        sh_count = self.header.sh_count
+        shstrndx = self.header.shstrndx
+        ph_count = self.header.ph_count
+        if self.header.sh_offset != 0 and (sh_count == 0 or shstrndx == ESHN_XINDEX or ph_count == PN_XNUM):
+            fields = self.read_section_header_fields(0)
+            if sh_count == 0:
+                sh_count = fields[5]
+            if shstrndx == ESHN_XINDEX:
+                shstrndx = fields[6]
+            if ph_count == PN_XNUM:
+                ph_count = fields[7]
+        self.ph_count = ph_count
+        self.sh_count = sh_count
+        self.shstrndx = shstrndx
+        self._prog_headers = None
+        self._sect_headers = None
+        self._dynamic = None
+        self._dynstr_offset = None
+        self._translator = None
+        
+    @property
+    def prog_headers(self):
+        """Program header table, decoded on first access"""
+        if self._prog_headers is None:
+            if self.header.ph_offset + self.ph_count * self.header.ph_entry_size > self.size:
+                raise Exception("possibly corrupt ELF header - program header table extends past end of file")
+            self._prog_headers = [ElfProgramHeader(self, i, 
+                    self.layout.unpack_phdr(self.map, self.header.ph_offset + i * self.header.ph_entry_size)) 
+                for i in xrange(self.ph_count)]
+        return self._prog_headers
+        
+    @property
+    def sect_headers(self):
+        """Section header table with section names, decoded on first access"""
+        if self._sect_headers is None:
+            if self.header.sh_offset + self.sh_count * self.header.sh_entry_size > self.size:
+                raise Exception("possibly corrupt ELF header - section header table extends past end of file")
+            sect_headers = [ElfSectionHeader(self, i, self.read_section_header_fields(i)) 
+                for i in xrange(self.sh_count)]
+            if self.shstrndx != ESHN_UNDEF and self.shstrndx < self.sh_count:
+                strtab = sect_headers[self.shstrndx]
+                for sect_header in sect_headers:
+                    if sect_header.name_offset < strtab.size:
+                        sect_header.name = self.read_string(strtab.offset + sect_header.name_offset)
+            self._sect_headers = sect_headers
+        return self._sect_headers
+            
+    @property
+    def dynamic(self):
+        """Entries of the dynamic section up to DT_NULL, decoded on first access"""
+        if self._dynamic is None:
+            self._dynamic = self.read_dynamic()
+        return self._dynamic
+        
+    def read_dynamic(self):
+        """Decode the dynamic section in one pass over the PT_DYNAMIC segment (or the SHT_DYNAMIC section)"""
+        offset = 0
+        size = 0
+        for segment in self.prog_headers:
+            if segment.type == PT_DYNAMIC:
+                (offset, size) = (segment.offset, segment.filesz)
+                break
+        else:
+            for sect_header in self.sect_headers:
+                if sect_header.type == SHT_DYNAMIC:
+                    (offset, size) = (sect_header.offset, sect_header.size)
+                    break
+        if offset + size > self.size:
+            raise Exception("possibly corrupt ELF file - dynamic section extends past end of file")
+        fields = self.layout.unpack_dynamic(self.map, offset, size // self.layout.dyn.size)
+        tags = fields[0::2]
+        try:
+            count = tags.index(DT_NULL)
+        except ValueError:
+            count = len(tags)
+        return [ElfDynamicEntry(self, tags[i], fields[2 * i + 1]) for i in xrange(count)]
+        
+    def dynamic_string(self, offset):
+        """Read a string of the dynamic string table"""
+        if self._dynstr_offset is None:
+            for sect_header in self.sect_headers:
+                if sect_header.type == SHT_DYNAMIC and sect_header.link < len(self.sect_headers):
+                    self._dynstr_offset = self.sect_headers[sect_header.link].offset
+                    break
+            else:
+                # No section headers, find DT_STRTAB in the loaded segments
+                for entry in self.dynamic:
+                    if entry.tag == DT_STRTAB:
+                        self._dynstr_offset = self.vaddr_to_offset(entry.value)
+                        break
+            if self._dynstr_offset is None:
+                raise Exception("possibly corrupt ELF file - dynamic string table not found")
+        if self._dynstr_offset + offset >= self.size:
+            raise Exception("possibly corrupt ELF file - dynamic string offset %#x past end of file" % offset)
+        return self.read_string(self._dynstr_offset + offset)
+        
+    def dynamic_strings(self, tag):
+        """String values of all dynamic entries with tag tag, e.g. the DT_NEEDED libraries"""
+        return [x.string for x in self.dynamic if x.tag == tag]
+        
+    def symbol_versions(self, dynsym):
+        """Versions of the symbols of a dynamic symbol table, from .gnu.version, .gnu.version_d and .gnu.version_r.
+        
+        Returns one (version, hidden, library) per symbol: version is None for 
+        unversioned symbols, hidden is True for versions that are not the default 
+        one and library is the file a needed version comes from (None for versions
+        defined by this file).
+        """
+        versym = None
+        verdef = None
+        verneed = None
+        for sect_header in self.sect_headers:
+            if sect_header.type == SHT_GNU_versym and sect_header.link == dynsym.index:
+                versym = sect_header
+            elif sect_header.type == SHT_GNU_verdef:
+                verdef = sect_header
+            elif sect_header.type == SHT_GNU_verneed:
+                verneed = sect_header
+        count = self.symbol_count(dynsym)
+        if versym is None:
+            return [(None, False, None)] * count
+            
+        byte_order = self.layout.byte_order
+        names = {}
+        if not verdef is None and verdef.link < len(self.sect_headers):
+            strtab = self.sect_headers[verdef.link].offset
+            offset = verdef.offset
+            for i in xrange(verdef.info):
+                (vd_version, vd_flags, vd_ndx, vd_cnt, vd_hash, vd_aux, vd_next) = struct.unpack_from(byte_order + "HHHHIII", self.map, offset)
+                if vd_cnt and not vd_flags & VER_FLG_BASE:
+                    (vda_name, ) = self.layout.word.unpack_from(self.map, offset + vd_aux)
+                    names[vd_ndx] = (self.read_string(strtab + vda_name), None)
+                if vd_next == 0:
+                    break
+                offset += vd_next
+        if not verneed is None and verneed.link < len(self.sect_headers):
+            strtab = self.sect_headers[verneed.link].offset
+            offset = verneed.offset
+            for i in xrange(verneed.info):
+                (vn_version, vn_cnt, vn_file, vn_aux, vn_next) = struct.unpack_from(byte_order + "HHIII", self.map, offset)
+                library = self.read_string(strtab + vn_file)
+                aux = offset + vn_aux
+                for j in xrange(vn_cnt):
+                    (vna_hash, vna_flags, vna_other, vna_name, vna_next) = struct.unpack_from(byte_order + "IHHII", self.map, aux)
+                    names[vna_other & VERSYM_VERSION] = (self.read_string(strtab + vna_name), library)
+                    if vna_next == 0:
+                        break
+                    aux += vna_next
+                if vn_next == 0:
+                    break
+                offset += vn_next
+                
+        if versym.offset + count * 2 > self.size:
+            raise Exception("possibly corrupt ELF file - symbol version table extends past end of file")
+        versions = []
+        for x in struct.unpack_from("%s%dH" % (byte_order, count), self.map, versym.offset):
+            (name, library) = names.get(x & VERSYM_VERSION, (None, None))
+            versions.append((name, bool(x & VERSYM_HIDDEN), library))
+        return versions
+        
+    def notes(self):
+        """Yield (name, type, desc) for the notes of the PT_NOTE segments, or of the SHT_NOTE sections if there are none"""
+        notes = [(x.offset, x.filesz, x.align) for x in self.prog_headers if x.type == PT_NOTE]
+        if not notes:
+            notes = [(x.offset, x.size, x.addralign) for x in self.sect_headers if x.type == SHT_NOTE]
+        for (offset, size, align) in notes:
+            if offset + size > self.size:
+                raise Exception("possibly corrupt ELF file - note segment extends past end of file")
+            for note in iter_notes(self.map, offset, size, self.layout.byte_order, align):
+                yield note
+                
+    @property
+    def build_id(self):
+        """GNU build-id as a hex string, or None"""
+        for (name, ntype, desc) in self.notes():
+            if name == "GNU" and ntype == NT_GNU_BUILD_ID:
+                return desc.encode("hex")
+        return None
+        
+    @property
+    def translator(self):
+        """AddressTranslator of the PT_LOAD segments, built on first access"""
+        if self._translator is None:
+            self._translator = AddressTranslator(self.prog_headers)
+        return self._translator
+        
+    def vaddr_to_offset(self, vaddr):
+        """File offset of virtual address vaddr, or None if no PT_LOAD segment maps it from the file"""
+        return self.translator.to_offset(vaddr)
+        
+    def read_section_header_fields(self, index):
+        return self.layout.shdr.unpack_from(self.map, self.header.sh_offset + index * self.header.sh_entry_size)
+        
+    def symbol_count(self, sect_header):
+        """Number of symbols in a symbol table section"""
+        entry_size = sect_header.entsize or self.layout.sym.size
+        if sect_header.offset + sect_header.size > self.size:
+            raise Exception("possibly corrupt ELF file - symbol table %s extends past end of file" % sect_header.name)
+        return sect_header.size // entry_size
+        
+    def read_symbol(self, sect_header, index):
+        """Decode symbol number index of a symbol table section"""
+        entry_size = sect_header.entsize or self.layout.sym.size
+        fields = self.layout.unpack_sym(self.map, sect_header.offset + index * entry_size)
+        name = ""
+        if fields[0] != 0 and sect_header.link < len(self.sect_headers):
+            name = self.read_string(self.sect_headers[sect_header.link].offset + fields[0])
+        return ElfSymbol(index, name, fields)
+        
+    def read_symbols(self, sect_header):
+        """Decode all symbols of a symbol table section"""
+        return [self.read_symbol(sect_header, i) for i in xrange(self.symbol_count(sect_header))]
+        
+    def symbol_name_is(self, sect_header, index, name):
+        """Check if symbol number index of a symbol table section is called name, without decoding it"""
+        entry_size = sect_header.entsize or self.layout.sym.size
+        (st_name, ) = self.layout.word.unpack_from(self.map, sect_header.offset + index * entry_size)
+        if sect_header.link >= len(self.sect_headers):
+            return False
+        offset = self.sect_headers[sect_header.link].offset + st_name
+        return self.map[offset:offset + len(name) + 1] == name + "\0"
+        
+    def lookup_symbol(self, name):
+        """Find a dynamic symbol by name using the hash table of the file.
+        
+        The .gnu.hash section is used if there is one, otherwise .hash; only the
+        dynamic symbols in the matching hash chain are looked at. Without a hash
+        table the dynamic symbol table is searched linearly. Returns the ElfSymbol
+        of the definition, or None; undefined symbols (imports) are never returned,
+        whichever hash table the file has.
+        """
+        hash_sections = dict((x.type, x) for x in reversed(self.sect_headers) if x.type in (SHT_GNU_HASH, SHT_HASH))
+        if SHT_GNU_HASH in hash_sections:
+            return self.lookup_gnu_hash(hash_sections[SHT_GNU_HASH], name)
+        elif SHT_HASH in hash_sections:
+            return self.lookup_sysv_hash(hash_sections[SHT_HASH], name)
+        for dynsym in self.sect_headers:
+            if dynsym.type == SHT_DYNSYM:
+                for i in xrange(self.symbol_count(dynsym)):
+                    if self.symbol_name_is(dynsym, i, name):
+                        symbol = self.read_symbol(dynsym, i)
+                        if symbol.section != ESHN_UNDEF:
+                            return symbol
+        return None
+        
+    def lookup_gnu_hash(self, hash_section, name):
+        word = self.layout.word
+        offset = hash_section.offset
+        dynsym = self.sect_headers[hash_section.link]
+        (nbuckets, symoffset, bloom_size, bloom_shift) = struct.unpack_from(self.layout.byte_order + "IIII", self.map, offset)
+        if nbuckets == 0 or bloom_size == 0:
+            return None
+        
+        h1 = 5381
+        for c in name:
+            h1 = (h1 * 33 + ord(c)) & 0xffffffff
+        
+        # The bloom filter rules out most names that are not defined
+        bloom_bits = self.layout.addr.size * 8
+        bloom_offset = offset + 16
+        (bloom_word, ) = self.layout.addr.unpack_from(self.map, bloom_offset + ((h1 // bloom_bits) % bloom_size) * self.layout.addr.size)
+        mask = (1 << (h1 % bloom_bits)) | (1 << ((h1 >> bloom_shift) % bloom_bits))
+        if bloom_word & mask != mask:
+            return None
+            
+        buckets_offset = bloom_offset + bloom_size * self.layout.addr.size
+        chain_offset = buckets_offset + nbuckets * 4
+        (index, ) = word.unpack_from(self.map, buckets_offset + (h1 % nbuckets) * 4)
+        if index < symoffset:
+            return None
+        while True:
+            (h2, ) = word.unpack_from(self.map, chain_offset + (index - symoffset) * 4)
+            if (h1 | 1) == (h2 | 1) and self.symbol_name_is(dynsym, index, name):
+                symbol = self.read_symbol(dynsym, index)
+                if symbol.section != ESHN_UNDEF:
+                    return symbol
+            if h2 & 1:
+                return None
+            index += 1
+            
+    def lookup_sysv_hash(self, hash_section, name):
+        word = self.layout.word
+        offset = hash_section.offset
+        dynsym = self.sect_headers[hash_section.link]
+        (nbucket, nchain) = struct.unpack_from(self.layout.byte_order + "II", self.map, offset)
+        if nbucket == 0:
+            return None
+            
+        h = 0
+        for c in name:
+            h = (h << 4) + ord(c)
+            g = h & 0xf0000000
+            if g:
+                h ^= g >> 24
+            h &= ~g
+            
+        (index, ) = word.unpack_from(self.map, offset + 8 + (h % nbucket) * 4)
+        chain_offset = offset + 8 + nbucket * 4
+        visited = 0
+        while index != STN_UNDEF and index < nchain and visited < nchain:
+            if self.symbol_name_is(dynsym, index, name):
+                symbol = self.read_symbol(dynsym, index)
+                if symbol.section != ESHN_UNDEF:
+                    return symbol
+            (index, ) = word.unpack_from(self.map, chain_offset + index * 4)
+            visited += 1
+        return None
+        
+class ElfPrefix(object):
+    """ELF header and program header table read from a bounded prefix of a file.
+    
+    The file is read with a single read of prefix_size bytes from its start, 
+    which holds the program header table in practically all files; only if
+    the table lies beyond the prefix it is fetched with a second read. Section 
+    headers are never looked at. Offers the header, endianness and prog_headers
+    attributes of ElfFile, so elf_header_to_data and program_header_to_data 
+    work on it.
+    prefix -- Start of the file if it was already read, instead of reading prefix_size bytes.
+    fd -- File descriptor of the open file to read from instead of opening filename; it is left open.
+    """
+    
+    def __init__(self, filename, prefix_size = 4096, prefix = None, fd = None):
+        self.filename = filename
+        owned = fd is None
+        if owned:
+            fd = os.open(filename, os.O_RDONLY)
+        try:
+            if prefix is None:
+                os.lseek(fd, 0, os.SEEK_SET)
+                prefix = os.read(fd, prefix_size)
+            self.layout = elf_layout(prefix[:EI_NIDENT])
+            self.endianness = self.layout.endianness
+            if len(prefix) < EI_NIDENT + self.layout.ehdr.size:
+                raise Exception("not an ELF file - file too short")
+            self.header = ElfHeader(prefix[:EI_NIDENT], self.layout.ehdr.unpack_from(prefix, EI_NIDENT))
+            
+            # The real number of program headers would be in section header 0, which is not read
+            ph_count = self.header.ph_count
+            if ph_count == PN_XNUM:
+                ph_count = 0
+            ph_offset = self.header.ph_offset
+            ph_size = ph_count * self.header.ph_entry_size
+            if ph_offset + ph_size > len(prefix):
+                os.lseek(fd, ph_offset, os.SEEK_SET)
+                table = os.read(fd, ph_size)
+                ph_offset = 0
+            else:
+                table = prefix
+            if ph_offset + ph_size > len(table):
+                raise Exception("possibly corrupt ELF header - program header table extends past end of file")
+            self.prog_headers = [ElfProgramHeader(None, i, 
+                    self.layout.unpack_phdr(table, ph_offset + i * self.header.ph_entry_size)) 
+                for i in xrange(ph_count)]
+        finally:
+            if owned:
+                os.close(fd)
+            
+def triage_file(filename, prefix_size = 4096, prefix = None):
+    """Classify a file from its ELF header and program headers only.
+    
+    Returns the "header" and "program_headers" of elf_to_data, read through ElfPrefix.
+    """
+    prefix = ElfPrefix(filename, prefix_size, prefix)
+    return {
+        "header": elf_header_to_data(prefix),
+        "program_headers": [program_header_to_data(prefix, x) for x in prefix.prog_headers]}
+        
+def iter_notes(data, offset, size, byte_order, align = 4):
+    """Yield (name, type, desc) for each note in size bytes at offset of data.
+    
+    data -- String, buffer or memory map holding the notes.
+    align -- Alignment of the note segment or section; notes are padded to 8 bytes if it is 8, else to 4.
+    """
+    header = struct.Struct(byte_order + "III")
+    align = align == 8 and 8 or 4
+    position = 0
+    while position + header.size <= size:
+        (namesz, descsz, ntype) = header.unpack_from(data, offset + position)
+        name_offset = offset + position + header.size
+        desc_position = (position + header.size + namesz + align - 1) & ~(align - 1)
+        if desc_position + descsz > size:
+            raise Exception("possibly corrupt ELF file - note extends past the end of its segment")
+        desc_offset = offset + desc_position
+        yield (data[name_offset:name_offset + namesz].rstrip("\0"), ntype, data[desc_offset:desc_offset + descsz])
+        position = (desc_position + descsz + align - 1) & ~(align - 1)
+        
+def read_build_id(filename, prefix_size = 4096, prefix = None):
+    """Return the GNU build-id of a file as a hex string, or None if it has none.
+    
+    Only the ELF header and the program headers (through ElfPrefix) and then the
+    PT_NOTE segments are read, usually a few hundred bytes. Files without PT_NOTE
+    segments, like relocatable objects, fall back to their SHT_NOTE sections, 
+    which costs one more read for the section header table.
+    """
+    fd = os.open(filename, os.O_RDONLY)
+    try:
+        elf = ElfPrefix(filename, prefix_size, prefix, fd)
+        notes = [(x.offset, x.filesz, x.align) for x in elf.prog_headers if x.type == PT_NOTE]
+        if not notes and elf.header.sh_offset != 0 and elf.header.sh_count != 0:
+            size = elf.header.sh_count * elf.header.sh_entry_size
+            os.lseek(fd, elf.header.sh_offset, os.SEEK_SET)
+            table = os.read(fd, size)
+            if len(table) < size:
+                raise Exception("possibly corrupt ELF header - section header table extends past end of file")
+            for i in xrange(elf.header.sh_count):
+                fields = elf.layout.shdr.unpack_from(table, i * elf.header.sh_entry_size)
+                if fields[1] == SHT_NOTE:
+                    notes.append((fields[4], fields[5], fields[8]))
+                    
+        for (offset, size, align) in notes:
+            os.lseek(fd, offset, os.SEEK_SET)
+            data = os.read(fd, size)
+            if len(data) < size:
+                raise Exception("possibly corrupt ELF file - note segment extends past end of file")
+            for (name, ntype, desc) in iter_notes(data, 0, size, elf.layout.byte_order, align):
+                if name == "GNU" and ntype == NT_GNU_BUILD_ID:
+                    return desc.encode("hex")
+        return None
+    finally:
+        os.close(fd)
+        
+class LazySequence(object):
+    """Read-only sequence that converts its items only when they are indexed or iterated.
+    
+    length -- Number of items.
+    getitem -- Function returning the item for an index in range(length).
+    """
+    
+    def __init__(self, length, getitem):
+        self.length = length
+        self.getitem = getitem
+        
+    def __len__(self):
+        return self.length
+        
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.getitem(i) for i in xrange(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if index < 0 or index >= self.length:
+            raise IndexError("LazySequence index out of range")
+        return self.getitem(index)
+        
+    def __iter__(self):
+        for i in xrange(self.length):
+            yield self.getitem(i)
+
+# Names of the registers in pr_reg of NT_PRSTATUS, in order
+PRSTATUS_REGISTERS = {
+    EM_X86_64: ("r15", "r14", "r13", "r12", "rbp", "rbx", "r11", "r10", "r9", "r8", "rax", "rcx", "rdx", "rsi", 
+        "rdi", "orig_rax", "rip", "cs", "eflags", "rsp", "ss", "fs_base", "gs_base", "ds", "es", "fs", "gs"),
+    EM_386: ("ebx", "ecx", "edx", "esi", "edi", "ebp", "eax", "ds", "es", "fs", "gs", "orig_eax", "eip", "cs", 
+        "eflags", "esp", "ss"),
+    EM_AARCH64: tuple("x%d" % i for i in xrange(31)) + ("sp", "pc", "pstate")}
+    
+AUXV_NAMES = {
+    AT_NULL: "NULL",
+    AT_IGNORE: "IGNORE",
+    AT_EXECFD: "EXECFD",
+    AT_PHDR: "PHDR",
+    AT_PHENT: "PHENT",
+    AT_PHNUM: "PHNUM",
+    AT_PAGESZ: "PAGESZ",
+    AT_BASE: "BASE",
+    AT_FLAGS: "FLAGS",
+    AT_ENTRY: "ENTRY",
+    AT_NOTELF: "NOTELF",
+    AT_UID: "UID",
+    AT_EUID: "EUID",
+    AT_GID: "GID",
+    AT_EGID: "EGID",
+    AT_PLATFORM: "PLATFORM",
+    AT_HWCAP: "HWCAP",
+    AT_CLKTCK: "CLKTCK",
+    AT_FPUCW: "FPUCW",
+    AT_DCACHEBSIZE: "DCACHEBSIZE",
+    AT_ICACHEBSIZE: "ICACHEBSIZE",
+    AT_UCACHEBSIZE: "UCACHEBSIZE",
+    23: "SECURE",
+    AT_BASE_PLATFORM: "BASE_PLATFORM",
+    AT_RANDOM: "RANDOM",
+    26: "HWCAP2",
+    27: "RSEQ_FEATURE_SIZE",
+    28: "RSEQ_ALIGN",
+    AT_EXECFN: "EXECFN",
+    AT_SYSINFO: "SYSINFO",
+    AT_SYSINFO_EHDR: "SYSINFO_EHDR",
+    51: "MINSIGSTKSZ"}
+    
+class ElfCore(ElfFile):
+    """A core dump (ET_CORE) read from a read-only memory map.
+    
+    read_memory finds the segment of an address with a binary search in the 
+    AddressTranslator of the file and returns a view of the memory map; nothing
+    of the dumped memory is read before it is accessed. The notes are decoded 
+    on first access.
+    """
+    
+    def __init__(self, filename, *args, **kwargs):
+        ElfFile.__init__(self, filename, *args, **kwargs)
+        if self.header.type != ET_CORE:
+            self.close()
+            raise Exception("not a core file - ELF type is %s" % elf_type(self.header.type))
+        self._core_notes = None
+        
+    def read_memory(self, vaddr, size):
+        """Read size bytes of the dumped memory at virtual address vaddr.
+        
+        If the range lies within the file contents of one segment, the result is
+        a buffer over the memory map, without copying. Ranges crossing segments
+        or reaching into the part of a segment that was not dumped (which reads
+        as zeros) are assembled into a string. Raises an exception if part of 
+        the range is not in any segment.
+        """
+        segment = self.translator.segment_at(vaddr)
+        if not segment is None and vaddr + size <= segment.vaddr + segment.filesz:
+            offset = segment.offset + vaddr - segment.vaddr
+            if offset + size > self.size:
+                raise Exception("possibly corrupt core file - segment at %#x extends past end of file" % segment.vaddr)
+            return buffer(self.map, offset, size)
+            
+        pieces = []
+        end = vaddr + size
+        while vaddr < end:
+            segment = self.translator.segment_at(vaddr)
+            if segment is None:
+                raise Exception("address %#x is not in the core file" % vaddr)
+            piece_end = min(end, segment.vaddr + segment.memsz)
+            file_end = min(piece_end, segment.vaddr + segment.filesz)
+            if vaddr < file_end:
+                pieces.append(self.read(segment.offset + vaddr - segment.vaddr, file_end - vaddr))
+            if file_end < piece_end:
+                pieces.append("\0" * (piece_end - max(vaddr, file_end)))
+            vaddr = piece_end
+        return "".join(pieces)
+        
+    @property
+    def core_notes(self):
+        """Dictionary with the decoded "threads" (NT_PRSTATUS), "mapped_files" (NT_FILE) and "auxv_entries" (NT_AUXV)"""
+        if self._core_notes is None:
+            notes = {"threads": [], "mapped_files": [], "auxv_entries": []}
+            for (name, ntype, desc) in self.notes():
+                if name != "CORE":
+                    continue
+                if ntype == NT_PRSTATUS:
+                    notes["threads"].append(self.decode_prstatus(desc))
+                elif ntype == NT_FILE:
+                    notes["mapped_files"].extend(self.decode_file_note(desc))
+                elif ntype == NT_AUXV:
+                    notes["auxv_entries"].extend(self.decode_auxv(desc))
+            self._core_notes = notes
+        return self._core_notes
+        
+    def decode_prstatus(self, desc):
+        """Signal, process ids and registers of one thread from the elf_prstatus structure of Linux"""
+        byte_order = self.layout.byte_order
+        if self.header.elfclass == ELFCLASS64:
+            (signo, code, errno, cursig, sigpend, sighold, pid, ppid, pgrp, sid) = \
+                struct.unpack_from(byte_order + "iiih2xQQiiii", desc, 0)
+            (reg_offset, reg_format) = (112, "Q")
+        else:
+            (signo, code, errno, cursig, sigpend, sighold, pid, ppid, pgrp, sid) = \
+                struct.unpack_from(byte_order + "iiih2xIIiiii", desc, 0)
+            (reg_offset, reg_format) = (72, "I")
+        reg_size = struct.calcsize(reg_format)
+        names = PRSTATUS_REGISTERS.get(self.header.machine, ())
+        count = len(names) or (len(desc) - reg_offset - 4) // reg_size
+        if reg_offset + count * reg_size > len(desc):
+            raise Exception("possibly corrupt core file - NT_PRSTATUS note too short")
+        values = struct.unpack_from("%s%d%s" % (byte_order, count, reg_format), desc, reg_offset)
+        registers = [{"name": i < len(names) and names[i] or "r%d" % i, "value": values[i]} for i in xrange(count)]
+        return {"signal": cursig, "pid": pid, "ppid": ppid, "pgrp": pgrp, "sid": sid, "registers": registers}
+        
+    def decode_file_note(self, desc):
+        """Mapped files from NT_FILE: count, page size, (start, end, page offset) triples and then the names"""
+        word = self.layout.addr
+        (count, page_size) = struct.unpack_from(self.layout.byte_order + "2" + word.format[-1], desc, 0)
+        names_offset = word.size * (2 + 3 * count)
+        if names_offset > len(desc):
+            raise Exception("possibly corrupt core file - NT_FILE note too short")
+        triples = struct.unpack_from("%s%d%s" % (self.layout.byte_order, 3 * count, word.format[-1]), desc, word.size * 2)
+        names = desc[names_offset:].split("\0")
+        return [{"start": triples[3 * i], "end": triples[3 * i + 1], "offset": triples[3 * i + 2] * page_size, 
+                 "path": i < len(names) and names[i] or ""} for i in xrange(count)]
+                 
+    def decode_auxv(self, desc):
+        """(type, value) pairs of the auxiliary vector from NT_AUXV, up to AT_NULL"""
+        word = self.layout.addr
+        count = len(desc) // (2 * word.size)
+        values = struct.unpack_from("%s%d%s" % (self.layout.byte_order, 2 * count, word.format[-1]), desc, 0)
+        entries = []
+        for i in xrange(count):
+            (atype, value) = (values[2 * i], values[2 * i + 1])
+            if atype == AT_NULL:
+                break
+            entry = {"type": {"value": atype, "description": AUXV_NAMES.get(atype, "<unknown: %d>" % atype)}, "value": value}
+            if atype in (AT_EXECFN, AT_PLATFORM, AT_BASE_PLATFORM):
+                try:
+                    entry["string"] = self.read_c_string(value)
+                except Exception:
+                    pass
+            entries.append(entry)
+        return entries
+        
+    def read_c_string(self, vaddr, limit = 4096):
+        """Read a NUL-terminated string of the dumped memory at vaddr"""
+        segment = self.translator.segment_at(vaddr)
+        if segment is None:
+            raise Exception("address %#x is not in the core file" % vaddr)
+        size = min(limit, segment.vaddr + segment.filesz - vaddr)
+        data = str(self.read_memory(vaddr, max(size, 0)))
+        return data.split("\0", 1)[0]
+        
 def read_elf(filename):
-    """Read the information from the ELF file and return an ELF object"""
-    return bintools.elf.ELF(open(filename, 'rb'))
+    """Read the information from the ELF file and return an ELF object (an ElfCore for core files)"""
+    elf = ElfFile(filename)
+    if elf.header.type == ET_CORE:
+        elf.close()
+        return ElfCore(filename)
+    return elf
+    
+ARMAG = "!<arch>\n"
+THINMAG = "!<thin>\n"
+AR_HEADER = struct.Struct("16s12s6s6s8s10s2s")
+AR_FMAG = "`\n"
 
-def elf_to_data(elf):
-    data = {
-        "header": {
-            "class": {
-                 "value": elf.header.elfclass,
-                 "description": ELF_CLASS[bintools.elf.ELFCLASS[elf.header.elfclass]]}, 
-            "version": {
-                 "value": elf.header.version,
-                 "description": elf_ver(elf.header.version)},  
-            "type": {
-                 "value": elf.header.type,
-                 "description": elf_type(elf.header.type)},
-            "machine": {
-                 "value": elf.header.machine,
-                 "description": get_machine_name(elf.header.machine)},
-            "endianess": {
-                 "value": elf.endianness,
-                 "description": ELF_DATA[elf.endianness]},
-            "entry": elf.header.entry,
-            "ph_offset": elf.header.ph_offset,
-            "sh_offset": elf.header.sh_offset,
-            "flags": {
-                 "value": elf.header.flags,
-                 "decoded_values": get_machine_flags(elf.header.flags, elf.header.machine)},
-            "header_size": elf.header.header_size,
-            "ph_entry_size": elf.header.ph_entry_size,
-            "ph_count": elf.header.ph_count,
-            "sh_entry_size": elf.header.sh_entry_size,
-            "sh_count": elf.header.sh_count,
-            "shstrndx": elf.header.shstrndx    
-        }
+class ArchiveMember(object):
+    """One member of an ElfArchive; its contents stay in the memory map of the archive"""
+    
+    def __init__(self, archive, name, header_offset, offset, size):
+        self.archive = archive
+        self.name = name
+        self.header_offset = header_offset
+        self.offset = offset
+        self.size = size
+        
+    @property
+    def data(self):
+        """Contents of the member, as a buffer over the memory map of the archive"""
+        if self.archive.thin:
+            raise Exception("member %s of thin archive %s is not stored in the archive" % (self.name, self.archive.filename))
+        return buffer(self.archive.map, self.offset, self.size)
+        
+    def is_elf(self):
+        return not self.archive.thin and self.size >= EI_NIDENT and \
+            self.archive.map[self.offset:self.offset + len(ELFMAG)] == ELFMAG
+            
+    def elf(self):
+        """The member as an ElfFile reading in place from the memory map of the archive"""
+        if self.archive.thin:
+            return ElfFile(os.path.join(os.path.dirname(self.archive.filename), self.name))
+        return ElfFile("%s(%s)" % (self.archive.filename, self.name), self.archive.map, self.offset, self.size, 
+            self.archive.identity + (self.offset, ))
+        
+class ElfArchive(object):
+    """A static library (ar archive) read from a read-only memory map.
+    
+    Only the special members at the start (the symbol index and the GNU long 
+    name table) are read when the object is created; the member headers are 
+    walked while iterating, and every member is a view of the one memory map, 
+    so nothing is extracted or copied. GNU ("/", "/SYM64/", "//") and BSD
+    ("__.SYMDEF", "#1/") archives are supported, and GNU thin archives, whose
+    members are separate files, as far as names and symbols go.
+    """
+    
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'rb')
+        self.map = None
+        try:
+            st = os.fstat(self.file.fileno())
+            self.size = st.st_size
+            self.identity = (st.st_dev, st.st_ino, st.st_size, st.st_mtime)
+            if self.size < len(ARMAG):
+                raise Exception("not an archive - file too short")
+            self.map = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+            magic = self.map[0:len(ARMAG)]
+            if not magic in (ARMAG, THINMAG):
+                raise Exception("not an archive - it has the wrong magic bytes at the start")
+            self.thin = magic == THINMAG
+            self.long_names = None
+            self.symbol_table = None
+            self._symbols = None
+            self._members = None
+            self.first_member = len(ARMAG)
+            for member in self.iter_headers():
+                if member.name == "/" or member.name == "/SYM64/" or member.name.startswith("__.SYMDEF"):
+                    self.symbol_table = member
+                elif member.name == "//":
+                    self.long_names = member
+                else:
+                    break
+                self.first_member = self.next_header(member)
+        except:
+            self.close()
+            raise
+            
+    def close(self):
+        if not self.map is None:
+            self.map.close()
+            self.map = None
+        if not self.file is None:
+            self.file.close()
+            self.file = None
+            
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        
+    def next_header(self, member):
+        """Offset of the member header following member"""
+        if self.thin and not member.name in ("/", "/SYM64/", "//"):
+            return member.offset
+        return member.offset + member.size + (member.offset + member.size) % 2
+        
+    def read_header(self, offset):
+        """Decode the member header at offset, return an ArchiveMember"""
+        if offset + AR_HEADER.size > self.size:
+            raise Exception("possibly corrupt archive - member header at offset %#x extends past end of file" % offset)
+        (name, date, uid, gid, mode, size, fmag) = AR_HEADER.unpack_from(self.map, offset)
+        if fmag != AR_FMAG:
+            raise Exception("possibly corrupt archive - bad member header at offset %#x" % offset)
+        try:
+            size = int(size)
+        except ValueError:
+            raise Exception("possibly corrupt archive - bad member size at offset %#x" % offset)
+        name = name.rstrip(" ")
+        data_offset = offset + AR_HEADER.size
+        if name.startswith("#1/"):
+            # BSD: the name is stored at the start of the data
+            length = int(name[3:])
+            name = self.map[data_offset:data_offset + length].rstrip("\0")
+            data_offset += length
+            size -= length
+        elif name.startswith("/") and name[1:].isdigit() and not self.long_names is None:
+            # GNU: offset into the long name table, where names end with "/\n"
+            start = self.long_names.offset + int(name[1:])
+            end = self.map.find("\n", start, self.long_names.offset + self.long_names.size)
+            if end == -1:
+                end = self.long_names.offset + self.long_names.size
+            name = self.map[start:end].rstrip("/")
+        elif name.endswith("/") and name != "/" and name != "//" and name != "/SYM64/":
+            name = name[:-1]
+        stored = not self.thin or name in ("/", "/SYM64/", "//")
+        if stored and data_offset + size > self.size:
+            raise Exception("possibly corrupt archive - member %s extends past end of file" % name)
+        return ArchiveMember(self, name, offset, data_offset, size)
+        
+    def iter_headers(self, offset = len(ARMAG)):
+        while offset + AR_HEADER.size <= self.size:
+            member = self.read_header(offset)
+            yield member
+            offset = self.next_header(member)
+            
+    def __iter__(self):
+        """Yield the regular members one at a time, walking the member headers"""
+        return self.iter_headers(self.first_member)
+        
+    @property
+    def members(self):
+        """List of all regular members, read on first access"""
+        if self._members is None:
+            self._members = list(self)
+        return self._members
+        
+    @property
+    def symbols(self):
+        """Dictionary from symbol name to the header offsets of the members defining it, from the symbol index"""
+        if self._symbols is None:
+            self._symbols = self.read_symbol_table()
+        return self._symbols
+        
+    def read_symbol_table(self):
+        symbols = {}
+        table = self.symbol_table
+        if table is None:
+            return symbols
+        start = table.offset
+        end = table.offset + table.size
+        if table.name.startswith("__.SYMDEF"):
+            # BSD: size of the ranlib array, (name offset, header offset) pairs, size of the strings, strings
+            byte_order = "<"
+            (ranlib_size, ) = struct.unpack_from("<I", self.map, start)
+            if start + 4 + ranlib_size > end:
+                byte_order = ">"
+                (ranlib_size, ) = struct.unpack_from(">I", self.map, start)
+            count = ranlib_size // 8
+            entries = struct.unpack_from("%s%dI" % (byte_order, count * 2), self.map, start + 4)
+            strings = start + 4 + ranlib_size + 4
+            for i in xrange(count):
+                end_of_name = self.map.find("\0", strings + entries[2 * i], end)
+                name = self.map[strings + entries[2 * i]:end_of_name]
+                symbols.setdefault(name, []).append(entries[2 * i + 1])
+        else:
+            # GNU: big endian count, member header offsets, NUL-terminated names
+            word = table.name == "/SYM64/" and "Q" or "I"
+            word_size = struct.calcsize(word)
+            (count, ) = struct.unpack_from(">" + word, self.map, start)
+            if start + word_size * (count + 1) > end:
+                raise Exception("possibly corrupt archive - symbol index extends past its member")
+            offsets = struct.unpack_from(">%d%s" % (count, word), self.map, start + word_size)
+            names = self.map[start + word_size * (count + 1):end].split("\0")
+            for (name, offset) in zip(names, offsets):
+                symbols.setdefault(name, []).append(offset)
+        return symbols
+        
+    def find_symbol(self, name):
+        """Members that define symbol name according to the symbol index, without parsing any member"""
+        return [self.read_header(x) for x in sorted(set(self.symbols.get(name, [])))]
+        
+def read_archive(filename):
+    """Open a static library and return an ElfArchive"""
+    return ElfArchive(filename)
+    
+def is_archive_file(path):
+    """Check if a file starts with the ar archive magic"""
+    try:
+        f = open(path, 'rb')
+        try:
+            return f.read(len(ARMAG)) in (ARMAG, THINMAG)
+        finally:
+            f.close()
+    except IOError:
+        return False
+        
+def archive_to_data(archive, **options):
+    """Convert an ElfArchive to a dictionary with a LazySequence of its members.
+    
+    Each member is converted with elf_to_data and the given options when it is 
+    accessed; members that are not ELF files only get their name and size.
+    """
+    def member_to_data(member):
+        data = {"name": member.name, "offset": member.offset, "size": member.size}
+        try:
+            if member.is_elf() or archive.thin:
+                data["readelf"] = elf_to_data(member.elf(), **options)
+        except Exception, ex:
+            data["error"] = str(ex)
+        return data
+        
+    members = archive.members
+    return {
+        "file": archive.filename,
+        "members": LazySequence(len(members), lambda i: member_to_data(members[i]))}
+
+# Tables that elf_to_data can convert
+ELF_DATA_TABLES = ("header", "program_headers", "sections", "symbols", "dynamic_entries", "attributes", "core")
+
+def elf_to_data(elf, vectorized = False, tables = None):
+    """Convert an ELF object to a dictionary.
+    
+    The header and the (small) "attributes" and "core" tables are converted 
+    right away, "program_headers", "sections", "symbols" and "dynamic_entries"
+    are LazySequence views that convert entries when they are accessed, so elf
+    must not be closed while the result is in use.
+    vectorized -- Decode the symbol tables in one go with NumPy (see symbol_array)
+                  instead of one symbol at a time. Ignored if NumPy is not installed.
+    tables -- Names from ELF_DATA_TABLES to convert (default: all). The other tables
+              are left out of the result and are not read from the file at all.
+    """
+    if tables is None:
+        tables = ELF_DATA_TABLES
+    data = {}
+    if "header" in tables:
+        data["header"] = elf_header_to_data(elf)
+    if "program_headers" in tables:
+        data["program_headers"] = LazySequence(len(elf.prog_headers), 
+            lambda i: program_header_to_data(elf, elf.prog_headers[i]))
+    if "sections" in tables:
+        data["sections"] = LazySequence(len(elf.sect_headers), 
+            lambda i: section_to_data(elf, elf.sect_headers[i]))
+    
+    if "symbols" in tables:
+        try:     
+            if vectorized and not numpy is None:
+                data["symbols"] = SymbolArrayView(elf, symbol_array(elf))
+            else:
+                data["symbols"] = symbols_view(elf)
+        except Exception, ex:
+            data[ "symbols" ] = {"error": ex}
+            
+    if "dynamic_entries" in tables:
+        try:
+            data["dynamic_entries"] = LazySequence(len(elf.dynamic), 
+                lambda i: dynamic_entry_to_data(elf.dynamic[i]))
+        except Exception, ex:
+            data["dynamic_entries"] = {"error": ex}
+            
+    if "attributes" in tables:
+        try:
+            data["attributes"] = process_attributes(elf)
+        except Exception, ex:
+            data["attributes"] = {"error": ex}
+            
+    if "core" in tables and isinstance(elf, ElfCore):
+        try:
+            data["core"] = elf.core_notes
+        except Exception, ex:
+            data["core"] = {"error": ex}
+    
+    return data
+    
+def elf_header_to_data(elf):
+    header = {
+        "class": {
+             "value": elf.header.elfclass,
+             "description": ELF_CLASS[elf.header.elfclass]}, 
+        "version": {
+             "value": elf.header.version,
+             "description": elf_ver(elf.header.version)},  
+        "type": {
+             "value": elf.header.type,
+             "description": elf_type(elf.header.type)},
+        "machine": {
+             "value": elf.header.machine,
+             "description": get_machine_name(elf.header.machine)},
+        "endianess": {
+             "value": elf.endianness,
+             "description": ELF_DATA[elf.endianness]},
+        "entry": elf.header.entry,
+        "ph_offset": elf.header.ph_offset,
+        "sh_offset": elf.header.sh_offset,
+        "flags": {
+             "value": elf.header.flags,
+             "decoded_values": get_machine_flags(elf.header.flags, elf.header.machine)},
+        "header_size": elf.header.header_size,
+        "ph_entry_size": elf.header.ph_entry_size,
+        "ph_count": elf.header.ph_count,
+        "sh_entry_size": elf.header.sh_entry_size,
+        "sh_count": elf.header.sh_count,
+        "shstrndx": elf.header.shstrndx    
     }
 
     if hasattr(elf.header, "osabi"):
-        data["header"]["osabi"] = {
+        header["osabi"] = {
             "value": elf.header.osabi,
             "description": get_osabi_name(elf.header.osabi, elf.header)}
+            
+    return header
     
-    data["program_headers"] = map(lambda x: {
+def program_header_to_data(elf, x):
+    return {
            "type": {
                "value": x.type,
                "description": phdr_type(x.type)},
@@ -3154,8 +4801,10 @@ def elf_to_data(elf):
            "file_size": x.filesz,
            "memory_size": x.memsz,
            "flags": x.flags,
-           "align": x.align}, elf.prog_headers)
-    data["sections"] = map(lambda x: {
+           "align": x.align}
+           
+def section_to_data(elf, x):
+    data = {
            "index": x.index,
            "name": x.name,
            "type": {
@@ -3168,10 +4817,23 @@ def elf_to_data(elf):
            "flags": x.flags,
            "link": x.link,
            "info": x.info,
-           "align": x.addralign}, elf.sect_headers)
+           "align": x.addralign}
+    compression = x.compression
+    if not compression is None:
+        data["compression"] = {
+            "type": {
+                "value": compression[0],
+                "description": COMPRESSION_NAMES.get(compression[0], "<unknown: %s>" % compression[0])},
+            "uncompressed_size": compression[1]}
+    return data
     
-    try:     
-        data["symbols"] = map(lambda x: {
+COMPRESSION_NAMES = {
+    ELFCOMPRESS_ZLIB: "ZLIB",
+    ELFCOMPRESS_ZSTD: "ZSTD",
+    ZDEBUG_MAGIC: "ZLIB (.zdebug)"}
+           
+def symbol_to_data(x):
+    return {
            "name": x.name,
            "section": x.section,
            "bind": x.bind,
@@ -3179,14 +4841,232 @@ def elf_to_data(elf):
            "value": x.value,
            "size": x.size,
            "info": x.info,
-           "other": x.other}, reduce(lambda r, x: r + x.symbols, elf.sect_headers, []))
-    except Exception, ex:
-        data[ "symbols" ] = {"error": ex}
-    
+           "other": x.other}
+           
+def dynamic_entry_to_data(x):
+    data = {
+           "tag": {
+               "value": x.tag,
+               "description": dynamic_tag(x.tag)},
+           "value": x.value}
+    if x.tag in DYNAMIC_STRING_TAGS:
+        data["string"] = x.string
     return data
+           
+def symbols_view(elf):
+    """Symbols of all symbol table sections, in section order, as a LazySequence"""
+    tables = [x for x in elf.sect_headers if x.type in (SHT_SYMTAB, SHT_DYNSYM)]
+    starts = []
+    count = 0
+    for table in tables:
+        starts.append(count)
+        count += elf.symbol_count(table)
+        
+    def getitem(index):
+        table = bisect.bisect_right(starts, index) - 1
+        return symbol_to_data(elf.read_symbol(tables[table], index - starts[table]))
+        
+    return LazySequence(count, getitem)
+    
+def symbol_dtype(layout):
+    """NumPy dtype of one on-disk symbol table entry"""
+    bo = layout.byte_order
+    if layout.elfclass == ELFCLASS32:
+        return numpy.dtype([("name", bo + "u4"), ("value", bo + "u4"), ("size", bo + "u4"), 
+                            ("info", "u1"), ("other", "u1"), ("shndx", bo + "u2")])
+    else:
+        return numpy.dtype([("name", bo + "u4"), ("info", "u1"), ("other", "u1"), 
+                            ("shndx", bo + "u2"), ("value", bo + "u8"), ("size", bo + "u8")])
+                            
+if not numpy is None:
+    # Columns of the arrays returned by symbol_array
+    SYMBOL_ARRAY_DTYPE = numpy.dtype([("name", "u4"), ("name_offset", "u8"), ("value", "u8"), ("size", "u8"), 
+        ("info", "u1"), ("other", "u1"), ("section", "u2"), ("bind", "u1"), ("type", "u1")])
+    
+def symbol_array(elf, tables = None):
+    """Decode symbol tables into one NumPy structured array.
+    
+    The entries are read with a single numpy.ndarray over the memory map per table,
+    bind and type are computed from info with vectorized bit operations. 
+    The columns are described by SYMBOL_ARRAY_DTYPE; name is the offset in the 
+    string table and name_offset the file offset of the name.
+    elf -- ElfFile to read from.
+    tables -- Symbol table section headers to decode (default: all SHT_SYMTAB and SHT_DYNSYM sections, in section order).
+    """
+    if numpy is None:
+        raise Exception("vectorized symbol decoding needs NumPy, which is not installed")
+    if tables is None:
+        tables = [x for x in elf.sect_headers if x.type in (SHT_SYMTAB, SHT_DYNSYM)]
+    dtype = symbol_dtype(elf.layout)
+    parts = []
+    for table in tables:
+        count = elf.symbol_count(table)
+        if count == 0:
+            continue
+        raw = numpy.ndarray((count, ), dtype, elf.map, table.offset, (table.entsize or dtype.itemsize, ))
+        part = numpy.empty(count, SYMBOL_ARRAY_DTYPE)
+        for field in ("name", "value", "size", "info", "other"):
+            part[field] = raw[field]
+        part["section"] = raw["shndx"]
+        strtab_offset = 0
+        if table.link < len(elf.sect_headers):
+            strtab_offset = elf.sect_headers[table.link].offset
+        part["name_offset"] = raw["name"]
+        part["name_offset"] += strtab_offset
+        part["bind"] = raw["info"] >> 4
+        part["type"] = raw["info"] & 0xf
+        parts.append(part)
+    if not parts:
+        return numpy.empty(0, SYMBOL_ARRAY_DTYPE)
+    return numpy.concatenate(parts)
+    
+class SymbolArrayView(LazySequence):
+    """LazySequence of symbol dictionaries backed by an array from symbol_array.
+    
+    The array itself is available as the array attribute.
+    """
+    
+    def __init__(self, elf, array):
+        super(SymbolArrayView, self).__init__(len(array), self.symbol)
+        self.elf = elf
+        self.array = array
+        self.rows = None
+        
+    def symbol(self, index):
+        if self.rows is None:
+            # Converting all rows at once is much cheaper than indexing the array per row
+            self.rows = self.array.tolist()
+        (name, name_offset, value, size, info, other, section, bind, type) = self.rows[index]
+        if name != 0:
+            name = self.elf.read_string(name_offset)
+        else:
+            name = ""
+        return {
+           "name": name,
+           "section": section,
+           "bind": bind,
+           "type": type,
+           "value": value,
+           "size": size,
+           "info": info,
+           "other": other}
+
+# Preference among symbols at the same address, lower is better
+SYMBOL_BIND_RANK = {STB_GLOBAL: 0, STB_WEAK: 1, STB_GNU_UNIQUE: 2, STB_LOCAL: 3}
+SYMBOL_TYPE_RANK = {STT_FUNC: 0, STT_GNU_IFUNC: 1, STT_OBJECT: 2, STT_NOTYPE: 3}
+
+class SymbolIndex(object):
+    """Index from addresses to the symbols containing them.
+    
+    The index is built once from symbol dictionaries as returned in the
+    "symbols" of elf_to_data, and answers lookups by binary search. Only 
+    defined function, object and untyped symbols are indexed; absolute symbols,
+    like the version markers of versioned libraries, are not addresses and are 
+    left out.
+    
+    Overlapping symbols are resolved deterministically: an address belongs
+    to the containing symbol with the highest start address, and among
+    aliases with the same start and size, global symbols win over weak and
+    local ones, functions over objects and untyped symbols, and otherwise
+    the lexically smallest name wins. Symbols with size zero only match
+    their exact address, and only if no sized symbol contains it.
+    """
+    
+    def __init__(self, symbols, machine = None):
+        """symbols -- Iterable of symbol dictionaries.
+        machine -- e_machine of the file; for EM_ARM the Thumb bit of function addresses is cleared.
+        """
+        sized = []
+        self.zero_size = {}
+        for symbol in symbols:
+            if symbol["section"] in (ESHN_UNDEF, ESHN_ABS, ESHN_COMMON) or not symbol["type"] in SYMBOL_TYPE_RANK:
+                continue
+            start = symbol["value"]
+            if machine == EM_ARM and symbol["type"] == STT_FUNC:
+                start &= ~1
+            rank = (SYMBOL_BIND_RANK.get(symbol["bind"], 4), SYMBOL_TYPE_RANK[symbol["type"]], symbol["name"])
+            if symbol["size"] == 0:
+                if not start in self.zero_size or rank < self.zero_size[start][0]:
+                    self.zero_size[start] = (rank, symbol)
+            else:
+                sized.append((start, start + symbol["size"], rank, symbol))
+        self.zero_size = dict((address, x[1]) for (address, x) in self.zero_size.iteritems())
+        self.build_segments(sized)
+        
+    def build_segments(self, sized):
+        """Split the sized symbols into disjoint segments, each owned by one symbol.
+        
+        Sweeps over all start and end addresses; at every boundary the owner is the
+        active symbol with the highest start, kept on top of a heap.
+        """
+        sized.sort(key = lambda x: (x[0], x[2]))
+        boundaries = sorted(set([x[0] for x in sized] + [x[1] for x in sized]))
+        self.starts = []
+        self.ends = []
+        self.symbols = []
+        active = []
+        next_symbol = 0
+        for (i, address) in enumerate(boundaries[:-1]):
+            while next_symbol < len(sized) and sized[next_symbol][0] == address:
+                (start, end, rank, symbol) = sized[next_symbol]
+                heapq.heappush(active, ((-start, rank), end, symbol))
+                next_symbol += 1
+            while active and active[0][1] <= address:
+                heapq.heappop(active)
+            if not active:
+                continue
+            symbol = active[0][2]
+            if self.symbols and self.symbols[-1] is symbol and self.ends[-1] == address:
+                self.ends[-1] = boundaries[i + 1]
+            else:
+                self.starts.append(address)
+                self.ends.append(boundaries[i + 1])
+                self.symbols.append(symbol)
+                
+    @classmethod
+    def from_data(cls, data):
+        """Build the index from the result of elf_to_data"""
+        return cls(data["symbols"], data["header"]["machine"]["value"])
+        
+    def __len__(self):
+        return len(self.symbols) + len(self.zero_size)
+        
+    def lookup(self, address):
+        """Return the symbol dictionary of the symbol containing address, or None"""
+        i = bisect.bisect_right(self.starts, address) - 1
+        if i >= 0 and address < self.ends[i]:
+            return self.symbols[i]
+        return self.zero_size.get(address)
+        
+    def lookup_sorted(self, addresses):
+        """Look up a batch of addresses sorted in ascending order.
+        
+        Walks the addresses and the segments together, so a batch costs one pass
+        over both instead of one binary search per address. Returns a list with
+        the symbol dictionary or None for each address.
+        """
+        result = []
+        starts = self.starts
+        ends = self.ends
+        count = len(starts)
+        i = 0
+        previous = None
+        for address in addresses:
+            if not previous is None and address < previous:
+                raise ValueError("addresses must be sorted in ascending order")
+            previous = address
+            while i < count and ends[i] <= address:
+                i += 1
+            if i < count and starts[i] <= address:
+                result.append(self.symbols[i])
+            else:
+                result.append(self.zero_size.get(address))
+        return result
 
 def plural_to_singular(name):
-    if name.endswith('s'):
+    if name.endswith('ies'):
+        return name[:-3] + 'y'
+    elif name.endswith('s'):
         return name[:-1]
     else:
         print "Don't know how to do the singular of '%s'" % name
@@ -3200,7 +5080,7 @@ def to_elfxml(elem, name, root):
             for key in elem:
                 child_node = to_elfxml(elem[key], key, root)
                 node.appendChild(child_node)
-        elif isinstance(elem, list):
+        elif isinstance(elem, (list, LazySequence)):
             for subelem in elem:
                 child_node = to_elfxml(subelem, plural_to_singular(name), root)
                 node.appendChild(child_node)
@@ -3213,6 +5093,46 @@ def to_elfxml(elem, name, root):
 
     return node
              
+def write_elfxml(elem, name, out, indent = "    ", level = 0):
+    """Write elem as XML element name to the file object out.
+    
+    Elements are written while elem is walked, so no document tree is built and
+    LazySequence views are converted one entry at a time. The element names are
+    the same as the ones produced by to_elfxml.
+    elem -- Dictionary, list or LazySequence as returned by elf_to_data, or a value.
+    name -- Name of the element.
+    out -- File object the XML is written to.
+    indent -- String used for one level of indentation, or "" to write everything on one line.
+    level -- Indentation level of the element.
+    """
+    if indent:
+        prefix = indent * level
+        newline = "\n"
+    else:
+        prefix = ""
+        newline = ""
+        
+    if isinstance(elem, dict):
+        children = elem.iteritems()
+    elif isinstance(elem, (list, LazySequence)):
+        child_name = plural_to_singular(name)
+        children = ((child_name, subelem) for subelem in elem)
+    else:
+        out.write("%s<%s>%s</%s>%s" % (prefix, name, xml.sax.saxutils.escape(str(elem), {'"': "&quot;"}), name, newline))
+        return
+        
+    if len(elem) == 0:
+        out.write("%s<%s/>%s" % (prefix, name, newline))
+        return
+        
+    out.write("%s<%s>%s" % (prefix, name, newline))
+    try:
+        for (child_name, child) in children:
+            write_elfxml(child, child_name, out, indent, level + 1)
+    except Exception, e:
+        print >> sys.stderr, e
+    out.write("%s</%s>%s" % (prefix, name, newline))
+             
 def pprintpyReadElf(res, root, envvars=None):
     
     if len(res.keys()) == 0:
@@ -3221,20 +5141,1724 @@ def pprintpyReadElf(res, root, envvars=None):
     readelf_node = to_elfxml(res, 'pyreadelf', root)
     return readelf_node
 
+class DirEntry(object):
+    """Minimal stand-in for the entries of scandir when it is not available"""
+    
+    def __init__(self, directory, name):
+        self.name = name
+        self.path = os.path.join(directory, name)
+        self.lstat = os.lstat(self.path)
+        
+    def is_symlink(self):
+        return stat.S_ISLNK(self.lstat.st_mode)
+        
+    def stat(self, follow_symlinks = True):
+        if follow_symlinks and self.is_symlink():
+            return os.stat(self.path)
+        return self.lstat
+        
+def scandir(path):
+    """os.scandir, the scandir backport or a slower emulation with listdir and lstat"""
+    if not scandir_function is None:
+        return scandir_function(path)
+    return [DirEntry(path, name) for name in os.listdir(path)]
+    
+def is_elf_file(path):
+    """Check the first bytes of a file against the ELF magic"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        return os.read(fd, len(ELFMAG)) == ELFMAG
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+        
+def matches_any(path, name, patterns):
+    for pattern in patterns:
+        if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(path, pattern):
+            return True
+    return False
+    
+def crawl(paths, include = None, exclude = None, follow_symlinks = False):
+    """Yield the ELF files named by paths, searching directories recursively.
+    
+    Files given directly in paths are always yielded. Below directories, only
+    regular files (or symlinks to them) whose first bytes are the ELF magic are 
+    yielded, so other files cost one small read. Every file and directory is 
+    visited once, even if it is reachable through several hard links or symlinks.
+    include -- Glob patterns matched against name or path of files; if given, only matching files are yielded.
+    exclude -- Glob patterns matched against name or path of files and directories to leave out.
+    follow_symlinks -- Descend into directories that are symlinks.
+    """
+    include = include or []
+    exclude = exclude or []
+    seen = set()
+    for top in paths:
+        if not top:
+            continue
+        if not os.path.isdir(top):
+            yield top
+            continue
+        pending = [top]
+        while pending:
+            directory = pending.pop()
+            try:
+                st = os.stat(directory)
+                if (st.st_dev, st.st_ino) in seen:
+                    continue
+                seen.add((st.st_dev, st.st_ino))
+                entries = sorted(scandir(directory), key = lambda x: x.name, reverse = True)
+            except OSError, ex:
+                print >> sys.stderr, ex
+                continue
+            for entry in entries:
+                if exclude and matches_any(entry.path, entry.name, exclude):
+                    continue
+                try:
+                    symlink = entry.is_symlink()
+                    st = entry.stat(follow_symlinks = True)
+                except OSError:
+                    # Dangling symlink or file removed while crawling
+                    continue
+                if stat.S_ISDIR(st.st_mode):
+                    if follow_symlinks or not symlink:
+                        pending.append(entry.path)
+                elif stat.S_ISREG(st.st_mode):
+                    if include and not matches_any(entry.path, entry.name, include):
+                        continue
+                    if (st.st_dev, st.st_ino) in seen:
+                        continue
+                    seen.add((st.st_dev, st.st_ino))
+                    if is_elf_file(entry.path):
+                        yield entry.path
+                        
+def crawl_in_background(paths, queue_size = 1024, **kwargs):
+    """Run crawl in a separate thread and yield its results.
+    
+    The crawler thread hands the files over through a queue of at most queue_size
+    entries, so walking the file system overlaps with parsing without piling up
+    an unbounded list of paths. kwargs are passed to crawl.
+    """
+    queue = Queue.Queue(queue_size)
+    done = object()
+    
+    def producer():
+        try:
+            for path in crawl(paths, **kwargs):
+                queue.put(path)
+        finally:
+            queue.put(done)
+            
+    thread = threading.Thread(target = producer)
+    thread.daemon = True
+    thread.start()
+    while True:
+        path = queue.get()
+        if path is done:
+            break
+        yield path
+            
+def materialize(elem):
+    """Replace the LazySequence views in a result of elf_to_data by lists"""
+    if isinstance(elem, dict):
+        return dict((key, materialize(value)) for (key, value) in elem.iteritems())
+    elif isinstance(elem, (list, LazySequence)):
+        return [materialize(x) for x in elem]
+    else:
+        return elem
+            
+# Bump whenever the output of elf_to_data changes, so that cached results are not reused
+PARSER_VERSION = 5
+
+def hash_file(filename, chunk_size = 1024 * 1024):
+    """Return the SHA-256 of the contents of a file as hex string"""
+    digest = hashlib.sha256()
+    f = open(filename, 'rb')
+    try:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    finally:
+        f.close()
+    return digest.hexdigest()
+    
+class ResultCache(object):
+    """Persistent cache of elf_to_data results in an SQLite database.
+    
+    Results are stored pickled and compressed, keyed by the SHA-256 of the file
+    contents, PARSER_VERSION and the elf_to_data options that change the result
+    (see options_key). A second table maps (device, inode, size, mtime)
+    to the content hash, so files that did not change since they were last seen
+    are not hashed again. When the stored results exceed max_size bytes, the least 
+    recently used ones are evicted; max_size None keeps all results. The total
+    size is kept up to date in the cache_state table, so that storing a result
+    does not have to add up the sizes of all results. Several processes may use 
+    the same database at the same time, SQLite serializes the writers.
+    """
+    
+    SCHEMA_VERSION = 3
+    
+    # elf_to_data options that do not change the result
+    NEUTRAL_OPTIONS = ("vectorized", )
+    
+    def __init__(self, path, max_size = 1024 * 1024 * 1024):
+        self.path = path
+        self.max_size = max_size
+        self.db = sqlite3.connect(path, timeout = 600, isolation_level = None)
+        self.db.text_factory = str
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            (schema_version, ) = self.db.execute("PRAGMA user_version").fetchone()
+            if schema_version != self.SCHEMA_VERSION:
+                # Cached results are disposable, so an old layout is simply dropped
+                self.db.execute("DROP TABLE IF EXISTS results")
+                self.db.execute("DROP TABLE IF EXISTS file_hashes")
+                self.db.execute("DROP TABLE IF EXISTS cache_state")
+                # The data column is last, so that reading the other columns does not go through its overflow pages
+                self.db.execute("CREATE TABLE results (hash TEXT, version INTEGER, options TEXT, size INTEGER, last_used REAL, " \
+                    "data BLOB, PRIMARY KEY (hash, version, options))")
+                self.db.execute("CREATE TABLE cache_state (total INTEGER)")
+                self.db.execute("INSERT INTO cache_state VALUES (0)")
+                self.db.execute("CREATE INDEX results_last_used ON results (last_used)")
+                self.db.execute("CREATE TABLE file_hashes (device INTEGER, inode INTEGER, size INTEGER, mtime REAL, hash TEXT, " \
+                    "PRIMARY KEY (device, inode, size, mtime))")
+                self.db.execute("PRAGMA user_version = %d" % self.SCHEMA_VERSION)
+            self.db.execute("COMMIT")
+        except:
+            self.db.execute("ROLLBACK")
+            raise
+        self.trim()
+            
+    def close(self):
+        self.db.close()
+        
+    def content_hash(self, filename, stat):
+        """Return the content hash of a file, without reading it if its stat data is known"""
+        identity = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime)
+        row = self.db.execute("SELECT hash FROM file_hashes WHERE device = ? AND inode = ? AND size = ? AND mtime = ?", 
+            identity).fetchone()
+        if not row is None:
+            return row[0]
+            
+        digest = hash_file(filename)
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.execute("DELETE FROM file_hashes WHERE device = ? AND inode = ?", identity[:2])
+            self.db.execute("INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?, ?)", identity + (digest, ))
+            self.db.execute("COMMIT")
+        except:
+            self.db.execute("ROLLBACK")
+            raise
+        return digest
+        
+    def options_key(self, options):
+        """Return a string identifying the elf_to_data options that change the result"""
+        key = []
+        for (name, value) in sorted(options.items()):
+            if name in self.NEUTRAL_OPTIONS or value is None:
+                continue
+            if isinstance(value, (list, tuple, set, frozenset)):
+                value = sorted(value)
+            key.append("%s=%r" % (name, value))
+        return ";".join(key)
+        
+    def get(self, digest, options_key = ""):
+        """Return the cached result for a content hash, or None"""
+        key = (digest, PARSER_VERSION, options_key)
+        row = self.db.execute("SELECT data FROM results WHERE hash = ? AND version = ? AND options = ?", key).fetchone()
+        if row is None:
+            return None
+        self.db.execute("UPDATE results SET last_used = ? WHERE hash = ? AND version = ? AND options = ?", (time.time(), ) + key)
+        return cPickle.loads(zlib.decompress(row[0]))
+        
+    def put(self, digest, data, options_key = ""):
+        """Store the result for a content hash and evict old results if the cache is full"""
+        blob = zlib.compress(cPickle.dumps(data, cPickle.HIGHEST_PROTOCOL))
+        key = (digest, PARSER_VERSION, options_key)
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.db.execute("SELECT size FROM results WHERE hash = ? AND version = ? AND options = ?", key).fetchone()
+            self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)", 
+                key + (len(blob), time.time(), sqlite3.Binary(blob)))
+            self.db.execute("UPDATE cache_state SET total = total + ?", (len(blob) - (row and row[0] or 0), ))
+            self.evict_excess()
+            self.db.execute("COMMIT")
+        except:
+            self.db.execute("ROLLBACK")
+            raise
+            
+    def total_size(self):
+        """Size of all stored results in bytes"""
+        return self.db.execute("SELECT total FROM cache_state").fetchone()[0]
+            
+    def trim(self):
+        """Evict old results if the cache is larger than max_size"""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.evict_excess()
+            self.db.execute("COMMIT")
+        except:
+            self.db.execute("ROLLBACK")
+            raise
+            
+    def evict_excess(self):
+        total = self.total_size()
+        if not self.max_size is None and total > self.max_size:
+            self.evict(total - self.max_size)
+            
+    def evict(self, excess):
+        """Delete least recently used results until at least excess bytes are freed"""
+        victims = []
+        freed = 0
+        for (digest, version, options, size) in self.db.execute("SELECT hash, version, options, size FROM results ORDER BY last_used"):
+            if freed >= excess:
+                break
+            victims.append((digest, version, options))
+            freed += size
+        self.db.executemany("DELETE FROM results WHERE hash = ? AND version = ? AND options = ?", victims)
+        self.db.execute("UPDATE cache_state SET total = total - ?", (freed, ))
+        self.db.execute("DELETE FROM file_hashes WHERE hash NOT IN (SELECT hash FROM results)")
+        
+    def parse(self, filename, **options):
+        """Return elf_to_data for a file, with views replaced by lists, from the cache if possible.
+        
+        options -- Keyword arguments for elf_to_data.
+        """
+        digest = self.content_hash(filename, os.stat(filename))
+        options_key = self.options_key(options)
+        data = self.get(digest, options_key)
+        if data is None:
+            elffile = read_elf(filename)
+            try:
+                data = materialize(elf_to_data(elffile, **options))
+            finally:
+                elffile.close()
+            self.put(digest, data, options_key)
+        return data
+        
+# Result cache, elf_to_data keyword arguments and triage mode used by parse_file in this process, set up by init_worker.
+# SQLite connections cannot be shared between threads, so each thread opens the cache on first use (see worker_cache).
+worker_cache_settings = None
+worker_options = {}
+worker_triage = False
+worker_local = threading.local()
+
+def init_worker(cache_path = None, cache_size = None, options = None, triage = False):
+    # Nothing here may fail: an exception would kill the pool process, and the pool would start a new one forever
+    global worker_cache_settings, worker_options, worker_triage
+    worker_cache_settings = cache_path and (cache_path, cache_size) or None
+    worker_options = options or {}
+    worker_triage = triage
+    
+def worker_cache():
+    """ResultCache of the current thread as set up by init_worker, or None"""
+    if worker_cache_settings is None:
+        return None
+    if getattr(worker_local, "settings", None) != worker_cache_settings:
+        if not getattr(worker_local, "cache", None) is None:
+            worker_local.cache.close()
+        worker_local.cache = None
+        (cache_path, cache_size) = worker_cache_settings
+        try:
+            worker_local.cache = ResultCache(cache_path, cache_size)
+        except Exception, ex:
+            raise Exception("cannot open the result cache %s: %s" % (cache_path, ex))
+        worker_local.settings = worker_cache_settings
+    return worker_local.cache
+            
+def parse_file(filename, prefix = None):
+    """Read one file and return its fully converted data, with a "file" key.
+    
+    In triage mode only the header and program headers are read with triage_file,
+    using prefix as start of the file if given. Otherwise the result cache set up 
+    by init_worker is used if there is one. Errors are returned as an "error" key 
+    instead of being raised, so that one bad file does not stop a batch.
+    """
+    try:
+        if worker_triage:
+            record = triage_file(filename, prefix = prefix)
+        elif not worker_cache_settings is None:
+            record = worker_cache().parse(filename, **worker_options)
+        else:
+            elffile = read_elf(filename)
+            try:
+                record = materialize(elf_to_data(elffile, **worker_options))
+            finally:
+                elffile.close()
+    except Exception, ex:
+        record = {"error": str(ex)}
+    record["file"] = filename
+    return record
+    
+def scan_files(filenames, jobs = None, ordered = False, chunksize = 1, cache_path = None, cache_size = None, options = None, 
+        triage = False):
+    """Parse many files in a pool of worker processes.
+    
+    Yields the result of parse_file for each file as soon as it is available.
+    filenames -- Iterable of file paths.
+    jobs -- Number of worker processes (default: number of CPUs); 1 parses in this process.
+    ordered -- Yield results in the order of filenames instead of in completion order.
+    chunksize -- Number of files handed to a worker at once.
+    cache_path -- Database file of a ResultCache shared by all workers, or None.
+    cache_size -- Maximum size of the cache in bytes, or None for no limit.
+    options -- Keyword arguments for elf_to_data.
+    triage -- Only read the header and program headers of each file, see triage_file.
+    """
+    if jobs == 1:
+        init_worker(cache_path, cache_size, options, triage)
+        for filename in filenames:
+            yield parse_file(filename)
+        return
+        
+    pool = multiprocessing.Pool(jobs, init_worker, (cache_path, cache_size, options, triage))
+    try:
+        if ordered:
+            results = pool.imap(parse_file, filenames, chunksize)
+        else:
+            results = pool.imap_unordered(parse_file, filenames, chunksize)
+        for record in results:
+            yield record
+    finally:
+        pool.terminate()
+        pool.join()
+
+def prefetch_file(filename, chunk_size = 1024 * 1024):
+    """Read a file through once and discard the data, so that it is in the page cache when it is parsed"""
+    fd = os.open(filename, os.O_RDONLY)
+    try:
+        while os.read(fd, chunk_size):
+            pass
+    finally:
+        os.close(fd)
+        
+def scan(filenames, concurrency = 64, jobs = None, cache_path = None, cache_size = None, options = None, 
+        triage = False, prefix_size = 4096):
+    """Parse many files with a large number of reads in flight at once.
+    
+    Meant for slow storage such as network file systems, where a scan is bound by
+    latency rather than by the CPU. concurrency threads each take a file, read it
+    and then hand it to a pool of jobs worker processes (or parse it themselves 
+    if jobs is 1), so that up to concurrency files are read at the same time, 
+    while only jobs of them are parsed. In triage mode the thread reads the 
+    prefix_size bytes that triage_file decodes, and the decoding gets that 
+    prefix; otherwise it reads the whole file through with prefetch_file, so 
+    that the parser finds it in the page cache. Yields the result of parse_file 
+    for each file in completion order. The other arguments are as for scan_files.
+    """
+    pool = None
+    if jobs == 1:
+        init_worker(cache_path, cache_size, options, triage)
+    else:
+        pool = multiprocessing.Pool(jobs, init_worker, (cache_path, cache_size, options, triage))
+    tasks = Queue.Queue(concurrency * 2)
+    results = Queue.Queue()
+    done = object()
+    
+    def fetch(filename):
+        prefix = None
+        try:
+            if triage:
+                fd = os.open(filename, os.O_RDONLY)
+                try:
+                    prefix = os.read(fd, prefix_size)
+                finally:
+                    os.close(fd)
+            else:
+                prefetch_file(filename)
+        except OSError, ex:
+            return {"error": str(ex), "file": filename}
+        if pool is None:
+            return parse_file(filename, prefix)
+        return pool.apply_async(parse_file, (filename, prefix)).get()
+    
+    def reader():
+        while True:
+            filename = tasks.get()
+            if filename is done:
+                results.put(done)
+                return
+            results.put(fetch(filename))
+            
+    def feeder():
+        try:
+            for filename in filenames:
+                tasks.put(filename)
+        finally:
+            for i in xrange(concurrency):
+                tasks.put(done)
+                
+    threads = [threading.Thread(target = feeder)] + [threading.Thread(target = reader) for i in xrange(concurrency)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+        
+    finished = 0
+    try:
+        while finished < concurrency:
+            record = results.get()
+            if record is done:
+                finished += 1
+            else:
+                yield record
+    finally:
+        if not pool is None:
+            pool.terminate()
+            pool.join()
+
+class Manifest(object):
+    """Files seen by the previous scan of a tree, for incremental rescans with rescan.
+    
+    For each path the manifest keeps (device, inode, size, mtime) and the content 
+    hash, which is where the result of the file is found in the ResultCache. Files
+    that could not be parsed have no result in the cache; for them the error is 
+    kept instead, with the parser version and options it was found with (see 
+    error_key). It is stored in an SQLite database, which may be the same file as 
+    the cache.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout = 600, isolation_level = None)
+        self.db.text_factory = str
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.execute("CREATE TABLE IF NOT EXISTS manifest (path TEXT PRIMARY KEY, device INTEGER, inode INTEGER, " \
+                "size INTEGER, mtime REAL, hash TEXT, error TEXT, error_key TEXT)")
+            columns = [row[1] for row in self.db.execute("PRAGMA table_info(manifest)")]
+            if not "error" in columns:
+                self.db.execute("ALTER TABLE manifest ADD COLUMN error TEXT")
+                self.db.execute("ALTER TABLE manifest ADD COLUMN error_key TEXT")
+            self.db.execute("COMMIT")
+        except:
+            self.db.execute("ROLLBACK")
+            raise
+            
+    def close(self):
+        self.db.close()
+        
+    def entries(self):
+        """Return a dictionary from path to (device, inode, size, mtime, hash, error, error_key)"""
+        return dict((row[0], tuple(row[1:])) for row in 
+            self.db.execute("SELECT path, device, inode, size, mtime, hash, error, error_key FROM manifest"))
+            
+    @staticmethod
+    def error_key(options_key):
+        """Identify the parser version and options an error was found with, from ResultCache.options_key"""
+        return "%d;%s" % (PARSER_VERSION, options_key)
+        
+    def update(self, entries, removed):
+        """Store entries, a list of (path, device, inode, size, mtime, hash, error, error_key), and forget the paths in removed"""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.executemany("INSERT OR REPLACE INTO manifest (path, device, inode, size, mtime, hash, error, error_key) " \
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", entries)
+            self.db.executemany("DELETE FROM manifest WHERE path = ?", ((path, ) for path in removed))
+            self.db.execute("COMMIT")
+        except:
+            self.db.execute("ROLLBACK")
+            raise
+            
+def rescan(filenames, manifest_path, jobs = None, cache_path = None, cache_size = 1024 * 1024 * 1024, options = None):
+    """Scan files again, parsing only the ones that changed since the last scan.
+    
+    Yields the records of parse_file with an additional "status" key: "unchanged"
+    for files whose (device, inode, size, mtime) match the manifest, "added" or 
+    "changed" for the others, and "removed", with only a "file" key, for files in 
+    the manifest that are not in filenames. Unchanged files are taken from the 
+    cache, or from the error kept in the manifest if they could not be parsed; 
+    they are only parsed again if their result was evicted from the cache. All 
+    other files are parsed in a pool of jobs processes. The manifest is updated 
+    when all files are done.
+    manifest_path -- Database file of the Manifest.
+    cache_path -- Database file of the ResultCache with the results (default: manifest_path).
+    The other arguments are as for scan_files.
+    """
+    cache_path = cache_path or manifest_path
+    options = options or {}
+    manifest = Manifest(manifest_path)
+    cache = ResultCache(cache_path, cache_size)
+    options_key = cache.options_key(options)
+    error_key = Manifest.error_key(options_key)
+    previous = manifest.entries()
+    seen = set()
+    statuses = {}
+    pending = []
+    for filename in filenames:
+        seen.add(filename)
+        entry = previous.get(filename)
+        try:
+            st = os.stat(filename)
+            unchanged = not entry is None and entry[:4] == (st.st_dev, st.st_ino, st.st_size, st.st_mtime)
+        except OSError:
+            unchanged = False
+        if unchanged:
+            (digest, error, entry_error_key) = entry[4:]
+            if not error is None and entry_error_key == error_key:
+                yield {"error": error, "file": filename, "status": "unchanged"}
+                continue
+            record = cache.get(digest, options_key)
+            if not record is None:
+                record["file"] = filename
+                record["status"] = "unchanged"
+                yield record
+                continue
+            statuses[filename] = "unchanged"
+        else:
+            statuses[filename] = entry is None and "added" or "changed"
+        pending.append(filename)
+        
+    entries = []
+    for record in scan_files(pending, jobs, cache_path = cache_path, cache_size = cache_size, options = options):
+        filename = record["file"]
+        record["status"] = statuses[filename]
+        error = record.get("error")
+        try:
+            st = os.stat(filename)
+            entries.append((filename, st.st_dev, st.st_ino, st.st_size, st.st_mtime, cache.content_hash(filename, st), 
+                error, not error is None and error_key or None))
+        except (OSError, IOError):
+            pass
+        yield record
+        
+    removed = [path for path in previous if not path in seen]
+    for path in sorted(removed):
+        yield {"file": path, "status": "removed"}
+    manifest.update(entries, removed)
+    manifest.close()
+    cache.close()
+
+# Columns of the tables written by ColumnarExporter, with the name of their pyarrow type
+COLUMNAR_TABLES = (
+    ("files", (("file_id", "uint64"), ("path", "string"), ("error", "string"), ("class", "uint8"), ("type", "uint16"), 
+        ("machine", "uint16"), ("osabi", "uint8"), ("entry", "uint64"), ("flags", "uint32"), ("ph_count", "uint16"), 
+        ("sh_count", "uint16"))),
+    ("sections", (("file_id", "uint64"), ("index", "uint32"), ("name", "string"), ("type", "uint32"), ("address", "uint64"), 
+        ("offset", "uint64"), ("size", "uint64"), ("entry_size", "uint64"), ("flags", "uint64"), ("link", "uint32"), 
+        ("info", "uint32"), ("align", "uint64"))),
+    ("symbols", (("file_id", "uint64"), ("name", "string"), ("section", "uint16"), ("bind", "uint8"), ("type", "uint8"), 
+        ("value", "uint64"), ("size", "uint64"), ("info", "uint8"), ("other", "uint8"))))
+    
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+def unicode_text(text):
+    if text is None or isinstance(text, unicode):
+        return text
+    return str(text).decode("utf-8", "replace")
+    
+def field_value(field):
+    """Value of a field of elf_to_data that may be a {"value", "description"} dictionary"""
+    if isinstance(field, dict):
+        return field.get("value")
+    return field
+    
+def columnar_rows(record, file_id):
+    """Yield (table, row) for the COLUMNAR_TABLES rows of a record of parse_file, with strings as unicode"""
+    header = record.get("header") or {}
+    yield ("files", (file_id, unicode_text(record.get("file")), unicode_text(record.get("error")), 
+        field_value(header.get("class")), field_value(header.get("type")), field_value(header.get("machine")), 
+        field_value(header.get("osabi")), header.get("entry"), field_value(header.get("flags")), header.get("ph_count"), 
+        header.get("sh_count")))
+        
+    sections = record.get("sections")
+    if isinstance(sections, (list, LazySequence)):
+        for x in sections:
+            yield ("sections", (file_id, x["index"], unicode_text(x["name"]), field_value(x["type"]), x["address"], 
+                x["offset"], x["size"], x["entry_size"], x["flags"], x["link"], x["info"], x["align"]))
+                
+    symbols = record.get("symbols")
+    if isinstance(symbols, (list, LazySequence)):
+        for x in symbols:
+            yield ("symbols", (file_id, unicode_text(x["name"]), x["section"], x["bind"], x["type"], 
+                x["value"], x["size"], x["info"], x["other"]))
+                
+class ColumnarExporter(object):
+    """Write the headers, sections and symbols of scanned files as columnar tables.
+    
+    Each table of COLUMNAR_TABLES goes to its own file in directory path, 
+    <table>.parquet or, for the Arrow IPC stream format, <table>.arrows. Rows are
+    buffered column by column and written out as one record batch (a row group in
+    Parquet) whenever a table has row_group_size rows, so memory stays bounded 
+    however many files are exported. Every file gets a file_id, which links its 
+    rows in "sections" and "symbols" to its row in "files". All batches share
+    one fixed schema with plain string columns; Parquet dictionary-encodes the
+    section and symbol names on disk.
+    Needs pyarrow.
+    """
+    
+    def __init__(self, path, format = "parquet", row_group_size = 64 * 1024):
+        if pyarrow is None:
+            raise Exception("columnar export needs pyarrow, which is not installed")
+        if not format in COLUMNAR_FORMATS:
+            raise Exception("unknown columnar format '%s', expected one of %s" % (format, ", ".join(COLUMNAR_FORMATS)))
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self.format = format
+        self.row_group_size = row_group_size
+        self.next_file_id = 0
+        self.schemas = {}
+        self.columns = {}
+        self.writers = {}
+        self.sinks = {}
+        for (table, columns) in COLUMNAR_TABLES:
+            schema = pyarrow.schema([pyarrow.field(name, getattr(pyarrow, kind)()) for (name, kind) in columns])
+            self.schemas[table] = schema
+            self.columns[table] = [[] for x in columns]
+            if format == "parquet":
+                self.writers[table] = pyarrow.parquet.ParquetWriter(os.path.join(path, table + ".parquet"), schema, 
+                    use_dictionary = [name for (name, kind) in columns if name == "name"])
+            else:
+                self.sinks[table] = pyarrow.OSFile(os.path.join(path, table + ".arrows"), "wb")
+                self.writers[table] = pyarrow.RecordBatchStreamWriter(self.sinks[table], schema)
+                
+    def add_row(self, table, row):
+        columns = self.columns[table]
+        for (column, value) in zip(columns, row):
+            column.append(value)
+        if len(columns[0]) >= self.row_group_size:
+            self.flush(table)
+            
+    def flush(self, table):
+        """Write the buffered rows of table as one record batch"""
+        columns = self.columns[table]
+        if not columns[0]:
+            return
+        schema = self.schemas[table]
+        arrays = [pyarrow.array(values, field.type) for (field, values) in zip(schema, columns)]
+        batch = pyarrow.RecordBatch.from_arrays(arrays, schema.names)
+        if self.format == "parquet":
+            self.writers[table].write_table(pyarrow.Table.from_batches([batch], schema))
+        else:
+            self.writers[table].write_batch(batch)
+        self.columns[table] = [[] for x in columns]
+        
+    def write(self, record):
+        """Add a record of parse_file, returns its file_id, or None for a removed file of rescan"""
+        if record.get("status") == "removed":
+            return None
+        file_id = self.next_file_id
+        self.next_file_id += 1
+        for (table, row) in columnar_rows(record, file_id):
+            self.add_row(table, row)
+        return file_id
+        
+    def close(self):
+        """Flush the remaining rows and close the files"""
+        for (table, columns) in COLUMNAR_TABLES:
+            self.flush(table)
+            self.writers[table].close()
+            if table in self.sinks:
+                self.sinks[table].close()
+        self.writers = {}
+        self.sinks = {}
+
+def sqlite_integer(value):
+    """Store unsigned 64-bit values above the range of SQLite integers as their two's complement"""
+    if not value is None and value >= 0x8000000000000000:
+        return value - 0x10000000000000000
+    return value
+    
+class SqliteExporter(object):
+    """Write the records of a batch scan into normalized tables of an SQLite database.
+    
+    The tables are files, segments, sections, symbols and needed_libs (the 
+    DT_NEEDED entries), all rows referring to the id of their file; a path 
+    written again keeps its first id and rows. Rows are inserted with 
+    executemany in batches of batch_size rows, inside transactions of up to 
+    commit_size rows, and the indexes are only created by close, after the load.
+    Addresses, sizes and offsets of 2**63 and more are stored as negative 
+    numbers, see sqlite_integer.
+    
+    The database is built in path + ".tmp" and close renames it over path, so 
+    an existing database at path is only replaced by a complete one; abort 
+    removes the temporary database.
+    """
+    
+    TABLES = (
+        ("files", "id INTEGER PRIMARY KEY, path TEXT, error TEXT, class INTEGER, type INTEGER, machine INTEGER, " \
+            "osabi INTEGER, entry INTEGER, flags INTEGER"),
+        ("segments", "file INTEGER, type INTEGER, offset INTEGER, vaddr INTEGER, paddr INTEGER, filesz INTEGER, " \
+            "memsz INTEGER, flags INTEGER, align INTEGER"),
+        ("sections", "file INTEGER, idx INTEGER, name TEXT, type INTEGER, address INTEGER, offset INTEGER, size INTEGER, " \
+            "entsize INTEGER, flags INTEGER, link INTEGER, info INTEGER, align INTEGER"),
+        ("symbols", "file INTEGER, name TEXT, section INTEGER, bind INTEGER, type INTEGER, value INTEGER, size INTEGER, " \
+            "info INTEGER, other INTEGER"),
+        ("needed_libs", "file INTEGER, name TEXT"))
+        
+    INDEXES = (
+        "CREATE UNIQUE INDEX files_path ON files (path)",
+        "CREATE INDEX segments_file ON segments (file)",
+        "CREATE INDEX sections_file ON sections (file)",
+        "CREATE INDEX sections_name ON sections (name)",
+        "CREATE INDEX symbols_name ON symbols (name)",
+        "CREATE INDEX symbols_file ON symbols (file)",
+        "CREATE INDEX needed_libs_name ON needed_libs (name)",
+        "CREATE INDEX needed_libs_file ON needed_libs (file)")
+        
+    def __init__(self, path, batch_size = 10000, commit_size = 1000000):
+        self.path = path
+        self.temp_path = path + ".tmp"
+        self.batch_size = batch_size
+        self.commit_size = commit_size
+        self.file_ids = {}
+        self.uncommitted = 0
+        self.rows = dict((table, []) for (table, columns) in self.TABLES)
+        self.inserts = dict((table, "INSERT INTO %s VALUES (%s)" % (table, ", ".join("?" * (columns.count(",") + 1)))) 
+            for (table, columns) in self.TABLES)
+        self.remove_database(self.temp_path)
+        self.db = sqlite3.connect(self.temp_path, timeout = 600, isolation_level = None)
+        self.db.text_factory = str
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            for (table, columns) in self.TABLES:
+                self.db.execute("CREATE TABLE %s (%s)" % (table, columns))
+        except:
+            self.db.execute("ROLLBACK")
+            self.db.close()
+            self.remove_database(self.temp_path)
+            raise
+            
+    @staticmethod
+    def remove_database(path):
+        """Delete an SQLite database file with its -wal and -shm files, if they exist"""
+        for name in (path, path + "-wal", path + "-shm"):
+            if os.path.exists(name):
+                os.remove(name)
+                    
+    def add_rows(self, table, rows):
+        buffered = self.rows[table]
+        buffered.extend(rows)
+        if len(buffered) >= self.batch_size:
+            self.flush(table)
+            
+    def flush(self, table):
+        """Insert the buffered rows of table"""
+        if self.rows[table]:
+            self.db.executemany(self.inserts[table], self.rows[table])
+            self.uncommitted += len(self.rows[table])
+            self.rows[table] = []
+            
+    def write(self, record):
+        """Add a record of parse_file, returns its file id, or None for a removed file of rescan"""
+        if record.get("status") == "removed":
+            return None
+        path = record.get("file")
+        if path in self.file_ids:
+            return self.file_ids[path]
+        file_id = len(self.file_ids) + 1
+        self.file_ids[path] = file_id
+        header = record.get("header") or {}
+        error = record.get("error")
+        if not error is None:
+            error = str(error)
+        self.add_rows("files", [(file_id, path, error, field_value(header.get("class")), 
+            field_value(header.get("type")), field_value(header.get("machine")), field_value(header.get("osabi")), 
+            sqlite_integer(header.get("entry")), field_value(header.get("flags")))])
+            
+        segments = record.get("program_headers")
+        if isinstance(segments, (list, LazySequence)):
+            self.add_rows("segments", [(file_id, field_value(x["type"]), sqlite_integer(x["offset"]), 
+                sqlite_integer(x["virtual_address"]), sqlite_integer(x["physical_address"]), sqlite_integer(x["file_size"]), 
+                sqlite_integer(x["memory_size"]), x["flags"], sqlite_integer(x["align"])) for x in segments])
+                
+        sections = record.get("sections")
+        if isinstance(sections, (list, LazySequence)):
+            self.add_rows("sections", [(file_id, x["index"], x["name"], field_value(x["type"]), sqlite_integer(x["address"]), 
+                sqlite_integer(x["offset"]), sqlite_integer(x["size"]), sqlite_integer(x["entry_size"]), 
+                sqlite_integer(x["flags"]), x["link"], x["info"], sqlite_integer(x["align"])) for x in sections])
+                
+        symbols = record.get("symbols")
+        if isinstance(symbols, (list, LazySequence)):
+            self.add_rows("symbols", [(file_id, x["name"], x["section"], x["bind"], x["type"], sqlite_integer(x["value"]), 
+                sqlite_integer(x["size"]), x["info"], x["other"]) for x in symbols])
+                
+        entries = record.get("dynamic_entries")
+        if isinstance(entries, (list, LazySequence)):
+            self.add_rows("needed_libs", [(file_id, x["string"]) for x in entries 
+                if field_value(x["tag"]) == DT_NEEDED and not x.get("string") is None])
+                
+        if self.uncommitted >= self.commit_size:
+            self.db.execute("COMMIT")
+            self.db.execute("BEGIN IMMEDIATE")
+            self.uncommitted = 0
+        return file_id
+        
+    def close(self):
+        """Insert the remaining rows, create the indexes, commit and replace the database at path"""
+        try:
+            for (table, columns) in self.TABLES:
+                self.flush(table)
+            # Indexes are cheaper to build once after the bulk load
+            for index in self.INDEXES:
+                self.db.execute(index)
+            self.db.execute("COMMIT")
+        except:
+            self.abort()
+            raise
+        self.db.close()
+        # Stale -wal and -shm files of the old database must not be applied to 
+        # the new one; the rename replaces the old database itself atomically
+        for name in (self.path + "-wal", self.path + "-shm"):
+            if os.path.exists(name):
+                os.remove(name)
+        os.rename(self.temp_path, self.path)
+        
+    def abort(self):
+        """Roll back, close and delete the temporary database; the database at path is left as it was"""
+        try:
+            self.db.execute("ROLLBACK")
+        except sqlite3.Error:
+            pass
+        self.db.close()
+        self.remove_database(self.temp_path)
+
+def build_id_record(filename):
+    """Return (filename, build-id or None), for BuildIdIndex.update in a worker process"""
+    try:
+        return (filename, read_build_id(filename))
+    except Exception:
+        return (filename, None)
+        
+class BuildIdIndex(object):
+    """Persistent map from GNU build-id to the paths of the files that have it.
+    
+    Like the Manifest, it keeps (device, inode, size, mtime) of every file, so an 
+    update only reads the build-id of new and changed files. Build-ids are read
+    with read_build_id, which does not map or parse the whole file. Stored in an
+    SQLite database, indexed by build-id.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout = 600, isolation_level = None)
+        self.db.text_factory = str
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS build_ids (path TEXT PRIMARY KEY, device INTEGER, inode INTEGER, " \
+            "size INTEGER, mtime REAL, build_id TEXT)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS build_ids_build_id ON build_ids (build_id)")
+        
+    def close(self):
+        self.db.close()
+        
+    def update(self, filenames, jobs = None, remove_missing = True):
+        """Bring the index up to date with the files in filenames.
+        
+        Returns (number of files read, number of files removed).
+        jobs -- Number of worker processes reading build-ids (default: number of CPUs); 1 reads in this process.
+        remove_missing -- Forget indexed files that are not in filenames.
+        """
+        previous = dict((row[0], tuple(row[1:])) for row in self.db.execute("SELECT path, device, inode, size, mtime FROM build_ids"))
+        seen = set()
+        stats = {}
+        for filename in filenames:
+            seen.add(filename)
+            try:
+                st = os.stat(filename)
+            except OSError:
+                continue
+            key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime)
+            if previous.get(filename) != key:
+                stats[filename] = key
+                
+        pool = None
+        if jobs == 1 or len(stats) < 2:
+            results = (build_id_record(x) for x in stats)
+        else:
+            pool = multiprocessing.Pool(jobs)
+            results = pool.imap_unordered(build_id_record, stats, 64)
+        try:
+            rows = [(filename, ) + stats[filename] + (build_id, ) for (filename, build_id) in results]
+        finally:
+            if not pool is None:
+                pool.terminate()
+                pool.join()
+                
+        removed = []
+        if remove_missing:
+            removed = [path for path in previous if not path in seen]
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.executemany("INSERT OR REPLACE INTO build_ids VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.db.executemany("DELETE FROM build_ids WHERE path = ?", ((path, ) for path in removed))
+            self.db.execute("COMMIT")
+        except:
+            self.db.execute("ROLLBACK")
+            raise
+        return (len(rows), len(removed))
+        
+    def lookup(self, build_id):
+        """Paths of the files with the build-id build_id (a hex string)"""
+        return [path for (path, ) in self.db.execute("SELECT path FROM build_ids WHERE build_id = ? ORDER BY path", 
+            (build_id.lower(), ))]
+            
+def merge_keyed(old, new):
+    """Walk two lists of (key, item) sorted by key in one pass.
+    
+    Yields (key, old item, new item), where the item missing on one side is None.
+    """
+    i = 0
+    j = 0
+    while i < len(old) or j < len(new):
+        if j >= len(new) or (i < len(old) and old[i][0] < new[j][0]):
+            yield (old[i][0], old[i][1], None)
+            i += 1
+        elif i >= len(old) or new[j][0] < old[i][0]:
+            yield (new[j][0], None, new[j][1])
+            j += 1
+        else:
+            yield (old[i][0], old[i][1], new[j][1])
+            i += 1
+            j += 1
+            
+def keyed_by_name(items, name):
+    """Return (key, item) for items sorted by key, where key is (name, number of earlier items with the same name)"""
+    counts = {}
+    keyed = []
+    for item in items:
+        item_name = name(item)
+        ordinal = counts.get(item_name, 0)
+        counts[item_name] = ordinal + 1
+        keyed.append(((item_name, ordinal), item))
+    keyed.sort(key = lambda x: x[0])
+    return keyed
+    
+def section_hash(elf, sect_header, chunk_size = 1024 * 1024):
+    """SHA-1 of the contents of a section, hashed in chunks straight from the memory map"""
+    if sect_header.type == SHT_NOBITS:
+        return None
+    end = sect_header.offset + sect_header.size
+    if end > elf.size:
+        raise Exception("possibly corrupt ELF file - section %s extends past end of file" % sect_header.name)
+    digest = hashlib.sha1()
+    for offset in xrange(sect_header.offset, end, chunk_size):
+        digest.update(buffer(elf.map, offset, min(chunk_size, end - offset)))
+    return digest.hexdigest()
+    
+def changed_fields(old, new, fields):
+    return [{"field": field, "old": getattr(old, field), "new": getattr(new, field)} 
+        for field in fields if getattr(old, field) != getattr(new, field)]
+        
+HEADER_DIFF_FIELDS = ("elfclass", "data", "osabi", "abiversion", "type", "machine", "version", "entry", "flags", 
+    "header_size", "ph_offset", "ph_entry_size", "ph_count", "sh_offset", "sh_entry_size", "sh_count", "shstrndx")
+SEGMENT_DIFF_FIELDS = ("offset", "vaddr", "paddr", "filesz", "memsz", "flags", "align")
+SECTION_DIFF_FIELDS = ("type", "flags", "addr", "size", "link", "info", "addralign", "entsize")
+    
+def diff_elf(old, new, symbols = True):
+    """Compare the structure of two ElfFiles.
+    
+    Segments are matched by type and order, sections and symbols by name (and 
+    order among equal names), each with one merge pass over both sides sorted by
+    key. Section contents are only hashed if the sizes are equal. Returns a 
+    dictionary with the lists "header_fields" (changed header fields), "segments",
+    "sections" (added, removed or changed, with the changed fields) and "symbols"
+    (added, removed, moved or resized).
+    symbols -- Also compare the symbol tables.
+    """
+    result = {
+        "header_fields": changed_fields(old.header, new.header, HEADER_DIFF_FIELDS),
+        "segments": [],
+        "sections": [],
+        "symbols": []}
+        
+    for ((ptype, ordinal), old_segment, new_segment) in merge_keyed(
+            keyed_by_name(old.prog_headers, lambda x: x.type), keyed_by_name(new.prog_headers, lambda x: x.type)):
+        record = {"type": {"value": ptype, "description": phdr_type(ptype)}, "ordinal": ordinal}
+        if old_segment is None:
+            record["change"] = "added"
+        elif new_segment is None:
+            record["change"] = "removed"
+        else:
+            record["change"] = "changed"
+            record["fields"] = changed_fields(old_segment, new_segment, SEGMENT_DIFF_FIELDS)
+            if not record["fields"]:
+                continue
+        result["segments"].append(record)
+        
+    for ((name, ordinal), old_section, new_section) in merge_keyed(
+            keyed_by_name(old.sect_headers, lambda x: x.name), keyed_by_name(new.sect_headers, lambda x: x.name)):
+        record = {"name": name, "ordinal": ordinal}
+        if old_section is None:
+            record["change"] = "added"
+        elif new_section is None:
+            record["change"] = "removed"
+        else:
+            record["change"] = "changed"
+            record["fields"] = changed_fields(old_section, new_section, SECTION_DIFF_FIELDS)
+            if old_section.size == new_section.size:
+                old_hash = section_hash(old, old_section)
+                new_hash = section_hash(new, new_section)
+                if old_hash != new_hash:
+                    record["fields"].append({"field": "content", "old": old_hash, "new": new_hash})
+            if not record["fields"]:
+                continue
+        result["sections"].append(record)
+        
+    if symbols:
+        result["symbols"] = diff_symbols(old, new)
+    return result
+    
+def diff_symbols(old, new):
+    def named_symbols(elf):
+        symbols = []
+        for sect_header in elf.sect_headers:
+            if sect_header.type in (SHT_SYMTAB, SHT_DYNSYM):
+                symbols.extend(x for x in elf.read_symbols(sect_header) 
+                    if x.name and not x.type in (STT_SECTION, STT_FILE))
+        return keyed_by_name(symbols, lambda x: x.name)
+        
+    changes = []
+    for ((name, ordinal), old_symbol, new_symbol) in merge_keyed(named_symbols(old), named_symbols(new)):
+        if old_symbol is None:
+            changes.append({"change": "added", "name": name, "value": new_symbol.value, "size": new_symbol.size})
+        elif new_symbol is None:
+            changes.append({"change": "removed", "name": name, "value": old_symbol.value, "size": old_symbol.size})
+        else:
+            if old_symbol.value != new_symbol.value:
+                changes.append({"change": "moved", "name": name, "old": old_symbol.value, "new": new_symbol.value})
+            if old_symbol.size != new_symbol.size:
+                changes.append({"change": "resized", "name": name, "old": old_symbol.size, "new": new_symbol.size})
+    return changes
+    
+class DynamicInfo(object):
+    """What the dynamic linker needs to know about an ELF file to load its dependencies"""
+    
+    def __init__(self, elf):
+        self.elfclass = elf.header.elfclass
+        self.machine = elf.header.machine
+        self.needed = elf.dynamic_strings(DT_NEEDED)
+        sonames = elf.dynamic_strings(DT_SONAME)
+        self.soname = sonames and sonames[0] or None
+        self.rpath = [x for entry in elf.dynamic_strings(DT_RPATH) for x in entry.split(":") if x]
+        self.runpath = [x for entry in elf.dynamic_strings(DT_RUNPATH) for x in entry.split(":") if x]
+        
+# Directories searched last, after DT_RUNPATH and /etc/ld.so.conf
+DEFAULT_LIBRARY_PATHS = {
+    ELFCLASS32: ("/lib", "/usr/lib"),
+    ELFCLASS64: ("/lib64", "/usr/lib64", "/lib", "/usr/lib")}
+    
+class DependencyResolver(object):
+    """ldd-like resolution of shared library dependencies inside a sysroot, without running anything.
+    
+    Libraries are searched like the GNU dynamic linker does: DT_RPATH of the 
+    object and its loaders (unless the object has DT_RUNPATH), library_path, 
+    DT_RUNPATH, the directories of /etc/ld.so.conf and the default directories; 
+    $ORIGIN and $LIB are expanded, and libraries of another ELF class or machine 
+    are skipped. All paths are paths inside the sysroot, and symbolic links are
+    resolved inside it too.
+    
+    The dynamic information of each file and each (name, search path) resolution
+    are kept, so one resolver used for many binaries of the same image parses
+    every library only once.
+    sysroot -- Directory holding the root file system to resolve in.
+    library_path -- Directories searched like LD_LIBRARY_PATH.
+    """
+    
+    def __init__(self, sysroot = "/", library_path = None):
+        self.sysroot = os.path.abspath(sysroot)
+        self.library_path = list(library_path or [])
+        self.infos = {}
+        self.resolutions = {}
+        self.config_paths = None
+        
+    def canonical_path(self, path):
+        """Absolute path inside the sysroot without symbolic links, "." or ".." components"""
+        parts = [x for x in path.split("/") if x]
+        parts.reverse()
+        resolved = []
+        links = 0
+        while parts:
+            part = parts.pop()
+            if part == ".":
+                continue
+            elif part == "..":
+                if resolved:
+                    resolved.pop()
+                continue
+            resolved.append(part)
+            host_path = os.path.join(self.sysroot, *resolved)
+            if os.path.islink(host_path):
+                links += 1
+                if links > 40:
+                    raise Exception("too many levels of symbolic links in %s" % path)
+                target = os.readlink(host_path)
+                resolved.pop()
+                if target.startswith("/"):
+                    resolved = []
+                parts.extend(reversed([x for x in target.split("/") if x]))
+        return "/" + "/".join(resolved)
+        
+    def host_path(self, path):
+        """Path on the host of a canonical path inside the sysroot"""
+        return os.path.join(self.sysroot, path.lstrip("/"))
+        
+    def info(self, path):
+        """DynamicInfo of the file at canonical path, parsed on first use; None if it is not a readable ELF file"""
+        if not path in self.infos:
+            info = None
+            if os.path.isfile(self.host_path(path)):
+                try:
+                    elf = ElfFile(self.host_path(path))
+                    try:
+                        info = DynamicInfo(elf)
+                    finally:
+                        elf.close()
+                except Exception:
+                    pass
+            self.infos[path] = info
+        return self.infos[path]
+        
+    def read_ld_so_conf(self, path = "/etc/ld.so.conf", seen = None):
+        """Directories listed in an ld.so.conf file of the sysroot, following include lines"""
+        if seen is None:
+            seen = set()
+        path = self.canonical_path(path)
+        if path in seen:
+            return []
+        seen.add(path)
+        try:
+            lines = open(self.host_path(path)).read().splitlines()
+        except IOError:
+            return []
+        directories = []
+        for line in lines:
+            words = line.split("#")[0].replace(",", " ").split()
+            if not words:
+                continue
+            if words[0] == "include":
+                for pattern in words[1:]:
+                    if not pattern.startswith("/"):
+                        pattern = os.path.join(os.path.dirname(path), pattern)
+                    directory = self.canonical_path(os.path.dirname(pattern))
+                    try:
+                        names = sorted(fnmatch.filter(os.listdir(self.host_path(directory)), os.path.basename(pattern)))
+                    except OSError:
+                        names = []
+                    for name in names:
+                        directories.extend(self.read_ld_so_conf(os.path.join(directory, name), seen))
+            else:
+                directories.extend(words)
+        return directories
+        
+    def expand(self, directory, origin, elfclass):
+        """Replace $ORIGIN and $LIB in a DT_RPATH or DT_RUNPATH directory of the object at origin"""
+        origin_directory = os.path.dirname(origin)
+        lib = elfclass == ELFCLASS64 and "lib64" or "lib"
+        for (token, value) in (("ORIGIN", origin_directory), ("LIB", lib)):
+            directory = directory.replace("${%s}" % token, value).replace("$" + token, value)
+        return directory
+        
+    def search_path(self, chain):
+        """Directories searched for the dependencies of chain[0], which was loaded by chain[1], ..."""
+        (path, info) = chain[0]
+        directories = []
+        if not info.runpath:
+            for (loader, loader_info) in chain:
+                directories.extend(self.expand(x, loader, loader_info.elfclass) for x in loader_info.rpath)
+        directories.extend(self.library_path)
+        directories.extend(self.expand(x, path, info.elfclass) for x in info.runpath)
+        if self.config_paths is None:
+            self.config_paths = self.read_ld_so_conf()
+        directories.extend(self.config_paths)
+        directories.extend(DEFAULT_LIBRARY_PATHS.get(info.elfclass, ()))
+        
+        unique = []
+        seen = set()
+        for directory in directories:
+            if not directory in seen:
+                seen.add(directory)
+                unique.append(directory)
+        return tuple(unique)
+        
+    def find(self, name, search_path, elfclass, machine):
+        """Path of library name in the first directory of search_path that has a matching one, or None"""
+        key = (name, search_path, elfclass, machine)
+        if not key in self.resolutions:
+            found = None
+            if "/" in name:
+                candidates = [name]
+            else:
+                candidates = [os.path.join(x, name) for x in search_path]
+            for candidate in candidates:
+                info = self.info(self.canonical_path(candidate))
+                if not info is None and info.elfclass == elfclass and info.machine == machine:
+                    found = os.path.normpath(candidate)
+                    break
+            self.resolutions[key] = found
+        return self.resolutions[key]
+        
+    def resolve(self, path):
+        """Dependency closure of the executable or library at path inside the sysroot.
+        
+        Returns one dictionary per library in breadth-first load order, like ldd,
+        with the "name" from DT_NEEDED, the object that "needed_by" it and whether
+        it was "found", and then the "path" it was found at.
+        """
+        path = self.canonical_path(path)
+        info = self.info(path)
+        if info is None:
+            raise Exception("not an ELF file - %s" % path)
+            
+        loaded = set([path])
+        names = set(info.soname and [info.soname] or [])
+        queue = [((path, info), )]
+        libraries = []
+        i = 0
+        while i < len(queue):
+            chain = queue[i]
+            i += 1
+            (obj, obj_info) = chain[0]
+            search_path = self.search_path(chain)
+            for name in obj_info.needed:
+                if name in names:
+                    continue
+                names.add(name)
+                found = self.find(name, search_path, info.elfclass, info.machine)
+                library = {"name": name, "needed_by": obj, "found": not found is None}
+                if not found is None:
+                    library["path"] = found
+                    canonical = self.canonical_path(found)
+                    if not canonical in loaded:
+                        loaded.add(canonical)
+                        found_info = self.info(canonical)
+                        if found_info.soname:
+                            names.add(found_info.soname)
+                        queue.append(((canonical, found_info), ) + chain)
+                libraries.append(library)
+        return libraries
+        
+class SymbolProviderIndex(object):
+    """Persistent index of the dynamic symbols that the ELF files of a sysroot export and import.
+    
+    build parses every file once and stores its exported symbols (with version),
+    its undefined imports and its resolved dependency closure (see 
+    DependencyResolver) in an SQLite database. providers and unresolved_imports
+    are then single indexed queries, without looking at any ELF file.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout = 600, isolation_level = None)
+        self.db.text_factory = str
+        self.db.execute("PRAGMA journal_mode=WAL")
+        
+    def close(self):
+        self.db.close()
+        
+    def build(self, sysroot = "/", paths = None, library_path = None, include = None, exclude = None, follow_symlinks = False):
+        """Index the ELF files below paths (default: the whole sysroot), replacing the previous contents.
+        
+        Returns the number of indexed files.
+        """
+        resolver = DependencyResolver(sysroot, library_path)
+        objects = {}
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            for table in ("objects", "exports", "imports", "dependencies"):
+                self.db.execute("DROP TABLE IF EXISTS %s" % table)
+            self.db.execute("CREATE TABLE objects (id INTEGER PRIMARY KEY, path TEXT, soname TEXT)")
+            self.db.execute("CREATE TABLE exports (name TEXT, version TEXT, hidden INTEGER, object INTEGER)")
+            self.db.execute("CREATE TABLE imports (name TEXT, version TEXT, library TEXT, weak INTEGER, object INTEGER)")
+            self.db.execute("CREATE TABLE dependencies (object INTEGER, dependency INTEGER)")
+            
+            for filename in crawl(paths or [resolver.sysroot], include = include, exclude = exclude, follow_symlinks = follow_symlinks):
+                path = resolver.canonical_path("/" + os.path.relpath(os.path.abspath(filename), resolver.sysroot))
+                if path in objects or path.startswith("/.."):
+                    continue
+                try:
+                    elf = ElfFile(resolver.host_path(path))
+                except Exception, ex:
+                    print >> sys.stderr, "%s: %s" % (filename, ex)
+                    continue
+                try:
+                    dynsyms = [x for x in elf.sect_headers if x.type == SHT_DYNSYM]
+                    if not dynsyms:
+                        continue
+                    info = DynamicInfo(elf)
+                    resolver.infos[path] = info
+                    object_id = len(objects) + 1
+                    objects[path] = object_id
+                    self.db.execute("INSERT INTO objects VALUES (?, ?, ?)", (object_id, path, info.soname))
+                    self.db.executemany("INSERT INTO exports VALUES (?, ?, ?, ?)", self.exports(elf, dynsyms[0], object_id))
+                    self.db.executemany("INSERT INTO imports VALUES (?, ?, ?, ?, ?)", self.imports(elf, dynsyms[0], object_id))
+                except Exception, ex:
+                    print >> sys.stderr, "%s: %s" % (filename, ex)
+                finally:
+                    elf.close()
+                    
+            for (path, object_id) in objects.iteritems():
+                try:
+                    libraries = resolver.resolve(path)
+                except Exception, ex:
+                    print >> sys.stderr, "%s: %s" % (path, ex)
+                    continue
+                dependencies = set(objects.get(resolver.canonical_path(x["path"])) for x in libraries if x["found"])
+                dependencies.discard(None)
+                self.db.executemany("INSERT INTO dependencies VALUES (?, ?)", ((object_id, x) for x in dependencies))
+                
+            # Indexes are cheaper to build once after the bulk load; paths are 
+            # unique through objects already
+            self.db.execute("CREATE INDEX objects_path ON objects (path)")
+            self.db.execute("CREATE INDEX exports_name ON exports (name, object)")
+            self.db.execute("CREATE INDEX imports_object ON imports (object)")
+            self.db.execute("CREATE INDEX dependencies_object ON dependencies (object, dependency)")
+            self.db.execute("COMMIT")
+        except:
+            self.db.execute("ROLLBACK")
+            raise
+        return len(objects)
+        
+    def exports(self, elf, dynsym, object_id):
+        """Rows (name, version, hidden, object) of the symbols defined and visible in a dynamic symbol table"""
+        versions = elf.symbol_versions(dynsym)
+        for symbol in elf.read_symbols(dynsym):
+            if symbol.section == ESHN_UNDEF or not symbol.name:
+                continue
+            if not symbol.bind in (STB_GLOBAL, STB_WEAK, STB_GNU_UNIQUE) or symbol.type in (STT_SECTION, STT_FILE):
+                continue
+            if symbol.other & 0x3 in (STV_HIDDEN, STV_INTERNAL):
+                continue
+            (version, hidden, library) = versions[symbol.index]
+            yield (symbol.name, version, int(hidden), object_id)
+            
+    def imports(self, elf, dynsym, object_id):
+        """Rows (name, version, library, weak, object) of the undefined symbols of a dynamic symbol table"""
+        versions = elf.symbol_versions(dynsym)
+        for symbol in elf.read_symbols(dynsym):
+            if symbol.section != ESHN_UNDEF or not symbol.name:
+                continue
+            (version, hidden, library) = versions[symbol.index]
+            yield (symbol.name, version, library, int(symbol.bind == STB_WEAK), object_id)
+            
+    def providers(self, name, version = None):
+        """Files that export symbol name (in version, if given), as dictionaries with "path", "version" and "default" """
+        query = "SELECT objects.path, exports.version, exports.hidden FROM exports JOIN objects ON objects.id = exports.object " \
+            "WHERE exports.name = ?"
+        parameters = [name]
+        if not version is None:
+            query += " AND exports.version = ?"
+            parameters.append(version)
+        return [{"path": path, "version": export_version or "", "default": not hidden} 
+            for (path, export_version, hidden) in self.db.execute(query + " ORDER BY objects.path", parameters)]
+            
+    def unresolved_imports(self, path, weak = False):
+        """Imports of the file at path (inside the sysroot) that none of its dependencies export.
+        
+        A versioned import is only satisfied by an export with the same version 
+        or by an unversioned one. Returns dictionaries with "name", "version" and
+        "library" (where the version is expected to come from).
+        weak -- Also report weak undefined symbols, which the dynamic linker allows to stay unresolved.
+        """
+        row = self.db.execute("SELECT id FROM objects WHERE path = ?", (path, )).fetchone()
+        if row is None:
+            raise Exception("%s is not in the symbol index %s" % (path, self.path))
+        query = "SELECT name, version, library FROM imports WHERE object = ? AND NOT EXISTS (" \
+            "SELECT 1 FROM dependencies JOIN exports ON exports.object = dependencies.dependency " \
+            "WHERE dependencies.object = imports.object AND exports.name = imports.name AND " \
+            "(imports.version IS NULL OR exports.version IS NULL OR exports.version = imports.version))"
+        if not weak:
+            query += " AND weak = 0"
+        return [{"name": name, "version": version or "", "library": library or ""} 
+            for (name, version, library) in self.db.execute(query + " ORDER BY name", row)]
+            
+class XmlOutput(object):
+    """XML document written to the --output file of the command line arguments args, or to standard output.
+    
+    The indentation is taken from args.indent; the XML declaration is written 
+    right away and close ends the document.
+    """
+    
+    def __init__(self, args):
+        self.out = sys.stdout
+        if args.output:
+            self.out = open(args.output, 'w')
+        self.indent = " " * args.indent
+        self.newline = self.indent and "\n" or ""
+        self.out.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        
+    def write(self, elem, name, level = 0):
+        """Write elem as element name, see write_elfxml"""
+        write_elfxml(elem, name, self.out, self.indent, level)
+        
+    def start(self, name):
+        """Open element name, whose children are written with level 1"""
+        self.out.write("<%s>%s" % (name, self.newline))
+        
+    def end(self, name):
+        self.out.write("</%s>%s" % (name, self.newline))
+        
+    def flush(self):
+        self.out.flush()
+        
+    def close(self):
+        if not self.indent:
+            self.out.write("\n")
+        if self.out != sys.stdout:
+            self.out.close()
+            
+def main_symbol_index(args):
+    index = SymbolProviderIndex(args.database)
+    result = {}
+    if args.build:
+        result["indexed_files"] = index.build(args.build, library_path = args.library_path, 
+            include = args.include, exclude = args.exclude, follow_symlinks = args.follow_symlinks)
+    if args.provides:
+        result["providers"] = []
+        for symbol in args.provides:
+            (name, _, version) = symbol.partition("@")
+            result["providers"].append({"symbol": symbol, "objects": index.providers(name, version or None)})
+    if args.unresolved:
+        result["unresolved_imports"] = []
+        for path in args.unresolved:
+            record = {"file": path}
+            try:
+                record["imports"] = index.unresolved_imports(path, args.weak)
+            except Exception, ex:
+                record["error"] = str(ex)
+            result["unresolved_imports"].append(record)
+    index.close()
+    output = XmlOutput(args)
+    output.write(result, 'symbol_index')
+    output.close()
+        
+def main_build_id(args):
+    index = BuildIdIndex(args.database)
+    result = {}
+    if args.update:
+        filenames = crawl(args.update, include = args.include, exclude = args.exclude, follow_symlinks = args.follow_symlinks)
+        (read, removed) = index.update(filenames, args.jobs, not args.keep_missing)
+        result["update"] = {"files_read": read, "files_removed": removed}
+    if args.lookup:
+        result["build_ids"] = [{"build_id": x, "paths": index.lookup(x)} for x in args.lookup]
+    index.close()
+    output = XmlOutput(args)
+    output.write(result, 'build_id_index')
+    output.close()
+        
+def main_ldd(args):
+    resolver = DependencyResolver(args.sysroot, args.library_path)
+    output = XmlOutput(args)
+    output.start('dependencies')
+    for filename in crawl(args.elffile, include = args.include, exclude = args.exclude, follow_symlinks = args.follow_symlinks):
+        path = "/" + os.path.relpath(os.path.abspath(filename), resolver.sysroot)
+        record = {"file": path}
+        try:
+            if path.startswith("/.."):
+                raise Exception("file is not inside the sysroot %s" % resolver.sysroot)
+            record["libraries"] = resolver.resolve(path)
+        except Exception, ex:
+            record["error"] = str(ex)
+        output.write(record, 'binary', 1)
+    output.end('dependencies')
+    output.close()
+        
+def main_diff(args):
+    old = read_elf(args.old)
+    new = read_elf(args.new)
+    output = XmlOutput(args)
+    output.write(diff_elf(old, new, not args.no_symbols), 'elfdiff')
+    output.close()
+    old.close()
+    new.close()
+
+def scan_records(args, options, cache_size):
+    """Records of parse_file for the files and directories of the command line, with the batch mode options of args"""
+    filenames = crawl_in_background(args.elffile, args.queue_size, include = args.include, 
+        exclude = args.exclude, follow_symlinks = args.follow_symlinks)
+    if args.manifest:
+        return rescan(filenames, args.manifest, args.jobs, cache_path = args.cache, cache_size = cache_size, 
+            options = options)
+    elif args.concurrency:
+        return scan(filenames, args.concurrency, args.jobs, cache_path = args.cache, cache_size = cache_size, 
+            options = options, triage = args.triage)
+    else:
+        return scan_files(filenames, args.jobs, args.ordered, cache_path = args.cache, cache_size = cache_size, 
+            options = options, triage = args.triage)
+    
+def main_columnar(args, options, cache_size):
+    exporter = ColumnarExporter(args.columnar, args.columnar_format, args.row_group_size)
+    try:
+        for record in scan_records(args, options, cache_size):
+            exporter.write(record)
+    finally:
+        exporter.close()
+        
+def main_sqlite(args, options, cache_size):
+    exporter = SqliteExporter(args.sqlite)
+    try:
+        for record in scan_records(args, options, cache_size):
+            exporter.write(record)
+    except:
+        exporter.abort()
+        raise
+    exporter.close()
+        
 def main(args):
-    elffile = read_elf(args.elffile)
-    elf_data = elf_to_data(elffile)
-    doc = xml.dom.minidom.Document()
-    elf_xml = to_elfxml(elf_data, 'readelf', doc)
-    doc.appendChild(elf_xml)
-    print(doc.toprettyxml(indent="    ", encoding='utf-8'))
+    if args.command == "diff":
+        return main_diff(args)
+    elif args.command == "ldd":
+        return main_ldd(args)
+    elif args.command == "symbol-index":
+        return main_symbol_index(args)
+    elif args.command == "build-id":
+        return main_build_id(args)
+        
+    cache_size = args.cache_size * 1024 * 1024
+    options = {"vectorized": args.numpy}
+    tables = list(ELF_DATA_TABLES)
+    if args.only:
+        tables = [x.strip().replace("-", "_") for x in args.only.split(",")]
+        for table in tables:
+            if not table in ELF_DATA_TABLES:
+                raise Exception("unknown table '%s' for --only, expected some of %s" % (table, ", ".join(ELF_DATA_TABLES)))
+    for table in args.skip_tables:
+        if table in tables:
+            tables.remove(table)
+    if set(tables) != set(ELF_DATA_TABLES):
+        options["tables"] = tables
+    if args.columnar:
+        return main_columnar(args, options, cache_size)
+    if args.sqlite:
+        return main_sqlite(args, options, cache_size)
+        
+    output = XmlOutput(args)
+    if len(args.elffile) == 1 and not os.path.isdir(args.elffile[0]) and not args.manifest:
+        if is_archive_file(args.elffile[0]):
+            archive = read_archive(args.elffile[0])
+            output.write(archive_to_data(archive, **options), 'archive')
+            archive.close()
+        elif args.triage:
+            output.write(triage_file(args.elffile[0]), 'readelf')
+        elif args.cache:
+            cache = ResultCache(args.cache, cache_size)
+            output.write(cache.parse(args.elffile[0], **options), 'readelf')
+            cache.close()
+        else:
+            elffile = read_elf(args.elffile[0])
+            output.write(elf_to_data(elffile, **options), 'readelf')
+            elffile.close()
+    else:
+        # Batch mode: one readelf element per file, written as results arrive
+        output.start('readelfs')
+        for record in scan_records(args, options, cache_size):
+            output.write(record, 'readelf', 1)
+            output.flush()
+        output.end('readelfs')
+    output.close()
 
-def parse_args():
-    parser = argparse.ArgumentParser(description = "readelf-like tool with XML output")
-    parser.add_argument("elffile", type = str, help = "ELF file to read")
+# Subcommands of the command line; "read" is the default
+COMMANDS = ("read", "diff", "ldd", "symbol-index", "build-id")
 
-    args = parser.parse_args()
+def parse_args(argv = None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv[:1] or not argv[0] in COMMANDS + ("-h", "--help"):
+        argv = ["read"] + list(argv)
+        
+    output_options = argparse.ArgumentParser(add_help = False)
+    output_options.add_argument("-o", "--output", type = str, default = None, help = "File to write the XML to (default: standard output)")
+    output_options.add_argument("--indent", type = int, default = 4, help = "Number of spaces per indentation level, 0 to write the XML on a single line")
+    crawl_options = argparse.ArgumentParser(add_help = False)
+    crawl_options.add_argument("--include", type = str, action = "append", default = [], help = "When searching directories, only " \
+        "use files whose name or path matches this glob pattern (can be given several times)")
+    crawl_options.add_argument("--exclude", type = str, action = "append", default = [], help = "When searching directories, skip " \
+        "files and directories whose name or path matches this glob pattern (can be given several times)")
+    crawl_options.add_argument("--follow-symlinks", action = "store_true", default = False, help = "Descend into symlinked directories")
+    
+    parser = argparse.ArgumentParser(description = "readelf-like tool with XML output", 
+        epilog = "Without a command, the arguments are those of the read command; use '%(prog)s read FILE' to read a file " \
+            "named like a command. '%(prog)s COMMAND --help' describes each command.", 
+        fromfile_prefix_chars = "@")
+    commands = parser.add_subparsers(dest = "command", metavar = "COMMAND")
+    
+    read_parser = commands.add_parser("read", parents = [output_options, crawl_options], help = "Read ELF files (default)", 
+        description = "Read ELF files and archives, with XML output")
+    read_parser.add_argument("elffile", type = str, nargs = "+", help = "ELF file to read. If several files or directories " \
+        "are given, they are parsed in batch mode; directories are searched recursively for ELF files and @listfile reads paths " \
+        "from listfile, one per line")
+    read_parser.add_argument("-j", "--jobs", type = int, default = None, help = "Number of worker processes in batch mode (default: number of CPUs)")
+    read_parser.add_argument("--ordered", action = "store_true", default = False, help = "In batch mode, output results in input order instead of completion order")
+    read_parser.add_argument("--concurrency", type = int, default = None, help = "In batch mode, keep this many file reads in flight " \
+        "at once, for slow storage; the files are read ahead in threads and parsed by the --jobs workers, and results are " \
+        "output in completion order")
+    read_parser.add_argument("--queue-size", type = int, default = 1024, help = "Maximum number of found files waiting to be parsed")
+    read_parser.add_argument("--manifest", type = str, default = None, help = "SQLite database with the files seen by the previous scan; " \
+        "only new and changed files are parsed again and removed files are reported (results are kept in --cache, or else in the manifest database)")
+    read_parser.add_argument("--cache", type = str, default = None, help = "SQLite database used as persistent cache of parsed results")
+    read_parser.add_argument("--cache-size", type = int, default = 1024, help = "Maximum size of the result cache in MiB (default: 1024)")
+    read_parser.add_argument("--numpy", action = "store_true", default = False, help = "Decode symbol tables with NumPy, if it is installed")
+    read_parser.add_argument("--triage", action = "store_true", default = False, help = "Only read the ELF header and the program headers " \
+        "from the start of each file")
+    read_parser.add_argument("--sqlite", type = str, metavar = "DATABASE", default = None, help = "Instead of XML, write " \
+        "all files into the tables files, segments, sections, symbols and needed_libs of this SQLite database")
+    read_parser.add_argument("--columnar", type = str, metavar = "DIRECTORY", default = None, help = "Instead of XML, write the " \
+        "headers, sections and symbols of all files as columnar tables to this directory (needs pyarrow)")
+    read_parser.add_argument("--columnar-format", type = str, choices = COLUMNAR_FORMATS, default = "parquet", 
+        help = "Format of the --columnar tables (default: parquet)")
+    read_parser.add_argument("--row-group-size", type = int, default = 64 * 1024, help = "Number of rows per row group " \
+        "or record batch of the --columnar tables (default: 65536)")
+    read_parser.add_argument("--only", type = str, default = None, help = "Comma-separated list of the tables to read, out of %s" % ",".join(ELF_DATA_TABLES))
+    read_parser.add_argument("--no-program-headers", dest = "skip_tables", action = "append_const", const = "program_headers", 
+        default = [], help = "Do not read the program headers")
+    read_parser.add_argument("--no-sections", dest = "skip_tables", action = "append_const", const = "sections", 
+        help = "Do not read the section headers")
+    read_parser.add_argument("--no-symbols", dest = "skip_tables", action = "append_const", const = "symbols", 
+        help = "Do not read the symbol tables")
+    read_parser.add_argument("--no-dynamic", dest = "skip_tables", action = "append_const", const = "dynamic_entries", 
+        help = "Do not read the dynamic section")
+    read_parser.add_argument("--no-attributes", dest = "skip_tables", action = "append_const", const = "attributes", 
+        help = "Do not read the build attributes")
+    read_parser.add_argument("--no-core", dest = "skip_tables", action = "append_const", const = "core", 
+        help = "Do not decode the notes of core files")
+        
+    diff_parser = commands.add_parser("diff", parents = [output_options], help = "Compare two ELF files", 
+        description = "Structural diff of two ELF files with XML output")
+    diff_parser.add_argument("old", type = str, help = "Old ELF file")
+    diff_parser.add_argument("new", type = str, help = "New ELF file")
+    diff_parser.add_argument("--no-symbols", action = "store_true", default = False, help = "Do not compare the symbol tables")
     
+    ldd_parser = commands.add_parser("ldd", parents = [output_options, crawl_options], help = "Resolve shared library dependencies", 
+        description = "Resolve the shared library dependencies of ELF files inside a sysroot, with XML output")
+    ldd_parser.add_argument("elffile", type = str, nargs = "+", help = "ELF file or directory inside the sysroot; " \
+        "directories are searched recursively for ELF files")
+    ldd_parser.add_argument("--sysroot", type = str, default = "/", help = "Root file system to resolve in (default: /)")
+    ldd_parser.add_argument("-L", "--library-path", type = str, action = "append", default = [], help = "Directory inside " \
+        "the sysroot searched like LD_LIBRARY_PATH (can be given several times)")
+        
+    index_parser = commands.add_parser("symbol-index", parents = [output_options, crawl_options], 
+        help = "Index the symbols exported and imported in a sysroot", 
+        description = "Build and query an index of the dynamic symbols exported and imported by the files of a sysroot")
+    index_parser.add_argument("database", type = str, help = "SQLite database holding the index")
+    index_parser.add_argument("--build", type = str, metavar = "SYSROOT", default = None, help = "Index all ELF files of " \
+        "this sysroot, replacing the previous contents of the index")
+    index_parser.add_argument("-L", "--library-path", type = str, action = "append", default = [], help = "When building, " \
+        "directory inside the sysroot searched like LD_LIBRARY_PATH (can be given several times)")
+    index_parser.add_argument("--provides", type = str, action = "append", default = [], metavar = "SYMBOL[@VERSION]", 
+        help = "List the files that export this symbol (can be given several times)")
+    index_parser.add_argument("--unresolved", type = str, action = "append", default = [], metavar = "PATH", 
+        help = "List the imports of the file at this path inside the sysroot that no dependency exports (can be given several times)")
+    index_parser.add_argument("--weak", action = "store_true", default = False, help = "Also list unresolved weak imports")
+    
+    build_id_parser = commands.add_parser("build-id", parents = [output_options, crawl_options], help = "Index files by build-id", 
+        description = "Maintain and query an index from GNU build-id to file path")
+    build_id_parser.add_argument("database", type = str, help = "SQLite database holding the index")
+    build_id_parser.add_argument("--update", type = str, action = "append", default = [], metavar = "PATH", help = "Index the " \
+        "ELF files in this file or directory, reading only new and changed files (can be given several times)")
+    build_id_parser.add_argument("--keep-missing", action = "store_true", default = False, help = "Keep indexed files that were " \
+        "not found by this update")
+    build_id_parser.add_argument("-j", "--jobs", type = int, default = None, help = "Number of worker processes reading build-ids (default: number of CPUs)")
+    build_id_parser.add_argument("--lookup", type = str, action = "append", default = [], metavar = "BUILD_ID", 
+        help = "List the files with this build-id (can be given several times)")
+        
+    args = parser.parse_args(argv)
+    if args.command == "read" and args.ordered and args.concurrency:
+        read_parser.error("--ordered cannot be used with --concurrency, which outputs results in completion order")
     return args
 
 
@@ -0,0 +1,3 @@
+extern int fix_add(int, int);
+extern void missing_hook(void) __attribute__((weak));
+void _start(void) { if (missing_hook) missing_hook(); fix_add(1, 2); for (;;); }
@@ -0,0 +1 @@
+int base_value(void) { return 42; }
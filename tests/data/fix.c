@@ -0,0 +1,7 @@
+extern int base_value(void);
+extern int ghost_func(void);
+int fix_counter = 3;
+int fix_add(int a, int b) { return a + b + base_value(); }
+int fix_ghost(void) { return ghost_func(); }
+static int fix_hidden(void) { return fix_counter; }
+int (*fix_pointer)(void) = fix_hidden;
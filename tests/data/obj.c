@@ -0,0 +1,13 @@
+int obj_data[4] = {1, 2, 3, 4};
+static int obj_counter;
+
+int obj_add(int a, int b) { return a + b + obj_counter; }
+void obj_set(int value) { obj_counter = value; }
+
+#ifdef CHANGED
+int obj_mul(int a, int b) { return a * b * 3 + obj_data[a & 3]; }
+int obj_new(void) { return 7; }
+#else
+int obj_mul(int a, int b) { return a * b; }
+int obj_old(void) { return 5; }
+#endif
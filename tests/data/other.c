@@ -0,0 +1,4 @@
+extern int obj_add(int a, int b);
+const char other_name[] = "other";
+
+int other_twice(int a) { return obj_add(a, a); }
@@ -0,0 +1,137 @@
+"""Small ELF files shared by all tests.
+
+The files are built once per test run from the sources in data/ with the
+system toolchain (gcc, ar and objcopy) into a temporary directory that is
+removed at exit. Tests that need them raise unittest.SkipTest if they cannot
+be built.
+
+    libbase.so    -- exports base_value@@BASE_1.0
+    libfix.so     -- SONAME libfix.so.1, needs libbase.so, imports ghost_func,
+                     exports fix_add, fix_counter, fix_ghost, fix_pointer in FIX_1.0;
+                     .gnu.hash only
+    libfix_sysv.so -- the same with a SysV .hash only
+    app           -- executable needing libfix.so.1, RUNPATH $ORIGIN/../lib, weak import missing_hook
+    sysroot/      -- /usr/lib/libbase.so, /opt/app/lib/libfix.so.1, /opt/app/bin/app
+    obj.o, obj_changed.o -- relocatable objects with debug information, built from obj.c
+    other.o       -- relocatable object from other.c
+    obj_zlib.o, obj_zdebug.o -- obj.o with SHF_COMPRESSED and .zdebug debug sections
+    obj_arm.o     -- obj.o turned into an ARM object with an .ARM.attributes section
+    libobj.a, libobj_thin.a -- regular and thin archives of obj.o and other.o
+"""
+
+import os
+import sys
+import shutil
+import struct
+import subprocess
+import tempfile
+import atexit
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(TESTS_DIR, "data")
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "elf"))
+
+import pyreadelf
+
+# .ARM.attributes contents: aeabi File attributes CPU_name "7-A", CPU_arch v7, CPU_arch_profile A,
+# ARM_ISA_use, THUMB_ISA_use Thumb-2, FP_arch VFPv3, ABI_VFP_args, compatibility gnu, conformance "2.09",
+# unknown tag 300, and a Section attribute ABI_enum_size for section 3
+ARM_ATTRIBUTES = "A8\x00\x00\x00aeabi\x00\x01%\x00\x00\x00\x057-A\x00\x06\n\x07A\x08\x01\t\x02\n\x03\x1c\x01 \x01gnu\x00" \
+    "C2.09\x00\xac\x02\x05\x02\t\x00\x00\x00\x03\x00\x1a\x01"
+
+SHT_ARM_ATTRIBUTES = 0x70000003
+
+build_state = {}
+
+def run(directory, *command):
+    subprocess.check_call(command, cwd = directory, stdout = open(os.devnull, "w"), stderr = subprocess.STDOUT)
+
+def data(name):
+    return os.path.join(DATA_DIR, name)
+
+def patch_arm(filename):
+    """Make an x86-64 object with an .ARM.attributes section look like an ARM object"""
+    elf = pyreadelf.ElfFile(filename)
+    (section, ) = [x for x in elf.sect_headers if x.name == ".ARM.attributes"]
+    type_offset = elf.header.sh_offset + section.index * elf.header.sh_entry_size + 4
+    elf.close()
+    f = open(filename, "r+b")
+    f.seek(18)
+    f.write(struct.pack("<H", pyreadelf.EM_ARM))
+    f.seek(type_offset)
+    f.write(struct.pack("<I", SHT_ARM_ATTRIBUTES))
+    f.close()
+
+def build(directory):
+    flags = ("-nostdlib", "-fPIC", "-O1", "-Wl,--build-id=sha1")
+    run(directory, "gcc", *(flags + ("-shared", "-Wl,-soname,libbase.so", "-Wl,--version-script=" + data("base.map"),
+        data("base.c"), "-o", "libbase.so")))
+    for (name, style) in (("libfix.so", "gnu"), ("libfix_sysv.so", "sysv")):
+        run(directory, "gcc", *(flags + ("-shared", "-Wl,-soname,libfix.so.1", "-Wl,--version-script=" + data("fix.map"),
+            "-Wl,--hash-style=" + style, data("fix.c"), "-L.", "-lbase", "-o", name)))
+    run(directory, "gcc", *(flags + ("-Wl,-rpath,$ORIGIN/../lib", "-Wl,--enable-new-dtags", data("app.c"), "-L.", "-lfix",
+        "-Wl,--allow-shlib-undefined", "-o", "app")))
+
+    run(directory, "gcc", "-c", "-g", "-O1", data("obj.c"), "-o", "obj.o")
+    run(directory, "gcc", "-c", "-g", "-O1", "-DCHANGED", data("obj.c"), "-o", "obj_changed.o")
+    run(directory, "gcc", "-c", "-O1", data("other.c"), "-o", "other.o")
+    run(directory, "objcopy", "--compress-debug-sections=zlib", "obj.o", "obj_zlib.o")
+    run(directory, "objcopy", "--compress-debug-sections=zlib-gnu", "obj.o", "obj_zdebug.o")
+    attributes = os.path.join(directory, "arm.attributes")
+    f = open(attributes, "wb")
+    f.write(ARM_ATTRIBUTES)
+    f.close()
+    run(directory, "objcopy", "--add-section", ".ARM.attributes=arm.attributes", "other.o", "obj_arm.o")
+    patch_arm(os.path.join(directory, "obj_arm.o"))
+    run(directory, "ar", "rcs", "libobj.a", "obj.o", "other.o")
+    run(directory, "ar", "rcsT", "libobj_thin.a", "obj.o", "other.o")
+
+    for (name, target) in (("libbase.so", "usr/lib/libbase.so"), ("libfix.so", "opt/app/lib/libfix.so.1"),
+            ("app", "opt/app/bin/app")):
+        target = os.path.join(directory, "sysroot", target)
+        if not os.path.isdir(os.path.dirname(target)):
+            os.makedirs(os.path.dirname(target))
+        shutil.copy(os.path.join(directory, name), target)
+
+def build_dir():
+    """Directory with the test files, built on first use"""
+    if not "directory" in build_state:
+        if "error" in build_state:
+            raise unittest.SkipTest(build_state["error"])
+        directory = tempfile.mkdtemp(prefix = "pyreadelf-tests-")
+        atexit.register(shutil.rmtree, directory, True)
+        try:
+            build(directory)
+        except (OSError, subprocess.CalledProcessError), ex:
+            build_state["error"] = "cannot build the test files: %s" % ex
+            raise unittest.SkipTest(build_state["error"])
+        build_state["directory"] = directory
+    return build_state["directory"]
+
+def path(name):
+    """Path of a test file"""
+    return os.path.join(build_dir(), name)
+
+def core_file():
+    """Path of a core dump of a sleep process, made on first use; skips the test if the system does not write one"""
+    if not "core" in build_state:
+        directory = os.path.join(build_dir(), "core")
+        os.mkdir(directory)
+        try:
+            subprocess.call("ulimit -c unlimited; sleep 30 & kill -SEGV $!; wait", shell = True, cwd = directory,
+                stderr = open(os.devnull, "w"))
+        except OSError:
+            pass
+        cores = [x for x in os.listdir(directory) if x.startswith("core")]
+        build_state["core"] = cores and os.path.join(directory, cores[0]) or None
+    if build_state["core"] is None:
+        raise unittest.SkipTest("no core dump was written, see /proc/sys/kernel/core_pattern")
+    return build_state["core"]
+
+def readelf(*args):
+    """Output of the system readelf, for comparisons"""
+    try:
+        return subprocess.check_output(("readelf", "-W") + args, stderr = open(os.devnull, "w"))
+    except OSError, ex:
+        raise unittest.SkipTest("readelf is not available: %s" % ex)
@@ -0,0 +1,62 @@
+import collections
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+Segment = collections.namedtuple("Segment", "type vaddr offset filesz memsz")
+
+
+def scan_offset(segments, vaddr):
+    """File offset of vaddr by a linear scan, for comparison"""
+    for segment in segments:
+        if segment.type == pyreadelf.PT_LOAD and segment.vaddr <= vaddr < segment.vaddr + segment.filesz:
+            return segment.offset + vaddr - segment.vaddr
+    return None
+
+
+class AddressTranslatorTest(unittest.TestCase):
+
+    def setUp(self):
+        # Unsorted, with a segment partly in memory only and a gap between 0x3000 and 0x10000
+        self.segments = [
+            Segment(pyreadelf.PT_LOAD, 0x10000, 0x3000, 0x800, 0x2000),
+            Segment(pyreadelf.PT_DYNAMIC, 0x10100, 0x3100, 0x100, 0x100),
+            Segment(pyreadelf.PT_LOAD, 0x1000, 0x0, 0x2000, 0x2000),
+            Segment(pyreadelf.PT_LOAD, 0x20000, 0x0, 0x0, 0x0)]
+        self.translator = pyreadelf.AddressTranslator(self.segments)
+        self.addresses = range(0, 0x13000, 0x80) + [0x2fff, 0x3000, 0x107ff, 0x10800, 0x11fff, 0x12000]
+
+    def test_to_offset(self):
+        for vaddr in self.addresses:
+            self.assertEqual(self.translator.to_offset(vaddr), scan_offset(self.segments, vaddr))
+        self.assertEqual(self.translator.to_offsets(self.addresses), [scan_offset(self.segments, x) for x in self.addresses])
+
+    def test_to_vaddr(self):
+        self.assertEqual(self.translator.to_vaddr(0x10), 0x1010)
+        self.assertEqual(self.translator.to_vaddr(0x3010), 0x10010)
+        self.assertEqual(self.translator.to_vaddr(0x2800), None)
+        self.assertEqual(self.translator.to_vaddrs([0x3800, 0x37ff]), [None, 0x107ff])
+
+    def test_segment_at(self):
+        self.assertEqual(self.translator.segment_at(0x11000), self.segments[0])
+        self.assertEqual(self.translator.segment_at(0x12000), None)
+        self.assertEqual(self.translator.segment_at(0x20000), None)
+        self.assertEqual(self.translator.segment_at(0x500), None)
+
+    @unittest.skipIf(pyreadelf.numpy is None, "NumPy is not installed")
+    def test_numpy_arrays(self):
+        numpy = pyreadelf.numpy
+        offsets = self.translator.to_offsets(numpy.array(self.addresses))
+        self.assertEqual(list(offsets), [x is None and -1 or x for x in self.translator.to_offsets(self.addresses)])
+        self.assertEqual(list(pyreadelf.AddressTranslator([]).to_offsets(numpy.array([1, 2]))), [-1, -1])
+
+    def test_elf_file(self):
+        with pyreadelf.read_elf(fixtures.path("app")) as elf:
+            for entry in elf.dynamic:
+                if entry.tag == pyreadelf.DT_STRTAB:
+                    self.assertEqual(elf.vaddr_to_offset(entry.value), scan_offset(elf.prog_headers, entry.value))
+
+
+if __name__ == "__main__":
+    unittest.main()
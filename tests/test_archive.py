@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+def contents(filename):
+    f = open(filename, "rb")
+    try:
+        return f.read()
+    finally:
+        f.close()
+
+
+class ArchiveTest(unittest.TestCase):
+
+    def test_members(self):
+        for name in ("libobj.a", "libobj_thin.a"):
+            with pyreadelf.read_archive(fixtures.path(name)) as archive:
+                self.assertEqual(archive.thin, name == "libobj_thin.a")
+                self.assertEqual([(x.name, x.size) for x in archive.members],
+                    [(x, os.path.getsize(fixtures.path(x))) for x in ("obj.o", "other.o")])
+
+    def test_members_are_read_in_place(self):
+        with pyreadelf.read_archive(fixtures.path("libobj.a")) as archive:
+            member = archive.members[0]
+            self.assertTrue(member.is_elf())
+            self.assertEqual(str(member.data), contents(fixtures.path("obj.o")))
+            actual = pyreadelf.elf_to_data(member.elf())
+            with pyreadelf.read_elf(fixtures.path("obj.o")) as elf:
+                expected = pyreadelf.elf_to_data(elf)
+                self.assertEqual(list(actual["symbols"]), list(expected["symbols"]))
+                self.assertEqual(list(actual["sections"]), list(expected["sections"]))
+
+    def test_find_symbol(self):
+        for name in ("libobj.a", "libobj_thin.a"):
+            with pyreadelf.read_archive(fixtures.path(name)) as archive:
+                self.assertEqual([x.name for x in archive.find_symbol("obj_add")], ["obj.o"])
+                self.assertEqual([x.name for x in archive.find_symbol("other_twice")], ["other.o"])
+                self.assertEqual(archive.find_symbol("obj_counter"), [])
+
+    def test_archive_to_data(self):
+        with pyreadelf.read_archive(fixtures.path("libobj_thin.a")) as archive:
+            data = pyreadelf.archive_to_data(archive, tables = ["header"])
+            self.assertEqual(len(data["members"]), 2)
+            self.assertEqual(data["members"][1]["name"], "other.o")
+            self.assertEqual(data["members"][1]["readelf"]["header"]["type"]["value"], pyreadelf.ET_REL)
+
+    def test_long_member_names(self):
+        directory = tempfile.mkdtemp(prefix = "pyreadelf-archive-")
+        try:
+            long_name = "a_rather_long_member_name.o"
+            shutil.copy(fixtures.path("other.o"), os.path.join(directory, long_name))
+            fixtures.run(directory, "ar", "rcs", "liblong.a", long_name)
+            with pyreadelf.read_archive(os.path.join(directory, "liblong.a")) as archive:
+                self.assertEqual([x.name for x in archive.members], [long_name])
+                self.assertEqual([x.name for x in archive.find_symbol("other_name")], [long_name])
+        finally:
+            shutil.rmtree(directory, True)
+
+    def test_is_archive_file(self):
+        self.assertTrue(pyreadelf.is_archive_file(fixtures.path("libobj.a")))
+        self.assertFalse(pyreadelf.is_archive_file(fixtures.path("obj.o")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import re
+import struct
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class AttributesTest(unittest.TestCase):
+
+    def attributes(self, name):
+        with pyreadelf.read_elf(fixtures.path(name)) as elf:
+            return pyreadelf.elf_to_data(elf)["attributes"]
+
+    def test_matches_readelf(self):
+        expected = []
+        for line in fixtures.readelf("-A", fixtures.path("obj_arm.o")).splitlines():
+            match = re.match(r"  (Tag_\w+): (.*)", line)
+            if match:
+                expected.append((match.group(1), match.group(2)))
+        attributes = self.attributes("obj_arm.o")
+        self.assertEqual([x["tag"]["description"] for x in attributes], [x[0] for x in expected])
+        for (attribute, (tag, text)) in zip(attributes, expected):
+            value = attribute["value"]
+            if isinstance(value, str):
+                self.assertEqual('"%s"' % value, text)
+            elif isinstance(value, dict) and "description" in value:
+                self.assertEqual(value["description"], text)
+
+    def test_scopes(self):
+        attributes = self.attributes("obj_arm.o")
+        self.assertEqual(set(x["vendor"] for x in attributes), set(["aeabi"]))
+        self.assertEqual(attributes[0]["scope"], "File")
+        self.assertEqual((attributes[-1]["scope"], attributes[-1]["applies_to"]), ("Section", "3"))
+        compatibility = [x for x in attributes if x["tag"]["value"] == pyreadelf.Tag_compatibility]
+        self.assertEqual(compatibility[0]["value"], {"flag": 1, "vendor": "gnu"})
+
+    def test_no_attributes_section(self):
+        self.assertEqual(self.attributes("obj.o"), [])
+
+    def test_corrupt_subsection_length(self):
+        word = struct.Struct("<I")
+        view = buffer("A" + word.pack(1000) + fixtures.ARM_ATTRIBUTES[5:])
+        self.assertRaises(Exception, list, pyreadelf.iter_attributes(view, word))
+        self.assertRaises(Exception, list, pyreadelf.iter_attributes(buffer("B"), word))
+        self.assertEqual(len(list(pyreadelf.iter_attributes(buffer(fixtures.ARM_ATTRIBUTES), word))), 11)
+
+
+if __name__ == "__main__":
+    unittest.main()
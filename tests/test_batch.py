@@ -0,0 +1,40 @@
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class ScanFilesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.filenames = [fixtures.path(x) for x in ("obj.o", "libfix.so", "app", "other.o")]
+
+    def test_in_process(self):
+        records = list(pyreadelf.scan_files(self.filenames, jobs = 1))
+        self.assertEqual([x["file"] for x in records], self.filenames)
+        self.assertEqual(records[0]["header"]["type"]["value"], pyreadelf.ET_REL)
+        self.assertTrue(isinstance(records[1]["symbols"], list))
+
+    def test_pool_ordered(self):
+        records = list(pyreadelf.scan_files(self.filenames, jobs = 2, ordered = True))
+        self.assertEqual([x["file"] for x in records], self.filenames)
+        self.assertEqual(records, list(pyreadelf.scan_files(self.filenames, jobs = 1)))
+
+    def test_pool_unordered(self):
+        records = pyreadelf.scan_files(self.filenames, jobs = 2)
+        self.assertEqual(sorted(x["file"] for x in records), sorted(self.filenames))
+
+    def test_errors_do_not_stop_the_batch(self):
+        filenames = [fixtures.data("obj.c"), fixtures.path("obj.o")]
+        records = list(pyreadelf.scan_files(filenames, jobs = 1))
+        self.assertEqual([x["file"] for x in records], filenames)
+        self.assertTrue("error" in records[0])
+        self.assertFalse("error" in records[1])
+
+    def test_options(self):
+        (record, ) = pyreadelf.scan_files([fixtures.path("obj.o")], jobs = 1, options = {"tables": ["header"]})
+        self.assertEqual(sorted(record), ["file", "header"])
+
+
+if __name__ == "__main__":
+    unittest.main()
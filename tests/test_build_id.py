@@ -0,0 +1,71 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+def readelf_build_id(filename):
+    match = re.search(r"Build ID: ([0-9a-f]+)", fixtures.readelf("-n", filename))
+    return match and match.group(1)
+
+
+class ReadBuildIdTest(unittest.TestCase):
+
+    def test_matches_readelf(self):
+        for name in ("app", "libfix.so", "libbase.so"):
+            build_id = readelf_build_id(fixtures.path(name))
+            self.assertEqual(len(build_id), 40)
+            self.assertEqual(pyreadelf.read_build_id(fixtures.path(name)), build_id)
+            with pyreadelf.read_elf(fixtures.path(name)) as elf:
+                self.assertEqual(elf.build_id, build_id)
+
+    def test_without_build_id(self):
+        self.assertEqual(pyreadelf.read_build_id(fixtures.path("obj.o")), None)
+
+    def test_small_prefix(self):
+        self.assertEqual(pyreadelf.read_build_id(fixtures.path("app"), prefix_size = 64), readelf_build_id(fixtures.path("app")))
+
+
+class BuildIdIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix = "pyreadelf-build-id-")
+        self.index = pyreadelf.BuildIdIndex(os.path.join(self.directory, "index.db"))
+        self.files = []
+        for name in ("app", "libfix.so", "obj.o"):
+            self.files.append(os.path.join(self.directory, name))
+            shutil.copy(fixtures.path(name), self.files[-1])
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.directory, True)
+
+    def test_lookup(self):
+        self.assertEqual(self.index.update(self.files, jobs = 1), (3, 0))
+        build_id = readelf_build_id(self.files[0])
+        self.assertEqual(self.index.lookup(build_id), [self.files[0]])
+        self.assertEqual(self.index.lookup(build_id.upper()), [self.files[0]])
+        self.assertEqual(self.index.lookup("00" * 20), [])
+
+    def test_only_changed_files_are_read(self):
+        self.index.update(self.files, jobs = 2)
+        self.assertEqual(self.index.update(self.files, jobs = 2), (0, 0))
+        shutil.copy(fixtures.path("libbase.so"), self.files[1])
+        os.utime(self.files[1], (0, 0))
+        self.assertEqual(self.index.update(self.files, jobs = 1), (1, 0))
+        self.assertEqual(self.index.lookup(readelf_build_id(fixtures.path("libbase.so"))), [self.files[1]])
+        self.assertEqual(self.index.lookup(readelf_build_id(fixtures.path("libfix.so"))), [])
+
+    def test_missing_files(self):
+        self.index.update(self.files, jobs = 1)
+        self.assertEqual(self.index.update(self.files[:2], jobs = 1, remove_missing = False), (0, 0))
+        self.assertEqual(self.index.update(self.files[:1], jobs = 1), (0, 2))
+        self.assertEqual(self.index.lookup(readelf_build_id(self.files[1])), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix = "pyreadelf-cache-")
+        self.path = os.path.join(self.directory, "cache.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, True)
+
+    def sizes(self, cache):
+        return cache.db.execute("SELECT TOTAL(size) FROM results").fetchone()[0]
+
+    def test_parse_uses_the_cache(self):
+        cache = pyreadelf.ResultCache(self.path)
+        first = cache.parse(fixtures.path("obj.o"))
+        self.assertEqual(cache.db.execute("SELECT COUNT(*) FROM results").fetchone()[0], 1)
+        self.assertEqual(cache.parse(fixtures.path("obj.o")), first)
+        self.assertEqual(cache.db.execute("SELECT COUNT(*) FROM results").fetchone()[0], 1)
+        cache.parse(fixtures.path("obj.o"), tables = ["header"])
+        self.assertEqual(cache.db.execute("SELECT COUNT(*) FROM results").fetchone()[0], 2)
+        cache.close()
+
+    def test_running_total(self):
+        cache = pyreadelf.ResultCache(self.path)
+        cache.put("a", {"data": "x" * 1000})
+        cache.put("b", {"data": "y" * 2000})
+        cache.put("a", {"data": "z"})
+        self.assertEqual(cache.total_size(), self.sizes(cache))
+        cache.close()
+
+    def test_evicts_least_recently_used(self):
+        cache = pyreadelf.ResultCache(self.path, max_size = 2500)
+        cache.put("a", {"data": os.urandom(1000)})
+        cache.put("b", {"data": os.urandom(1000)})
+        self.assertNotEqual(cache.get("a"), None)
+        cache.put("c", {"data": os.urandom(1000)})
+        self.assertEqual(cache.get("b"), None)
+        self.assertNotEqual(cache.get("a"), None)
+        self.assertNotEqual(cache.get("c"), None)
+        self.assertEqual(cache.total_size(), self.sizes(cache))
+        self.assertTrue(cache.total_size() <= 2500)
+        cache.close()
+
+    def test_no_size_limit(self):
+        cache = pyreadelf.ResultCache(self.path, None)
+        for i in xrange(3):
+            cache.put(str(i), {"data": os.urandom(1000)})
+        self.assertEqual(cache.db.execute("SELECT COUNT(*) FROM results").fetchone()[0], 3)
+        cache.close()
+
+    def test_scan_files_with_default_cache_size(self):
+        filenames = [fixtures.path("obj.o"), fixtures.path("libfix.so")]
+        for jobs in (1, 2):
+            records = list(pyreadelf.scan_files(filenames, jobs, ordered = True, cache_path = self.path))
+            self.assertEqual([x.get("error") for x in records], [None, None])
+            self.assertEqual(records, list(pyreadelf.scan_files(filenames, 1)))
+
+    def test_worker_setup_errors_are_reported(self):
+        path = os.path.join(self.directory, "missing", "cache.db")
+        for jobs in (1, 2):
+            records = list(pyreadelf.scan_files([fixtures.path("obj.o")], jobs, cache_path = path))
+            self.assertTrue("cannot open the result cache" in records[0]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
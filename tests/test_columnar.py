@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+def records(*names):
+    return list(pyreadelf.scan_files([fixtures.path(x) for x in names], 1, ordered = True))
+
+
+class ColumnarRowsTest(unittest.TestCase):
+
+    def test_rows(self):
+        (record, ) = records("obj.o")
+        rows = list(pyreadelf.columnar_rows(record, 7))
+        widths = dict((table, len(columns)) for (table, columns) in pyreadelf.COLUMNAR_TABLES)
+        self.assertTrue(all(len(row) == widths[table] for (table, row) in rows))
+        self.assertEqual([table for (table, row) in rows].count("sections"), len(record["sections"]))
+        (files, ) = [row for (table, row) in rows if table == "files"]
+        self.assertEqual(files[:3], (7, unicode(fixtures.path("obj.o")), None))
+        self.assertEqual(files[4], pyreadelf.ET_REL)
+        names = [row[1] for (table, row) in rows if table == "symbols"]
+        self.assertTrue(u"obj_add" in names)
+        self.assertTrue(all(isinstance(x, unicode) for x in names))
+
+    def test_error_record(self):
+        rows = list(pyreadelf.columnar_rows({"file": "missing", "error": "no such file"}, 0))
+        self.assertEqual(rows, [("files", (0, u"missing", u"no such file") + (None, ) * 8)])
+
+
+@unittest.skipIf(pyreadelf.pyarrow is None, "pyarrow is not installed")
+class ColumnarExporterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix = "pyreadelf-columnar-")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, True)
+
+    def export(self, format):
+        # A small row group size writes several batches per table
+        exporter = pyreadelf.ColumnarExporter(self.directory, format, row_group_size = 5)
+        scanned = records("obj.o", "libfix.so", "other.o")
+        for record in scanned:
+            exporter.write(record)
+        exporter.write({"file": "removed", "status": "removed"})
+        exporter.close()
+        return scanned
+
+    def read(self, format, table):
+        pyarrow = pyreadelf.pyarrow
+        if format == "parquet":
+            return pyarrow.parquet.read_table(os.path.join(self.directory, table + ".parquet"))
+        return pyarrow.ipc.open_stream(pyarrow.OSFile(os.path.join(self.directory, table + ".arrows"))).read_all()
+
+    def check(self, format):
+        scanned = self.export(format)
+        files = self.read(format, "files").to_pydict()
+        self.assertEqual(files["file_id"], [0, 1, 2])
+        self.assertEqual(files["path"], [x["file"] for x in scanned])
+        symbols = self.read(format, "symbols")
+        self.assertEqual(symbols.num_rows, sum(len(x["symbols"]) for x in scanned))
+        self.assertEqual(symbols.schema.types[symbols.schema.names.index("name")], pyreadelf.pyarrow.string())
+        names = symbols.to_pydict()["name"]
+        self.assertEqual(names, [x["name"] for record in scanned for x in record["symbols"]])
+        self.assertEqual(self.read(format, "sections").num_rows, sum(len(x["sections"]) for x in scanned))
+
+    def test_parquet(self):
+        self.check("parquet")
+
+    def test_arrow_stream(self):
+        self.check("arrow")
+
+
+if __name__ == "__main__":
+    unittest.main()
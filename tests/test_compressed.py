@@ -0,0 +1,81 @@
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+def debug_sections(elf):
+    """Dictionary from .debug_* name (also for .zdebug_* sections) to section header"""
+    sections = {}
+    for sect_header in elf.sect_headers:
+        if sect_header.name.startswith(".zdebug"):
+            sections[".debug" + sect_header.name[len(".zdebug"):]] = sect_header
+        elif sect_header.name.startswith(".debug"):
+            sections[sect_header.name] = sect_header
+    return sections
+
+
+class CompressedSectionTest(unittest.TestCase):
+
+    def setUp(self):
+        pyreadelf.decompressed_sections.clear()
+        self.elf = pyreadelf.read_elf(fixtures.path("obj.o"))
+        self.expected = dict((name, x.contents) for (name, x) in debug_sections(self.elf).iteritems())
+
+    def tearDown(self):
+        self.elf.close()
+
+    def check(self, name, compression):
+        with pyreadelf.read_elf(fixtures.path(name)) as elf:
+            sections = debug_sections(elf)
+            self.assertEqual(sorted(sections), sorted(self.expected))
+            compressed = [x for x in sections.values() if not x.compression is None]
+            self.assertTrue(compressed)
+            self.assertEqual(set(x.compression[0] for x in compressed), set([compression]))
+            for (name, sect_header) in sections.iteritems():
+                self.assertEqual(sect_header.contents, self.expected[name])
+                self.assertEqual("".join(sect_header.iter_contents(64)), self.expected[name])
+
+    def test_shf_compressed(self):
+        self.check("obj_zlib.o", pyreadelf.ELFCOMPRESS_ZLIB)
+
+    def test_zdebug(self):
+        self.check("obj_zdebug.o", pyreadelf.ZDEBUG_MAGIC)
+
+    def test_section_data(self):
+        with pyreadelf.read_elf(fixtures.path("obj_zlib.o")) as elf:
+            sections = dict((x["name"], x) for x in pyreadelf.elf_to_data(elf)["sections"])
+        compression = sections[".debug_info"]["compression"]
+        self.assertEqual(compression["type"]["description"], "ZLIB")
+        self.assertEqual(compression["uncompressed_size"], len(self.expected[".debug_info"]))
+        self.assertFalse("compression" in sections[".text"])
+
+    def test_contents_are_cached(self):
+        with pyreadelf.read_elf(fixtures.path("obj_zlib.o")) as elf:
+            sect_header = debug_sections(elf)[".debug_info"]
+            contents = sect_header.contents
+            self.assertTrue(pyreadelf.decompressed_sections.get((elf.identity, sect_header.index)) is contents)
+            self.assertTrue(sect_header.contents is contents)
+
+
+class SectionCacheTest(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = pyreadelf.SectionCache(10)
+        cache.put("a", "x" * 4)
+        cache.put("b", "y" * 4)
+        self.assertEqual(cache.get("a"), "x" * 4)
+        cache.put("c", "z" * 4)
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.get("a"), "x" * 4)
+        self.assertEqual(cache.size, 8)
+
+    def test_too_big(self):
+        cache = pyreadelf.SectionCache(10)
+        cache.put("a", "x" * 11)
+        self.assertEqual(cache.get("a"), None)
+        self.assertEqual(cache.size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
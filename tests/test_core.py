@@ -0,0 +1,57 @@
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class ElfCoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.core = pyreadelf.read_elf(fixtures.core_file())
+
+    def tearDown(self):
+        self.core.close()
+
+    def test_read_elf_returns_a_core(self):
+        self.assertTrue(isinstance(self.core, pyreadelf.ElfCore))
+        self.assertRaises(Exception, pyreadelf.ElfCore, fixtures.path("obj.o"))
+
+    def test_notes(self):
+        notes = self.core.core_notes
+        self.assertEqual(notes["threads"][0]["signal"], 11)
+        self.assertTrue(notes["threads"][0]["pid"] > 0)
+        if self.core.header.machine == pyreadelf.EM_X86_64:
+            self.assertTrue("rip" in [x["name"] for x in notes["threads"][0]["registers"]])
+        self.assertTrue(notes["mapped_files"])
+        self.assertTrue(all(x["path"].startswith("/") for x in notes["mapped_files"]))
+        self.assertTrue(all(x["start"] < x["end"] for x in notes["mapped_files"]))
+
+    def test_read_memory(self):
+        segments = [x for x in self.core.prog_headers if x.type == pyreadelf.PT_LOAD and x.filesz >= 16]
+        for segment in segments:
+            self.assertEqual(str(self.core.read_memory(segment.vaddr, 16)), self.core.read(segment.offset, 16))
+        # The vDSO is always dumped and starts with an ELF header
+        auxv = dict((x["type"]["value"], x["value"]) for x in self.core.core_notes["auxv_entries"])
+        self.assertEqual(str(self.core.read_memory(auxv[pyreadelf.AT_SYSINFO_EHDR], 4)), "\x7fELF")
+
+    def test_read_memory_outside_the_segments(self):
+        segments = sorted((x for x in self.core.prog_headers if x.type == pyreadelf.PT_LOAD), key = lambda x: x.vaddr)
+        self.assertRaises(Exception, self.core.read_memory, segments[0].vaddr - 1, 1)
+        last = segments[-1]
+        self.assertRaises(Exception, self.core.read_memory, last.vaddr + last.memsz - 1, 2)
+
+    def test_not_dumped_memory_reads_as_zeros(self):
+        segments = [x for x in self.core.prog_headers if x.type == pyreadelf.PT_LOAD and x.filesz < x.memsz]
+        if not segments:
+            self.skipTest("every segment of the core was dumped")
+        segment = segments[0]
+        self.assertEqual(self.core.read_memory(segment.vaddr + segment.filesz, 8), "\0" * 8)
+
+    def test_elf_to_data(self):
+        data = pyreadelf.elf_to_data(self.core)
+        self.assertEqual(data["core"]["threads"][0]["signal"], 11)
+        self.assertFalse("core" in pyreadelf.elf_to_data(self.core, tables = ["header"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
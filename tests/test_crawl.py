@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class CrawlTest(unittest.TestCase):
+
+    def setUp(self):
+        self.top = tempfile.mkdtemp(prefix = "pyreadelf-crawl-")
+        os.makedirs(os.path.join(self.top, "lib", "sub"))
+        os.makedirs(os.path.join(self.top, "other"))
+        shutil.copy(fixtures.path("libfix.so"), os.path.join(self.top, "lib", "libfix.so"))
+        shutil.copy(fixtures.path("obj.o"), os.path.join(self.top, "lib", "sub", "obj.o"))
+        shutil.copy(fixtures.data("obj.c"), os.path.join(self.top, "lib", "obj.c"))
+        shutil.copy(fixtures.path("app"), os.path.join(self.top, "other", "app"))
+        os.link(os.path.join(self.top, "other", "app"), os.path.join(self.top, "other", "app.hardlink"))
+        os.symlink(os.path.join(self.top, "lib"), os.path.join(self.top, "other", "lib.link"))
+        os.symlink(os.path.join(self.top, "missing"), os.path.join(self.top, "other", "dangling"))
+
+    def tearDown(self):
+        shutil.rmtree(self.top, True)
+
+    def crawl(self, *args, **kwargs):
+        return sorted(os.path.relpath(x, self.top) for x in pyreadelf.crawl([self.top] + list(args), **kwargs))
+
+    def test_finds_elf_files_once(self):
+        found = self.crawl()
+        self.assertEqual(found[:2], ["lib/libfix.so", "lib/sub/obj.o"])
+        self.assertEqual(len(found), 3)
+        self.assertTrue(found[2] in ("other/app", "other/app.hardlink"))
+
+    def test_follow_symlinks_visits_directories_once(self):
+        self.assertEqual(len(self.crawl(follow_symlinks = True)), 3)
+
+    def test_include_and_exclude(self):
+        self.assertEqual(self.crawl(include = ["*.so"]), ["lib/libfix.so"])
+        self.assertEqual(self.crawl(exclude = ["sub", "other"]), ["lib/libfix.so"])
+        self.assertEqual(self.crawl(exclude = [os.path.join(self.top, "lib", "*")])[0][:5], "other")
+
+    def test_files_given_directly_are_always_yielded(self):
+        self.assertEqual(list(pyreadelf.crawl([fixtures.data("obj.c")])), [fixtures.data("obj.c")])
+
+    def test_background(self):
+        self.assertEqual(sorted(pyreadelf.crawl_in_background([self.top], queue_size = 1)), sorted(pyreadelf.crawl([self.top])))
+
+    def test_is_elf_file(self):
+        self.assertTrue(pyreadelf.is_elf_file(fixtures.path("obj.o")))
+        self.assertFalse(pyreadelf.is_elf_file(fixtures.data("obj.c")))
+        self.assertFalse(pyreadelf.is_elf_file(os.path.join(self.top, "missing")))
+
+
+if __name__ == "__main__":
+    unittest.main()
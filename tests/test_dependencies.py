@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class DependencyResolverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sysroot = tempfile.mkdtemp(prefix = "pyreadelf-sysroot-")
+        os.rmdir(self.sysroot)
+        shutil.copytree(fixtures.path("sysroot"), self.sysroot, symlinks = True)
+
+    def tearDown(self):
+        shutil.rmtree(self.sysroot, True)
+
+    def move_libbase(self, directory):
+        os.makedirs(os.path.join(self.sysroot, directory))
+        os.rename(os.path.join(self.sysroot, "usr/lib/libbase.so"), os.path.join(self.sysroot, directory, "libbase.so"))
+
+    def write(self, path, text):
+        path = os.path.join(self.sysroot, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        f = open(path, "w")
+        f.write(text)
+        f.close()
+
+    def paths(self, resolver, path = "/opt/app/bin/app"):
+        return [(x["name"], x["needed_by"], x.get("path")) for x in resolver.resolve(path)]
+
+    def test_closure(self):
+        resolver = pyreadelf.DependencyResolver(self.sysroot)
+        self.assertEqual(self.paths(resolver), [
+            ("libfix.so.1", "/opt/app/bin/app", "/opt/app/lib/libfix.so.1"),
+            ("libbase.so", "/opt/app/lib/libfix.so.1", "/usr/lib/libbase.so")])
+
+    def test_missing_library(self):
+        os.remove(os.path.join(self.sysroot, "usr/lib/libbase.so"))
+        libraries = pyreadelf.DependencyResolver(self.sysroot).resolve("/opt/app/bin/app")
+        self.assertEqual([x["found"] for x in libraries], [True, False])
+        self.assertFalse("path" in libraries[1])
+
+    def test_library_path(self):
+        self.move_libbase("other")
+        resolver = pyreadelf.DependencyResolver(self.sysroot, ["/other"])
+        self.assertEqual(self.paths(resolver)[1][2], "/other/libbase.so")
+
+    def test_ld_so_conf(self):
+        self.move_libbase("other")
+        self.write("etc/ld.so.conf", "include ld.so.conf.d/*.conf\n")
+        self.write("etc/ld.so.conf.d/other.conf", "# comment\n/other\n")
+        self.assertEqual(self.paths(pyreadelf.DependencyResolver(self.sysroot))[1][2], "/other/libbase.so")
+
+    def test_symbolic_links_stay_in_the_sysroot(self):
+        os.rename(os.path.join(self.sysroot, "usr/lib/libbase.so"), os.path.join(self.sysroot, "usr/lib/libbase.so.1"))
+        os.symlink("/usr/lib/libbase.so.1", os.path.join(self.sysroot, "usr/lib/libbase.so"))
+        resolver = pyreadelf.DependencyResolver(self.sysroot)
+        self.assertEqual(self.paths(resolver)[1][2], "/usr/lib/libbase.so")
+        self.assertEqual(resolver.canonical_path("/usr/lib/libbase.so"), "/usr/lib/libbase.so.1")
+        self.assertEqual(resolver.canonical_path("/../../usr/./lib"), "/usr/lib")
+
+    def test_libraries_are_parsed_once(self):
+        parsed = []
+        dynamic_info = pyreadelf.DynamicInfo
+        def counting_info(elf):
+            parsed.append(elf.filename)
+            return dynamic_info(elf)
+        pyreadelf.DynamicInfo = counting_info
+        try:
+            resolver = pyreadelf.DependencyResolver(self.sysroot)
+            first = resolver.resolve("/opt/app/bin/app")
+            count = len(parsed)
+            self.assertEqual(resolver.resolve("/opt/app/bin/app"), first)
+            resolver.resolve("/opt/app/lib/libfix.so.1")
+        finally:
+            pyreadelf.DynamicInfo = dynamic_info
+        self.assertEqual(len(parsed), count)
+        self.assertEqual(len(parsed), len(set(parsed)))
+
+    def test_not_an_elf_file(self):
+        self.write("etc/ld.so.conf", "/lib\n")
+        self.assertRaises(Exception, pyreadelf.DependencyResolver(self.sysroot).resolve, "/etc/ld.so.conf")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import shutil
+import StringIO
+import sys
+import tempfile
+import unittest
+import xml.dom.minidom
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class DiffElfTest(unittest.TestCase):
+
+    def diff(self, old, new, symbols = True):
+        with pyreadelf.read_elf(fixtures.path(old)) as old_elf:
+            with pyreadelf.read_elf(fixtures.path(new)) as new_elf:
+                return pyreadelf.diff_elf(old_elf, new_elf, symbols)
+
+    def test_identical_files(self):
+        self.assertEqual(self.diff("obj.o", "obj.o"), {"header_fields": [], "segments": [], "sections": [], "symbols": []})
+
+    def test_symbols(self):
+        changes = dict((x["name"], x) for x in self.diff("obj.o", "obj_changed.o")["symbols"])
+        self.assertEqual(sorted(changes), ["obj_mul", "obj_new", "obj_old"])
+        self.assertEqual(changes["obj_new"]["change"], "added")
+        self.assertEqual(changes["obj_old"]["change"], "removed")
+        self.assertEqual(changes["obj_mul"]["change"], "resized")
+        self.assertTrue(changes["obj_mul"]["new"] > changes["obj_mul"]["old"])
+
+    def test_sections(self):
+        changes = dict((x["name"], x) for x in self.diff("obj.o", "obj_changed.o")["sections"])
+        self.assertEqual(changes[".text"]["change"], "changed")
+        self.assertTrue("size" in [x["field"] for x in changes[".text"]["fields"]])
+        self.assertFalse(".data" in changes)
+
+    def test_without_symbols(self):
+        self.assertEqual(self.diff("obj.o", "obj_changed.o", False)["symbols"], [])
+
+
+class CommandLineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix = "pyreadelf-cli-")
+        self.output = os.path.join(self.directory, "out.xml")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, True)
+
+    def run_main(self, *argv):
+        pyreadelf.main(pyreadelf.parse_args(list(argv) + ["-o", self.output]))
+        return xml.dom.minidom.parse(self.output).documentElement
+
+    def test_read_is_the_default_command(self):
+        self.assertEqual(pyreadelf.parse_args(["a.o"]).command, "read")
+        self.assertEqual(pyreadelf.parse_args(["-j", "2", "a.o", "b.o"]).elffile, ["a.o", "b.o"])
+
+    def test_file_named_like_a_command(self):
+        args = pyreadelf.parse_args(["read", "diff"])
+        self.assertEqual((args.command, args.elffile), ("read", ["diff"]))
+        self.assertEqual(pyreadelf.parse_args(["diff", "a", "b"]).command, "diff")
+
+    def test_common_options(self):
+        for argv in (["a.o"], ["diff", "a", "b"], ["ldd", "a"], ["symbol-index", "db"], ["build-id", "db"]):
+            args = pyreadelf.parse_args(argv + ["-o", "out.xml", "--indent", "0"])
+            self.assertEqual((args.output, args.indent), ("out.xml", 0))
+
+    def test_ordered_with_concurrency(self):
+        (stderr, sys.stderr) = (sys.stderr, StringIO.StringIO())
+        try:
+            self.assertRaises(SystemExit, pyreadelf.parse_args, ["--ordered", "--concurrency", "4", "a.o", "b.o"])
+        finally:
+            sys.stderr = stderr
+
+    def test_read_output(self):
+        root = self.run_main(fixtures.path("obj.o"))
+        self.assertEqual(root.tagName, "readelf")
+        root = self.run_main(fixtures.path("obj.o"), fixtures.path("other.o"), "-j", "1", "--indent", "0")
+        self.assertEqual([x.tagName for x in root.childNodes], ["readelf", "readelf"])
+
+    def test_diff_output(self):
+        root = self.run_main("diff", fixtures.path("obj.o"), fixtures.path("obj_changed.o"))
+        self.assertEqual(root.tagName, "elfdiff")
+        names = [x.firstChild.data for x in root.getElementsByTagName("name")]
+        self.assertTrue("obj_new" in names)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import re
+import shutil
+import struct
+import tempfile
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+def readelf_dynamic(filename):
+    """(tag, value) pairs of readelf -d, without the terminating DT_NULL"""
+    entries = []
+    for line in fixtures.readelf("-d", filename).splitlines():
+        match = re.match(r"\s*0x([0-9a-f]+) \((\w+)\)", line)
+        if match and int(match.group(1), 16) != pyreadelf.DT_NULL:
+            entries.append((int(match.group(1), 16), match.group(2)))
+    return entries
+
+
+class DynamicSectionTest(unittest.TestCase):
+
+    def test_matches_readelf(self):
+        for name in ("libfix.so", "app"):
+            with pyreadelf.read_elf(fixtures.path(name)) as elf:
+                self.assertEqual([(x.tag, pyreadelf.dynamic_tag(x.tag)) for x in elf.dynamic],
+                    readelf_dynamic(fixtures.path(name)))
+
+    def test_strings(self):
+        with pyreadelf.read_elf(fixtures.path("libfix.so")) as elf:
+            self.assertEqual(elf.dynamic_strings(pyreadelf.DT_SONAME), ["libfix.so.1"])
+            self.assertEqual(elf.dynamic_strings(pyreadelf.DT_NEEDED), ["libbase.so"])
+        with pyreadelf.read_elf(fixtures.path("app")) as elf:
+            self.assertEqual(elf.dynamic_strings(pyreadelf.DT_NEEDED), ["libfix.so.1"])
+            self.assertEqual(elf.dynamic_strings(pyreadelf.DT_RUNPATH), ["$ORIGIN/../lib"])
+            self.assertEqual([x.string for x in elf.dynamic if x.tag == pyreadelf.DT_STRTAB], [None])
+
+    def test_without_section_headers(self):
+        directory = tempfile.mkdtemp(prefix = "pyreadelf-dynamic-")
+        try:
+            filename = os.path.join(directory, "app")
+            shutil.copy(fixtures.path("app"), filename)
+            # Clear e_shoff, e_shnum and e_shstrndx of the ELF64 header
+            with open(filename, "r+b") as f:
+                f.seek(0x28)
+                f.write(struct.pack("<Q", 0))
+                f.seek(0x3c)
+                f.write(struct.pack("<HH", 0, 0))
+            with pyreadelf.read_elf(filename) as elf:
+                self.assertEqual(elf.sect_headers, [])
+                self.assertEqual(elf.dynamic_strings(pyreadelf.DT_NEEDED), ["libfix.so.1"])
+                self.assertEqual(elf.dynamic_strings(pyreadelf.DT_RUNPATH), ["$ORIGIN/../lib"])
+        finally:
+            shutil.rmtree(directory, True)
+
+    def test_elf_to_data(self):
+        with pyreadelf.read_elf(fixtures.path("app")) as elf:
+            entries = list(pyreadelf.elf_to_data(elf)["dynamic_entries"])
+            self.assertEqual(entries[0]["tag"], {"value": pyreadelf.DT_NEEDED, "description": "NEEDED"})
+            self.assertEqual(entries[0]["string"], "libfix.so.1")
+            self.assertFalse("string" in entries[2])
+            self.assertFalse("dynamic_entries" in pyreadelf.elf_to_data(elf, tables = ["header"]))
+
+    def test_object_file_has_no_dynamic_section(self):
+        with pyreadelf.read_elf(fixtures.path("obj.o")) as elf:
+            self.assertEqual(elf.dynamic, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import re
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class ElfFileTest(unittest.TestCase):
+
+    def test_header(self):
+        with pyreadelf.ElfFile(fixtures.path("libfix.so")) as elf:
+            self.assertEqual(elf.header.elfclass, pyreadelf.ELFCLASS64)
+            self.assertEqual(elf.header.type, pyreadelf.ET_DYN)
+            self.assertEqual(elf.header.machine, pyreadelf.EM_X86_64)
+            self.assertEqual(elf.endianness, pyreadelf.ELFDATA2LSB)
+
+    def test_sections_match_readelf(self):
+        output = fixtures.readelf("-S", fixtures.path("libfix.so"))
+        expected = [(int(index), name, int(address, 16), int(offset, 16), int(size, 16)) for (index, name, address, offset, size)
+            in re.findall(r"\[\s*(\d+)\] (\S+)\s+\S+\s+([0-9a-f]+) ([0-9a-f]+) ([0-9a-f]+)", output)]
+        with pyreadelf.ElfFile(fixtures.path("libfix.so")) as elf:
+            self.assertEqual([(x.index, x.name, x.addr, x.offset, x.size) for x in elf.sect_headers[1:]], expected)
+
+    def test_program_headers_match_readelf(self):
+        output = fixtures.readelf("-l", fixtures.path("app"))
+        expected = [(int(offset, 16), int(vaddr, 16), int(filesz, 16), int(memsz, 16)) for (offset, vaddr, filesz, memsz)
+            in re.findall(r"^\s+[A-Z_]+\s+0x([0-9a-f]+) 0x([0-9a-f]+) 0x[0-9a-f]+ 0x([0-9a-f]+) 0x([0-9a-f]+)", output, re.M)]
+        with pyreadelf.ElfFile(fixtures.path("app")) as elf:
+            self.assertEqual([(x.offset, x.vaddr, x.filesz, x.memsz) for x in elf.prog_headers], expected)
+
+    def test_symbols(self):
+        with pyreadelf.ElfFile(fixtures.path("obj.o")) as elf:
+            (symtab, ) = [x for x in elf.sect_headers if x.type == pyreadelf.SHT_SYMTAB]
+            symbols = dict((x.name, x) for x in elf.read_symbols(symtab))
+        self.assertEqual(symbols["obj_add"].type, pyreadelf.STT_FUNC)
+        self.assertEqual(symbols["obj_add"].bind, pyreadelf.STB_GLOBAL)
+        self.assertEqual(symbols["obj_data"].type, pyreadelf.STT_OBJECT)
+        self.assertEqual(symbols["obj_data"].size, 16)
+        self.assertEqual(symbols["obj_counter"].bind, pyreadelf.STB_LOCAL)
+
+    def test_rejects_non_elf_files(self):
+        self.assertRaises(Exception, pyreadelf.ElfFile, fixtures.data("obj.c"))
+
+    def test_close(self):
+        elf = pyreadelf.ElfFile(fixtures.path("obj.o"))
+        elf.close()
+        self.assertEqual(elf.map, None)
+        elf.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class LazySequenceTest(unittest.TestCase):
+
+    def test_items_are_converted_on_access(self):
+        converted = []
+        def getitem(index):
+            converted.append(index)
+            return index * 10
+        sequence = pyreadelf.LazySequence(5, getitem)
+        self.assertEqual(len(sequence), 5)
+        self.assertEqual(converted, [])
+        self.assertEqual(sequence[3], 30)
+        self.assertEqual(sequence[-1], 40)
+        self.assertEqual(sequence[1:3], [10, 20])
+        self.assertEqual(converted, [3, 4, 1, 2])
+        self.assertEqual(list(sequence), [0, 10, 20, 30, 40])
+
+    def test_index_out_of_range(self):
+        sequence = pyreadelf.LazySequence(2, lambda i: i)
+        self.assertRaises(IndexError, lambda: sequence[2])
+        self.assertRaises(IndexError, lambda: sequence[-3])
+
+
+class ElfToDataTest(unittest.TestCase):
+
+    def test_views_match_eager_conversion(self):
+        with pyreadelf.read_elf(fixtures.path("libfix.so")) as elf:
+            data = pyreadelf.elf_to_data(elf)
+            self.assertTrue(isinstance(data["sections"], pyreadelf.LazySequence))
+            self.assertEqual(list(data["sections"]), [pyreadelf.section_to_data(elf, x) for x in elf.sect_headers])
+            self.assertEqual(list(data["program_headers"]),
+                [pyreadelf.program_header_to_data(elf, x) for x in elf.prog_headers])
+            names = [x["name"] for x in data["symbols"]]
+        self.assertTrue("fix_add" in names)
+        self.assertTrue("fix_hidden" in names)
+
+    def test_materialize(self):
+        with pyreadelf.read_elf(fixtures.path("obj.o")) as elf:
+            data = pyreadelf.materialize(pyreadelf.elf_to_data(elf))
+        self.assertTrue(isinstance(data["sections"], list))
+        self.assertEqual(data["sections"][1]["name"], ".text")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class LookupSymbolTest(unittest.TestCase):
+
+    def lookup(self, filename, name):
+        with pyreadelf.ElfFile(fixtures.path(filename)) as elf:
+            symbol = elf.lookup_symbol(name)
+            if symbol is None:
+                return None
+            return (symbol.name, symbol.value, symbol.size)
+
+    def test_hash_tables(self):
+        types = {}
+        for filename in ("libfix.so", "libfix_sysv.so"):
+            with pyreadelf.ElfFile(fixtures.path(filename)) as elf:
+                types[filename] = [x.type for x in elf.sect_headers if x.type in (pyreadelf.SHT_GNU_HASH, pyreadelf.SHT_HASH)]
+        self.assertEqual(types, {"libfix.so": [pyreadelf.SHT_GNU_HASH], "libfix_sysv.so": [pyreadelf.SHT_HASH]})
+
+    def test_defined_symbols(self):
+        for filename in ("libfix.so", "libfix_sysv.so"):
+            with pyreadelf.ElfFile(fixtures.path(filename)) as elf:
+                (dynsym, ) = [x for x in elf.sect_headers if x.type == pyreadelf.SHT_DYNSYM]
+                expected = dict((x.name, (x.name, x.value, x.size)) for x in elf.read_symbols(dynsym))
+            for name in ("fix_add", "fix_counter", "fix_ghost", "fix_pointer"):
+                self.assertEqual(self.lookup(filename, name), expected[name])
+            self.assertEqual(self.lookup(filename, "fix_hidden"), None)
+            self.assertEqual(self.lookup(filename, "no_such_symbol"), None)
+
+    def test_undefined_symbols_are_not_returned(self):
+        for filename in ("libfix.so", "libfix_sysv.so", "app"):
+            self.assertEqual(self.lookup(filename, "ghost_func"), None)
+            self.assertEqual(self.lookup(filename, "base_value"), None)
+
+    def test_without_hash_table(self):
+        with pyreadelf.ElfFile(fixtures.path("libfix_sysv.so")) as elf:
+            for x in elf.sect_headers:
+                if x.type == pyreadelf.SHT_HASH:
+                    x.type = pyreadelf.SHT_PROGBITS
+            self.assertEqual(elf.lookup_symbol("fix_add").name, "fix_add")
+            self.assertEqual(elf.lookup_symbol("ghost_func"), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
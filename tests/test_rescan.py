@@ -0,0 +1,84 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class RescanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix = "pyreadelf-rescan-")
+        self.manifest = os.path.join(self.directory, "manifest.db")
+        self.files = dict((name, os.path.join(self.directory, name)) for name in ("obj.o", "libfix.so", "broken"))
+        shutil.copy(fixtures.path("obj.o"), self.files["obj.o"])
+        shutil.copy(fixtures.path("libfix.so"), self.files["libfix.so"])
+        open(self.files["broken"], "wb").write(open(fixtures.path("app"), "rb").read(100))
+        self.parsed = []
+        self.scan_files = pyreadelf.scan_files
+        def scan_files(filenames, *args, **kwargs):
+            self.parsed.extend(filenames)
+            return self.scan_files(filenames, *args, **kwargs)
+        pyreadelf.scan_files = scan_files
+
+    def tearDown(self):
+        pyreadelf.scan_files = self.scan_files
+        shutil.rmtree(self.directory, True)
+
+    def rescan(self, filenames = None):
+        self.parsed = []
+        records = pyreadelf.rescan(sorted(filenames or self.files.values()), self.manifest, jobs = 1)
+        return dict((os.path.basename(x["file"]), x) for x in records)
+
+    def test_statuses(self):
+        records = self.rescan()
+        self.assertEqual(set(x["status"] for x in records.values()), set(["added"]))
+        self.assertTrue("error" in records["broken"])
+        self.assertFalse("error" in records["obj.o"])
+
+        records = self.rescan()
+        self.assertEqual(set(x["status"] for x in records.values()), set(["unchanged"]))
+        self.assertEqual(self.parsed, [])
+        self.assertTrue("error" in records["broken"])
+
+        shutil.copy(fixtures.path("obj_changed.o"), self.files["obj.o"])
+        os.utime(self.files["obj.o"], (time.time() + 10, time.time() + 10))
+        records = self.rescan([self.files["obj.o"], self.files["broken"]])
+        self.assertEqual(records["obj.o"]["status"], "changed")
+        self.assertEqual(records["libfix.so"], {"file": self.files["libfix.so"], "status": "removed"})
+        self.assertEqual(self.parsed, [self.files["obj.o"]])
+
+    def test_evicted_results_are_parsed_again_as_unchanged(self):
+        first = self.rescan()
+        db = sqlite3.connect(self.manifest)
+        db.execute("DELETE FROM results")
+        db.commit()
+        db.close()
+        records = self.rescan()
+        self.assertEqual(sorted(self.parsed), sorted([self.files["obj.o"], self.files["libfix.so"]]))
+        self.assertEqual(set(x["status"] for x in records.values()), set(["unchanged"]))
+        self.assertEqual(records["obj.o"]["header"], first["obj.o"]["header"])
+
+    def test_errors_are_kept_per_options(self):
+        self.rescan()
+        self.parsed = []
+        list(pyreadelf.rescan([self.files["broken"]], self.manifest, jobs = 1, options = {"tables": ["header"]}))
+        self.assertEqual(self.parsed, [self.files["broken"]])
+
+    def test_old_manifest_layout(self):
+        db = sqlite3.connect(self.manifest)
+        db.execute("CREATE TABLE manifest (path TEXT PRIMARY KEY, device INTEGER, inode INTEGER, size INTEGER, mtime REAL, hash TEXT)")
+        db.execute("INSERT INTO manifest VALUES ('x', 1, 2, 3, 4.0, 'h')")
+        db.commit()
+        db.close()
+        manifest = pyreadelf.Manifest(self.manifest)
+        self.assertEqual(manifest.entries(), {"x": (1, 2, 3, 4.0, "h", None, None)})
+        manifest.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class ScanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix = "pyreadelf-scan-")
+        self.cache_path = os.path.join(self.directory, "cache.db")
+        self.filenames = [fixtures.path(x) for x in ("obj.o", "libfix.so", "app", "other.o", "libbase.so")]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, True)
+
+    def by_file(self, records):
+        return dict((x["file"], x) for x in records)
+
+    def test_matches_scan_files(self):
+        expected = self.by_file(pyreadelf.scan_files(self.filenames, jobs = 1))
+        for jobs in (1, 2):
+            records = list(pyreadelf.scan(self.filenames, concurrency = 3, jobs = jobs))
+            self.assertEqual(len(records), len(self.filenames))
+            self.assertEqual(self.by_file(records), expected)
+
+    def test_cache_in_reader_threads(self):
+        expected = self.by_file(pyreadelf.scan_files(self.filenames, jobs = 1))
+        for i in xrange(2):
+            records = self.by_file(pyreadelf.scan(self.filenames, concurrency = 3, jobs = 1, cache_path = self.cache_path))
+            self.assertEqual(records, expected)
+
+    def test_triage_uses_the_prefix(self):
+        records = self.by_file(pyreadelf.scan(self.filenames, concurrency = 2, jobs = 1, triage = True))
+        for filename in self.filenames:
+            self.assertEqual(records[filename], dict(pyreadelf.triage_file(filename), file = filename))
+
+    def test_reads_in_flight_exceed_jobs(self):
+        state = {"active": 0, "peak": 0}
+        lock = threading.Lock()
+        prefetch_file = pyreadelf.prefetch_file
+        def slow_prefetch(filename):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.2)
+            prefetch_file(filename)
+            with lock:
+                state["active"] -= 1
+        pyreadelf.prefetch_file = slow_prefetch
+        try:
+            records = list(pyreadelf.scan(self.filenames, concurrency = 5, jobs = 2))
+        finally:
+            pyreadelf.prefetch_file = prefetch_file
+        self.assertEqual(len(records), len(self.filenames))
+        self.assertTrue(state["peak"] > 2)
+
+    def test_missing_files(self):
+        missing = os.path.join(self.directory, "missing")
+        for triage in (False, True):
+            (record, ) = pyreadelf.scan([missing], concurrency = 2, jobs = 1, triage = triage)
+            self.assertEqual(record["file"], missing)
+            self.assertTrue("error" in record)
+
+    def test_ordered_is_rejected_with_concurrency(self):
+        stderr = os.dup(2)
+        os.dup2(os.open(os.devnull, os.O_WRONLY), 2)
+        try:
+            self.assertRaises(SystemExit, pyreadelf.parse_args, ["--ordered", "--concurrency", "8", "x"])
+        finally:
+            os.dup2(stderr, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class SelectiveParsingTest(unittest.TestCase):
+
+    def test_only_requested_tables_are_read(self):
+        with pyreadelf.read_elf(fixtures.path("libfix.so")) as elf:
+            data = pyreadelf.elf_to_data(elf, tables = ["header"])
+            self.assertEqual(sorted(data), ["header"])
+            self.assertEqual(elf._sect_headers, None)
+            self.assertEqual(elf._prog_headers, None)
+
+    def test_all_tables_by_default(self):
+        with pyreadelf.read_elf(fixtures.path("libfix.so")) as elf:
+            data = pyreadelf.elf_to_data(elf)
+        self.assertEqual(sorted(data), sorted(x for x in pyreadelf.ELF_DATA_TABLES if x != "core"))
+
+    def test_command_line_flags(self):
+        args = pyreadelf.parse_args(["--no-symbols", "--no-dynamic", "x"])
+        self.assertEqual(args.skip_tables, ["symbols", "dynamic_entries"])
+        self.assertEqual(pyreadelf.parse_args(["--only", "header,sections", "x"]).only, "header,sections")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class SqliteExporterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix = "pyreadelf-sqlite-")
+        self.path = os.path.join(self.directory, "scan.db")
+        self.records = list(pyreadelf.scan_files([fixtures.path(x) for x in ("obj.o", "app", "libfix.so")], 1, ordered = True))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, True)
+
+    def export(self, records, **kwargs):
+        exporter = pyreadelf.SqliteExporter(self.path, **kwargs)
+        ids = [exporter.write(x) for x in records]
+        exporter.close()
+        return ids
+
+    def query(self, sql, *parameters):
+        db = sqlite3.connect(self.path)
+        db.text_factory = str
+        try:
+            return db.execute(sql, parameters).fetchall()
+        finally:
+            db.close()
+
+    def test_tables(self):
+        self.assertEqual(self.export(self.records, batch_size = 7, commit_size = 20), [1, 2, 3])
+        self.assertEqual(self.query("SELECT id, path FROM files ORDER BY id"), [(i + 1, x["file"]) for (i, x) in enumerate(self.records)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM sections WHERE file = 1")[0][0], len(self.records[0]["sections"]))
+        self.assertEqual(self.query("SELECT COUNT(*) FROM symbols")[0][0], sum(len(x["symbols"]) for x in self.records))
+        self.assertEqual(self.query("SELECT file, name FROM needed_libs ORDER BY file"), [(2, "libfix.so.1"), (3, "libbase.so")])
+        self.assertEqual(self.query("SELECT type FROM files WHERE id = 3"), [(pyreadelf.ET_DYN, )])
+        self.assertEqual(os.listdir(self.directory), ["scan.db"])
+
+    def test_duplicate_paths(self):
+        self.assertEqual(self.export(self.records + self.records[:1]), [1, 2, 3, 1])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM files")[0][0], 3)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM sections WHERE file = 1")[0][0], len(self.records[0]["sections"]))
+
+    def test_removed_and_error_records(self):
+        ids = self.export([{"file": "gone", "status": "removed"}, {"file": "broken", "error": "not an ELF file"}])
+        self.assertEqual(ids, [None, 1])
+        self.assertEqual(self.query("SELECT path, error, type FROM files"), [("broken", "not an ELF file", None)])
+
+    def test_abort_keeps_the_previous_database(self):
+        self.export(self.records[:1])
+        exporter = pyreadelf.SqliteExporter(self.path, batch_size = 1, commit_size = 1)
+        for record in self.records:
+            exporter.write(record)
+        exporter.abort()
+        self.assertEqual(self.query("SELECT path FROM files"), [(self.records[0]["file"], )])
+        self.assertEqual(os.listdir(self.directory), ["scan.db"])
+
+    def test_replaces_the_previous_database(self):
+        self.export(self.records)
+        self.export(self.records[1:2])
+        self.assertEqual(self.query("SELECT id, path FROM files"), [(1, self.records[1]["file"])])
+
+    def test_previous_database_is_never_missing(self):
+        self.export(self.records[:1])
+        open(self.path + "-wal", "w").close()
+        removed = []
+        remove = os.remove
+        def recording_remove(name):
+            removed.append(name)
+            remove(name)
+        os.remove = recording_remove
+        try:
+            self.export(self.records[1:2])
+        finally:
+            os.remove = remove
+        self.assertFalse(self.path in removed)
+        self.assertTrue(self.path + "-wal" in removed)
+        self.assertEqual(self.query("SELECT path FROM files"), [(self.records[1]["file"], )])
+
+    def test_large_values(self):
+        self.assertEqual(pyreadelf.sqlite_integer(0xffffffffffffffff), -1)
+        self.assertEqual(pyreadelf.sqlite_integer(0x7fffffffffffffff), 0x7fffffffffffffff)
+        self.assertEqual(pyreadelf.sqlite_integer(None), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+@unittest.skipIf(pyreadelf.numpy is None, "NumPy is not installed")
+class SymbolArrayTest(unittest.TestCase):
+
+    def test_vectorized_matches_scalar_decoding(self):
+        for name in ("obj.o", "libfix.so", "app"):
+            with pyreadelf.read_elf(fixtures.path(name)) as elf:
+                scalar = list(pyreadelf.elf_to_data(elf)["symbols"])
+                vectorized = pyreadelf.elf_to_data(elf, vectorized = True)["symbols"]
+                self.assertTrue(isinstance(vectorized, pyreadelf.SymbolArrayView))
+                self.assertEqual(list(vectorized), scalar)
+
+    def test_array_columns(self):
+        with pyreadelf.read_elf(fixtures.path("obj.o")) as elf:
+            array = pyreadelf.symbol_array(elf)
+            (symtab, ) = [x for x in elf.sect_headers if x.type == pyreadelf.SHT_SYMTAB]
+            symbols = elf.read_symbols(symtab)
+        self.assertEqual(len(array), len(symbols))
+        self.assertEqual(list(array["value"]), [x.value for x in symbols])
+        self.assertEqual(list(array["bind"]), [x.bind for x in symbols])
+        self.assertEqual(list(array["type"]), [x.type for x in symbols])
+
+    def test_no_symbol_tables(self):
+        with pyreadelf.read_elf(fixtures.path("obj.o")) as elf:
+            self.assertEqual(len(pyreadelf.symbol_array(elf, [])), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
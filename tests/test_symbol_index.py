@@ -0,0 +1,54 @@
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+def symbol(name, value, size, bind = pyreadelf.STB_GLOBAL, type = pyreadelf.STT_FUNC, section = 1):
+    return {"name": name, "value": value, "size": size, "bind": bind, "type": type, "section": section, "info": 0, "other": 0}
+
+
+class SymbolIndexTest(unittest.TestCase):
+
+    def test_library_symbols(self):
+        with pyreadelf.read_elf(fixtures.path("libfix.so")) as elf:
+            data = pyreadelf.elf_to_data(elf)
+            index = pyreadelf.SymbolIndex.from_data(data)
+            fix_add = [x for x in data["symbols"] if x["name"] == "fix_add"][0]
+        self.assertEqual(index.lookup(fix_add["value"])["name"], "fix_add")
+        self.assertEqual(index.lookup(fix_add["value"] + fix_add["size"] - 1)["name"], "fix_add")
+
+    def test_absolute_symbols_are_not_indexed(self):
+        with pyreadelf.read_elf(fixtures.path("libfix.so")) as elf:
+            data = pyreadelf.elf_to_data(elf)
+            self.assertTrue([x for x in data["symbols"] if x["name"] == "FIX_1.0" and x["section"] == pyreadelf.ESHN_ABS])
+            index = pyreadelf.SymbolIndex.from_data(data)
+        self.assertEqual(index.lookup(0), None)
+
+    def test_undefined_and_common_symbols_are_not_indexed(self):
+        index = pyreadelf.SymbolIndex([symbol("undefined", 0x100, 4, section = pyreadelf.ESHN_UNDEF),
+            symbol("common", 0x200, 4, type = pyreadelf.STT_OBJECT, section = pyreadelf.ESHN_COMMON)])
+        self.assertEqual(len(index), 0)
+
+    def test_overlaps(self):
+        index = pyreadelf.SymbolIndex([symbol("outer", 0x100, 0x100), symbol("inner", 0x140, 0x10),
+            symbol("weak_alias", 0x300, 8, bind = pyreadelf.STB_WEAK), symbol("strong", 0x300, 8),
+            symbol("marker", 0x400, 0)])
+        self.assertEqual(index.lookup(0x13f)["name"], "outer")
+        self.assertEqual(index.lookup(0x140)["name"], "inner")
+        self.assertEqual(index.lookup(0x150)["name"], "outer")
+        self.assertEqual(index.lookup(0x304)["name"], "strong")
+        self.assertEqual(index.lookup(0x400)["name"], "marker")
+        self.assertEqual(index.lookup(0x401), None)
+        self.assertEqual(index.lookup(0x200), None)
+        addresses = range(0xf0, 0x410, 4)
+        self.assertEqual(index.lookup_sorted(addresses), [index.lookup(x) for x in addresses])
+        self.assertRaises(ValueError, index.lookup_sorted, [2, 1])
+
+    def test_arm_thumb_bit(self):
+        index = pyreadelf.SymbolIndex([symbol("thumb", 0x1001, 8)], pyreadelf.EM_ARM)
+        self.assertEqual(index.lookup(0x1000)["name"], "thumb")
+
+
+if __name__ == "__main__":
+    unittest.main()
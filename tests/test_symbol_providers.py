@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class SymbolProviderIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix = "pyreadelf-providers-")
+        self.index = pyreadelf.SymbolProviderIndex(os.path.join(self.directory, "index.db"))
+        self.sysroot = fixtures.path("sysroot")
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.directory, True)
+
+    def test_providers(self):
+        self.assertEqual(self.index.build(self.sysroot), 3)
+        self.assertEqual(self.index.providers("fix_add"), [{"path": "/opt/app/lib/libfix.so.1", "version": "FIX_1.0", "default": True}])
+        self.assertEqual([x["path"] for x in self.index.providers("base_value", "BASE_1.0")], ["/usr/lib/libbase.so"])
+        self.assertEqual(self.index.providers("base_value", "BASE_2.0"), [])
+        self.assertEqual(self.index.providers("fix_hidden"), [])
+        self.assertEqual(self.index.providers("ghost_func"), [])
+
+    def test_unresolved_imports(self):
+        self.index.build(self.sysroot)
+        self.assertEqual([x["name"] for x in self.index.unresolved_imports("/opt/app/lib/libfix.so.1")], ["ghost_func"])
+        self.assertEqual(self.index.unresolved_imports("/opt/app/bin/app"), [])
+        self.assertEqual([x["name"] for x in self.index.unresolved_imports("/opt/app/bin/app", weak = True)], ["missing_hook"])
+        self.assertRaises(Exception, self.index.unresolved_imports, "/opt/app/bin/missing")
+
+    def test_files_found_twice(self):
+        paths = [self.sysroot, os.path.join(self.sysroot, "usr/lib/libbase.so"), os.path.join(self.sysroot, "usr/lib/libbase.so")]
+        self.assertEqual(self.index.build(self.sysroot, paths), 3)
+        self.assertEqual(len(self.index.providers("base_value")), 1)
+
+    def test_rebuild_replaces_the_index(self):
+        self.index.build(self.sysroot)
+        self.assertEqual(self.index.build(self.sysroot, [os.path.join(self.sysroot, "usr")]), 1)
+        self.assertEqual(self.index.providers("fix_add"), [])
+        self.assertEqual(len(self.index.providers("base_value")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import fixtures
+from fixtures import pyreadelf
+
+
+class TriageTest(unittest.TestCase):
+
+    def full(self, filename):
+        with pyreadelf.read_elf(filename) as elf:
+            return pyreadelf.materialize(pyreadelf.elf_to_data(elf, tables = ["header", "program_headers"]))
+
+    def test_matches_full_parse(self):
+        for name in ("app", "libfix.so", "obj.o"):
+            filename = fixtures.path(name)
+            self.assertEqual(pyreadelf.triage_file(filename), self.full(filename))
+
+    def test_program_headers_beyond_the_prefix(self):
+        filename = fixtures.path("app")
+        self.assertEqual(pyreadelf.triage_file(filename, prefix_size = 80), self.full(filename))
+
+    def test_given_prefix(self):
+        filename = fixtures.path("libfix.so")
+        prefix = open(filename, "rb").read(4096)
+        self.assertEqual(pyreadelf.triage_file(filename, prefix = prefix), self.full(filename))
+
+    def test_short_files(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "short")
+            open(filename, "wb").write(open(fixtures.path("app"), "rb").read(40))
+            self.assertRaises(Exception, pyreadelf.triage_file, filename)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
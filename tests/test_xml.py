@@ -0,0 +1,46 @@
+import StringIO
+import unittest
+import xml.dom.minidom
+
+import fixtures
+from fixtures import pyreadelf
+
+
+def tree(node):
+    """Element tree of a DOM node as nested (name, text, children) tuples, ignoring whitespace between elements"""
+    children = [x for x in node.childNodes if x.nodeType == x.ELEMENT_NODE]
+    text = "".join(x.data for x in node.childNodes if x.nodeType == x.TEXT_NODE)
+    if children:
+        text = text.strip()
+    return (node.tagName, text, [tree(x) for x in children])
+
+
+def write(elem, name, indent = "    "):
+    out = StringIO.StringIO()
+    pyreadelf.write_elfxml(elem, name, out, indent)
+    return out.getvalue()
+
+
+class WriteElfXmlTest(unittest.TestCase):
+
+    def test_lists_use_singular_names(self):
+        self.assertEqual(write({"entries": [1, 2]}, "r", ""), "<r><entries><entry>1</entry><entry>2</entry></entries></r>")
+        self.assertEqual(write({"libraries": []}, "r", ""), "<r><libraries/></r>")
+
+    def test_escapes_text(self):
+        self.assertEqual(write({"name": 'a<b&"c"'}, "r", ""), "<r><name>a&lt;b&amp;&quot;c&quot;</name></r>")
+
+    def test_indentation(self):
+        self.assertEqual(write({"value": 1}, "r"), "<r>\n    <value>1</value>\n</r>\n")
+
+    def test_matches_minidom_output(self):
+        with pyreadelf.read_elf(fixtures.path("obj.o")) as elf:
+            data = pyreadelf.materialize(pyreadelf.elf_to_data(elf))
+        streamed = xml.dom.minidom.parseString(write(data, "readelf"))
+        document = xml.dom.minidom.Document()
+        built = pyreadelf.to_elfxml(data, "readelf", document)
+        self.assertEqual(tree(streamed.documentElement), tree(built))
+
+
+if __name__ == "__main__":
+    unittest.main()